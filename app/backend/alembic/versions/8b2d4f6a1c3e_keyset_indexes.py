@@ -0,0 +1,75 @@
+"""keyset indexes: NOT NULL created_at, id as trailing index column
+
+Revision ID: 8b2d4f6a1c3e
+Revises: 7a1c3e5b9d2f
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4f6a1c3e'
+down_revision: Union[str, Sequence[str], None] = '7a1c3e5b9d2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE = "status = 'active'"
+
+# (name, table, columns, partial predicate) - keep in sync with __table_args__ in models/
+INDEXES = [
+    # Public feed: status='active' [AND state=?] [AND category=?] ORDER BY created_at DESC, id DESC
+    ('ix_listings_active_created_at', 'listings', ['created_at DESC', 'id DESC'], ACTIVE),
+    ('ix_listings_active_state_created_at', 'listings', ['state', 'created_at DESC', 'id DESC'], ACTIVE),
+    ('ix_listings_active_category_created_at', 'listings', ['category', 'created_at DESC', 'id DESC'], ACTIVE),
+    # Admin listings: [status=?] ORDER BY created_at DESC, id DESC
+    ('ix_listings_status_created_at', 'listings', ['status', 'created_at DESC', 'id DESC'], None),
+    ('ix_listings_created_at', 'listings', ['created_at DESC', 'id DESC'], None),
+    # My listings: user_id=? ORDER BY created_at DESC, id DESC
+    ('ix_listings_user_id_created_at', 'listings', ['user_id', 'created_at DESC', 'id DESC'], None),
+    # Admin payments: [status=?] ORDER BY created_at DESC, id DESC
+    ('ix_payments_status_created_at', 'payments', ['status', 'created_at DESC', 'id DESC'], None),
+    ('ix_payments_created_at', 'payments', ['created_at DESC', 'id DESC'], None),
+]
+
+TABLES = ['listings', 'payments']
+
+
+def _recreate_indexes(with_id: bool) -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=is_postgres)
+            op.create_index(
+                name,
+                table,
+                [sa.text(column) for column in (columns if with_id else columns[:-1])],
+                unique=False,
+                postgresql_concurrently=is_postgres,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The keyset seek compares (created_at, id) as a row value, which requires created_at NOT NULL
+    for table in TABLES:
+        op.execute(f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    _recreate_indexes(with_id=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # batch_alter_table rebuilds the table on SQLite, so indexes are recreated after it
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+    _recreate_indexes(with_id=False)
@@ -0,0 +1,49 @@
+"""payments: lowercase tx_hash, unique among verified payments
+
+Revision ID: 9d3f5b7c2e4a
+Revises: 8b2d4f6a1c3e
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f5b7c2e4a'
+down_revision: Union[str, Sequence[str], None] = '8b2d4f6a1c3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERIFIED = "status = 'verified'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hashes are compared with plain equality from now on (normalize_tx_hash in services/payments.py)
+    op.execute("UPDATE payments SET tx_hash = lower(trim(tx_hash)) WHERE tx_hash IS NOT NULL")
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_payments_tx_hash_verified',
+            'payments',
+            ['tx_hash'],
+            unique=True,
+            if_not_exists=True,
+            postgresql_concurrently=is_postgres,
+            postgresql_where=sa.text(VERIFIED),
+            sqlite_where=sa.text(VERIFIED),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_payments_tx_hash_verified', table_name='payments', if_exists=True, postgresql_concurrently=is_postgres
+        )
@@ -0,0 +1,32 @@
+"""payments: submitted_at
+
+Revision ID: b4e6a8c0d2f1
+Revises: 9d3f5b7c2e4a
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e6a8c0d2f1'
+down_revision: Union[str, Sequence[str], None] = '9d3f5b7c2e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('payments', sa.Column('submitted_at', sa.DateTime(), nullable=True))
+    # Hashes already waiting for verification get a full PAYMENT_VERIFY_MAX_AGE window
+    op.execute(
+        "UPDATE payments SET submitted_at = CURRENT_TIMESTAMP WHERE status = 'pending' AND tx_hash IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('payments', 'submitted_at')
@@ -0,0 +1,50 @@
+"""payments: reference, unique among open payments
+
+Revision ID: c7e9b1d3f5a2
+Revises: b4e6a8c0d2f1
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e9b1d3f5a2'
+down_revision: Union[str, Sequence[str], None] = 'b4e6a8c0d2f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OPEN = "reference IS NOT NULL AND status IN ('pending', 'rejected')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing payments keep reference NULL: they ask for the flat price and are not indexed
+    op.add_column('payments', sa.Column('reference', sa.Integer(), nullable=True))
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_payments_reference_open',
+            'payments',
+            ['reference'],
+            unique=True,
+            if_not_exists=True,
+            postgresql_concurrently=is_postgres,
+            postgresql_where=sa.text(OPEN),
+            sqlite_where=sa.text(OPEN),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_payments_reference_open', table_name='payments', if_exists=True, postgresql_concurrently=is_postgres
+        )
+    op.drop_column('payments', 'reference')
@@ -0,0 +1,63 @@
+"""listing feed indexes
+
+Revision ID: d24595056f65
+Revises: 69c09aef4090
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd24595056f65'
+down_revision: Union[str, Sequence[str], None] = '69c09aef4090'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE = "status = 'active'"
+
+# (name, table, columns, partial predicate) - keep in sync with __table_args__ in models/
+INDEXES = [
+    # Public feed: status='active' [AND state=?] [AND category=?] ORDER BY created_at DESC
+    ('ix_listings_active_created_at', 'listings', ['created_at DESC'], ACTIVE),
+    ('ix_listings_active_state_created_at', 'listings', ['state', 'created_at DESC'], ACTIVE),
+    ('ix_listings_active_category_created_at', 'listings', ['category', 'created_at DESC'], ACTIVE),
+    # Admin listings: [status=?] ORDER BY created_at DESC
+    ('ix_listings_status_created_at', 'listings', ['status', 'created_at DESC'], None),
+    ('ix_listings_created_at', 'listings', ['created_at DESC'], None),
+    # My listings: user_id=? ORDER BY created_at DESC
+    ('ix_listings_user_id_created_at', 'listings', ['user_id', 'created_at DESC'], None),
+    # Admin payments: [status=?] ORDER BY created_at DESC
+    ('ix_payments_status_created_at', 'payments', ['status', 'created_at DESC'], None),
+    ('ix_payments_created_at', 'payments', ['created_at DESC'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [sa.text(column) for column in columns],
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=is_postgres,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=is_postgres)
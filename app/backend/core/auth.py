@@ -1,11 +1,18 @@
+import asyncio
 import base64
 import hashlib
 import logging
+import re
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
+from core.background import PeriodicTask
+from core.cache import TTLCache
 from core.config import settings
 from jose import JWTError, jwt
 from jose.exceptions import ExpiredSignatureError, JWSSignatureError, JWTClaimsError
@@ -34,17 +41,15 @@ def generate_code_challenge(code_verifier: str) -> str:
     return base64.urlsafe_b64encode(digest).decode("utf-8").rstrip("=")
 
 
-async def get_jwks() -> Dict[str, Any]:
-    """Get JWKS (JSON Web Key Set) from OIDC provider."""
+async def fetch_jwks() -> httpx.Response:
+    """Download the JWKS (JSON Web Key Set) from the OIDC provider."""
     jwks_url = f"{settings.oidc_issuer_url}/.well-known/jwks.json"
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with httpx.AsyncClient(timeout=settings.jwks_fetch_timeout) as client:
             logger.info(f"Fetching JWKS from: {jwks_url}")
             response = await client.get(jwks_url)
             response.raise_for_status()
-            jwks_data = response.json()
-            logger.info(f"Successfully fetched JWKS with {len(jwks_data.get('keys', []))} keys")
-            return jwks_data
+            return response
     except httpx.TimeoutException as e:
         logger.error(f"Timeout while fetching JWKS from {jwks_url}: {e}")
         raise Exception("Unable to retrieve authentication keys")
@@ -56,6 +61,134 @@ async def get_jwks() -> Dict[str, Any]:
         raise Exception("Unable to retrieve authentication keys")
 
 
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class JWKSCache:
+    """Process-wide JWKS cache.
+
+    Keys are reused until the TTL from Cache-Control max-age (or JWKS_CACHE_TTL) runs
+    out. An unknown kid triggers a refresh so rotated keys are picked up immediately,
+    but at most once per JWKS_MIN_REFRESH_INTERVAL. Concurrent callers that need a
+    refresh wait on a single fetch instead of each downloading the key set.
+
+    A failed fetch is shared the same way: callers that waited on it get its error,
+    and no new fetch starts for JWKS_REFRESH_BACKOFF seconds. Meanwhile the keys
+    already loaded keep being served, so an issuer outage only matters on a cold cache.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._jwks: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._failed_at = float("-inf")
+        self._failure: Optional[Exception] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Lambda may run each invocation on a fresh event loop; a lock cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _ttl_from(self, response: httpx.Response) -> float:
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control.lower() or "no-cache" in cache_control.lower():
+            return 0.0
+        match = _MAX_AGE_RE.search(cache_control)
+        return float(match.group(1)) if match else float(settings.jwks_cache_ttl)
+
+    def _backing_off(self, now: float) -> bool:
+        return now - self._failed_at < settings.jwks_refresh_backoff
+
+    async def _refresh(self, requested_at: float) -> None:
+        async with self._get_lock():
+            if self._fetched_at > requested_at:
+                return  # another caller refreshed while we were waiting
+            if self._failed_at > requested_at or self._backing_off(time.monotonic()):
+                raise self._failure  # share the failure instead of fetching again
+            try:
+                response = await fetch_jwks()
+                jwks = response.json()
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                self._failure = e
+                logger.warning(f"JWKS refresh failed, retrying in {settings.jwks_refresh_backoff}s: {e}")
+                raise
+            now = time.monotonic()
+            self._jwks = jwks
+            self._keys = {jwk["kid"]: jwk for jwk in jwks.get("keys", []) if jwk.get("kid")}
+            self._fetched_at = now
+            self._expires_at = now + self._ttl_from(response)
+            logger.info(f"Successfully fetched JWKS with {len(self._keys)} keys")
+
+    async def _refresh_or_stale(self, now: float) -> None:
+        """Refresh, but fall back to the loaded key set if the fetch fails (or failed recently)."""
+        if self._jwks and self._backing_off(now):
+            return
+        try:
+            await self._refresh(now)
+        except Exception:
+            if not self._jwks:
+                raise
+            logger.debug("Serving cached JWKS while the issuer is unreachable")
+
+    async def get_jwks(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self._refresh_or_stale(now)
+        return self._jwks
+
+    async def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """Return the JWK for kid, refreshing on expiry or (rate-limited) on a kid miss."""
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self._refresh_or_stale(now)
+        elif kid not in self._keys and now - self._fetched_at >= settings.jwks_min_refresh_interval:
+            logger.info(f"Key ID {kid} not in cached JWKS, refreshing")
+            await self._refresh_or_stale(now)
+        return self._keys.get(kid)
+
+    def clear(self) -> None:
+        self._keys, self._jwks = {}, {}
+        self._expires_at = self._fetched_at = 0.0
+        self._failed_at, self._failure = float("-inf"), None
+
+
+jwks_cache = JWKSCache()
+
+
+async def get_jwks() -> Dict[str, Any]:
+    """Get JWKS (JSON Web Key Set) from OIDC provider (cached)."""
+    return await jwks_cache.get_jwks()
+
+
+def _base64url_decode(inp: str) -> bytes:
+    """Decode base64url-encoded string."""
+    padding = 4 - (len(inp) % 4)
+    if padding != 4:
+        inp += "=" * padding
+    return base64.urlsafe_b64decode(inp)
+
+
+@lru_cache(maxsize=32)
+def rsa_jwk_to_pem(n: str, e: str) -> bytes:
+    """Convert RSA JWK components to a PEM public key; cached because keys rarely rotate."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    public_numbers = rsa.RSAPublicNumbers(
+        int.from_bytes(_base64url_decode(e), "big"), int.from_bytes(_base64url_decode(n), "big")
+    )
+    return public_numbers.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM, format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
 class IDTokenValidationError(Exception):
     """Custom exception for ID token validation errors."""
 
@@ -94,26 +227,133 @@ def create_access_token(claims: Dict[str, Any], expires_minutes: Optional[int] =
     )
 
     token = jwt.encode(token_claims, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
-    # Log user hash instead of actual user ID to avoid exposing sensitive information
-    user_id = token_claims.get("sub", "unknown")
-    user_hash = hashlib.sha256(str(user_id).encode()).hexdigest()[:8] if user_id != "unknown" else "unknown"
-    logger.debug("Authentication token created for user hash: %s", user_hash)
+    if logger.isEnabledFor(logging.DEBUG):
+        # Log user hash instead of actual user ID to avoid exposing sensitive information
+        logger.debug("Authentication token created for user hash: %s", _user_hash(token_claims.get("sub")))
     return token
 
 
+def _user_hash(user_id: Any) -> str:
+    return hashlib.sha256(str(user_id).encode()).hexdigest()[:8] if user_id is not None else "unknown"
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _seconds_until_exp(payload: Dict[str, Any]) -> float:
+    exp = payload.get("exp")
+    return float(exp) - time.time() if isinstance(exp, (int, float)) else 0.0
+
+
+def _max_token_lifetime() -> float:
+    try:
+        return int(getattr(settings, "jwt_expire_minutes", 60)) * 60.0
+    except (TypeError, ValueError):
+        return 3600.0
+
+
+class TokenRevocations:
+    """Revoked access tokens, and per-user cut-offs ("every token issued so far").
+
+    Each entry is kept until the tokens it covers have expired, and there is no
+    size cap: an LRU could evict a revocation while its token is still valid.
+    Entries are few (one per logout / deleted user within a token lifetime) and
+    expired ones are purged in the background. Like verified_token_cache, this is
+    per process.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[bytes, float] = {}  # digest -> token exp (epoch seconds)
+        self._users: Dict[str, Tuple[float, float]] = {}  # sub -> (revoked at, keep until)
+        self._lock = threading.Lock()
+
+    def revoke_token(self, digest: bytes, exp: float) -> None:
+        with self._lock:
+            self._tokens[digest] = exp
+
+    def revoke_user(self, user_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._users[str(user_id)] = (now, now + _max_token_lifetime())
+
+    def token_revoked(self, digest: bytes) -> bool:
+        exp = self._tokens.get(digest)
+        return exp is not None and exp > time.time()
+
+    def user_revoked(self, payload: Dict[str, Any]) -> bool:
+        entry = self._users.get(str(payload.get("sub")))
+        iat = payload.get("iat")
+        return entry is not None and (not isinstance(iat, (int, float)) or iat <= entry[0])
+
+    def purge(self) -> int:
+        now = time.time()
+        with self._lock:
+            tokens = [digest for digest, exp in self._tokens.items() if exp <= now]
+            users = [user_id for user_id, (_, keep_until) in self._users.items() if keep_until <= now]
+            for digest in tokens:
+                del self._tokens[digest]
+            for user_id in users:
+                del self._users[user_id]
+        return len(tokens) + len(users)
+
+
+# Verified token digest -> claims; an entry never outlives the token's exp
+verified_token_cache = TTLCache(maxsize=settings.access_token_cache_size, ttl=settings.access_token_cache_ttl)
+token_revocations = TokenRevocations()
+
+
+async def purge_token_revocations() -> int:
+    return token_revocations.purge()
+
+
+token_revocation_purger = PeriodicTask("Access token revocation purge", 600, purge_token_revocations)
+
+
+def revoke_access_token(token: str) -> None:
+    """Reject a token from now on in this process (e.g. on logout), even though its signature is valid."""
+    digest = _token_digest(token)
+    verified_token_cache.pop(digest)
+    try:
+        payload = jwt.get_unverified_claims(token)
+    except JWTError:
+        return
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and exp > time.time():
+        token_revocations.revoke_token(digest, float(exp))
+
+
+def revoke_user_access_tokens(user_id: str) -> None:
+    """Reject every token issued to a user so far (e.g. when the account is deleted)."""
+    token_revocations.revoke_user(user_id)
+
+
 def decode_access_token(token: str) -> Dict[str, Any]:
     """Decode and validate JWT access token."""
     if not settings.jwt_secret_key:
         logger.error("JWT secret key is not configured")
         raise AccessTokenError("Authentication service is misconfigured")
 
+    digest = _token_digest(token)
+    if token_revocations.token_revoked(digest):
+        logger.info("Authentication token has been revoked")
+        raise AccessTokenError("Token has been revoked")
+
+    cached = verified_token_cache.get(digest)
+    if cached is not None:
+        # TTLCache expiry is monotonic-clock based; re-check exp against wall time
+        if _seconds_until_exp(cached) > 0:
+            if token_revocations.user_revoked(cached):
+                logger.info("Authentication token has been revoked")
+                raise AccessTokenError("Token has been revoked")
+            return dict(cached)
+        verified_token_cache.pop(digest)
+
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        # Log user hash instead of actual user ID to avoid exposing sensitive information
-        user_id = payload.get("sub", "unknown")
-        user_hash = hashlib.sha256(str(user_id).encode()).hexdigest()[:8] if user_id != "unknown" else "unknown"
-        logger.debug("Authentication token validated for user hash: %s", user_hash)
-        return payload
+        if logger.isEnabledFor(logging.DEBUG):
+            # Log user hash instead of actual user ID to avoid exposing sensitive information
+            logger.debug("Authentication token validated for user hash: %s", _user_hash(payload.get("sub")))
     except ExpiredSignatureError as exc:
         logger.info("Authentication token has expired")
         raise AccessTokenError("Token has expired") from exc
@@ -122,6 +362,15 @@ def decode_access_token(token: str) -> Dict[str, Any]:
         logger.warning("Token validation failed: %s", type(exc).__name__)
         raise AccessTokenError("Invalid authentication token") from exc
 
+    if token_revocations.user_revoked(payload):
+        logger.info("Authentication token has been revoked")
+        raise AccessTokenError("Token has been revoked")
+
+    remaining = _seconds_until_exp(payload)
+    if remaining > 0:
+        verified_token_cache.set(digest, payload, ttl=min(remaining, settings.access_token_cache_ttl))
+    return dict(payload)
+
 
 async def validate_id_token(id_token: str) -> Optional[Dict[str, Any]]:
     """Validate ID token with proper JWT signature verification using JWKS."""
@@ -134,22 +383,15 @@ async def validate_id_token(id_token: str) -> Optional[Dict[str, Any]]:
             logger.error("ID token validation failed: No key ID found in JWT header")
             raise IDTokenValidationError("Token format is invalid", "missing_kid")
 
-        # Get JWKS from the provider
+        # Get the signing key from the (cached) JWKS
         try:
-            jwks = await get_jwks()
+            key = await jwks_cache.get_key(kid)
         except Exception as e:
             logger.error(
                 f"ID token validation failed: Failed to fetch JWKS from issuer {settings.oidc_issuer_url}: {e}"
             )
             raise IDTokenValidationError("Unable to retrieve authentication keys", "jwks_fetch_error")
 
-        # Find the matching key
-        key = None
-        for jwk in jwks.get("keys", []):
-            if jwk.get("kid") == kid:
-                key = jwk
-                break
-
         if not key:
             logger.error(
                 f"ID token validation failed: No key found for kid: {kid} in JWKS from {settings.oidc_issuer_url}"
@@ -157,31 +399,8 @@ async def validate_id_token(id_token: str) -> Optional[Dict[str, Any]]:
             raise IDTokenValidationError("Authentication key validation failed", "key_not_found")
 
         # Convert JWK to PEM format for jose library
-        import base64
-
-        from cryptography.hazmat.primitives import serialization
-        from cryptography.hazmat.primitives.asymmetric import rsa
-
-        def base64url_decode(inp):
-            """Decode base64url-encoded string."""
-            padding = 4 - (len(inp) % 4)
-            if padding != 4:
-                inp += "=" * padding
-            return base64.urlsafe_b64decode(inp)
-
         try:
-            # Extract RSA components
-            n = int.from_bytes(base64url_decode(key["n"]), "big")
-            e = int.from_bytes(base64url_decode(key["e"]), "big")
-
-            # Construct RSA public key
-            public_numbers = rsa.RSAPublicNumbers(e, n)
-            public_key = public_numbers.public_key()
-
-            # Convert to PEM format
-            pem_key = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM, format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
+            pem_key = rsa_jwk_to_pem(key["n"], key["e"])
         except Exception as e:
             logger.error(f"ID token validation failed: Failed to convert JWK to PEM format: {e}")
             raise IDTokenValidationError("Authentication key processing failed", "key_conversion_error")
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Every PeriodicTask registers itself here; the app lifespan starts whatever was imported
+_registry: List["PeriodicTask"] = []
+
+
+class PeriodicTask:
+    """Runs an async job every `interval` seconds on the app's event loop.
+
+    Failures are logged and the loop keeps going. On Lambda nothing runs between
+    invocations, so start() is a no-op there; jobs must not be needed for correctness.
+    """
+
+    def __init__(self, name: str, interval: float, job: Callable[[], Awaitable[Optional[int]]]):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self._task: Optional[asyncio.Task] = None
+        _registry.append(self)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                removed = await self.job()
+                if removed:
+                    logger.debug(f"{self.name}: removed {removed} rows")
+            except Exception as e:
+                logger.warning(f"{self.name} failed: {e}")
+
+    async def start(self) -> None:
+        if settings.is_lambda or self.interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def start_periodic_tasks() -> None:
+    for task in _registry:
+        await task.start()
+
+
+async def stop_periodic_tasks() -> None:
+    for task in _registry:
+        await task.stop()
@@ -22,6 +22,100 @@ class Settings(BaseSettings):
     lambda_function_name: str = "fastapi-backend"
     aws_region: str = "us-east-1"
 
+    # Database connection pool (QueuePool outside Lambda)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle: int = 3600
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    # Lambda: "single" keeps one pre-pinged connection per warm container, "null" opens one per request
+    db_lambda_pool_mode: str = "single"
+    db_lambda_pool_recycle: int = 300
+
+    # Per-request SQL statistics (Server-Timing header, /database/queries, N+1 warnings)
+    sql_metrics_enabled: bool = True
+    sql_server_timing: bool = True
+    sql_n_plus_one_threshold: int = 5
+
+    # Slow-query log: statements over the threshold are grouped by shape and EXPLAINed in the background
+    slow_query_threshold_ms: float = 200.0
+    slow_query_log_size: int = 200
+    slow_query_explain: bool = True
+    slow_query_explain_interval: float = 3600.0  # re-capture a shape's plan after this many seconds
+    slow_query_max_pending_explains: int = 2
+
+    # Skip create_all at startup when schema_meta matches the models' fingerprint
+    schema_fingerprint_check: bool = True
+
+    # Read replica (DATABASE_READ_URL) for read-only routes; empty disables it
+    database_read_url: str = ""
+    read_replica_max_lag: float = 5.0
+    read_replica_lag_check_interval: float = 5.0
+    # After a write, the same client reads from the primary for this many seconds
+    read_after_write_window: float = 10.0
+    read_after_write_cache_size: int = 10000
+
+    # List endpoints: total count strategy (exact, cached, estimate)
+    list_count_strategy: str = "exact"
+    list_count_cache_ttl: float = 30.0
+    list_count_estimate_threshold: int = 10000
+
+    # Listing detail: hot-listing payload cache
+    listing_detail_cache_size: int = 512
+    listing_detail_cache_ttl: float = 30.0
+
+    # Anonimax sessions (token query parameter). The session cache is per process, so its TTL
+    # is also how long other workers keep accepting a revoked session
+    session_expire_days: int = 30
+    session_cache_size: int = 10000
+    session_cache_ttl: float = 10.0
+
+    # Email verification / password reset tokens
+    verification_token_ttl_hours: int = 72
+    reset_token_ttl_hours: int = 1
+    token_purge_interval: float = 3600.0
+
+    # Password hashing (scrypt): KDF cost and worker pool bounds
+    password_scrypt_n: int = 16384
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+
+    # Rate limiting: "memory" (per process) or "database" (shared by workers / Lambda instances)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_max_keys: int = 100000
+    rate_limit_trust_forwarded_for: bool = False
+
+    # OIDC: JWKS cache (Cache-Control max-age wins when the issuer sends one)
+    jwks_cache_ttl: float = 3600.0
+    jwks_min_refresh_interval: float = 30.0
+    jwks_fetch_timeout: float = 10.0
+    jwks_refresh_backoff: float = 5.0  # after a failed fetch, no new attempt (cached keys are served) for this long
+
+    # Application JWTs: verified-token cache (entries never outlive the token's exp)
+    access_token_cache_size: int = 4096
+    access_token_cache_ttl: float = 300.0
+
+    # OIDC login state: "database" (multi-node safe) or "memory" (single node only)
+    oidc_state_backend: str = "database"
+    oidc_state_ttl_minutes: int = 10
+    oidc_state_purge_interval: float = 300.0
+
+    # On-chain BRZ payment verification (Polygon); disabled unless the RPC URL and both addresses are set
+    polygon_rpc_url: str = ""
+    brz_token_address: str = ""
+    payment_recipient_address: str = ""
+    payment_verify_interval: float = 30.0
+    payment_verify_batch_size: int = 50  # eth_getTransactionReceipt calls per JSON-RPC batch request
+    payment_verify_concurrency: int = 4  # batch requests in flight per run
+    payment_verify_confirmations: int = 32  # blocks on top of the transfer before it counts
+    payment_verify_rpc_timeout: float = 10.0
+    # Payments whose hash still can't be verified this long after submission are left to an admin
+    payment_verify_max_age: float = 86400.0
+    # Open payments (no hash submitted, or rejected) expire after this long and give back their amount
+    payment_reference_ttl_days: int = 7
+    payment_expire_interval: float = 3600.0
+
     @property
     def backend_url(self) -> str:
         """Generate backend URL from host and port."""
@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from core.cache import TTLCache
+from core.config import settings
+from core.enums import AutoStrEnum
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class CountStrategy(AutoStrEnum):
+    """How list endpoints compute `total`."""
+
+    EXACT = "exact"  # SELECT count(id) on every call
+    CACHED = "cached"  # exact count, memoized per filter set for a short TTL
+    ESTIMATE = "estimate"  # planner estimate for unfiltered queries, cached exact otherwise
+
+
+class CountCache(TTLCache):
+    """TTL cache of exact counts keyed by (table, filter set), invalidated per table."""
+
+    def invalidate(self, table_name: str) -> None:
+        """Drop every cached count for a table (called after writes)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table_name]:
+                del self._entries[key]
+
+
+count_cache = CountCache()
+
+
+def _default_strategy() -> CountStrategy:
+    try:
+        return CountStrategy(settings.list_count_strategy)
+    except ValueError:
+        logger.warning(f"Unknown LIST_COUNT_STRATEGY {settings.list_count_strategy!r}, using exact counts")
+        return CountStrategy.EXACT
+
+
+def _filters_key(filters: Dict[str, Any]) -> str:
+    return json.dumps(filters, sort_keys=True, default=str)
+
+
+async def _planner_estimate(db: AsyncSession, table_name: str) -> Optional[int]:
+    """Row estimate from pg_class.reltuples, or None when unavailable (-1 = never analyzed)."""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def count_total(
+    db: AsyncSession,
+    table_name: str,
+    count_query,
+    filters: Dict[str, Any],
+    strategy: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, bool]:
+    """Compute the total for a list query.
+
+    Args:
+        table_name: Table being counted (cache namespace and pg_class lookup)
+        count_query: The exact `SELECT count(id) ... WHERE ...` statement
+        filters: Every filter applied to count_query (user_id included); empty means unfiltered
+        strategy: Override of settings.list_count_strategy
+        params: Bind parameter values for count_query
+
+    Returns:
+        (total, total_is_estimate)
+    """
+    strategy = CountStrategy(strategy) if strategy else _default_strategy()
+
+    if strategy == CountStrategy.ESTIMATE and not filters:
+        estimate = await _planner_estimate(db, table_name)
+        # Small tables are cheap to count exactly and their estimates are the least reliable
+        if estimate is not None and estimate >= int(settings.list_count_estimate_threshold):
+            return estimate, True
+
+    if strategy == CountStrategy.EXACT:
+        result = await db.execute(count_query, params)
+        return result.scalar() or 0, False
+
+    key = (table_name, _filters_key(filters))
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached, False
+    result = await db.execute(count_query, params)
+    total = result.scalar() or 0
+    count_cache.set(key, total, float(settings.list_count_cache_ttl))
+    return total, False
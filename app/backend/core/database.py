@@ -1,20 +1,39 @@
 import asyncio
+import hashlib
+import json
 import logging
 import os
 import re
+import threading
 import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from asyncpg.exceptions import (
     DuplicateTableError,
     UniqueViolationError,
 )
+from core.cache import TTLCache
 from core.config import settings
-from sqlalchemy import DDL, text
+from core.counting import count_cache
+from core.sql_metrics import (
+    add_statement_observer,
+    install_sql_instrumentation,
+    statement_shape,
+    suspend_request_stats,
+)
+from fastapi import Request
+from sqlalchemy import DDL, Column, DateTime, Float, String, Table, event, exc, select, text
 from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import Insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +42,330 @@ class Base(DeclarativeBase):
     pass
 
 
+# Fingerprint of the metadata create_tables last applied, so warm starts can skip create_all
+schema_meta = Table(
+    "schema_meta",
+    Base.metadata,
+    Column("key", String(64), primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("create_all_ms", Float, nullable=True),  # duration of the create_all that stored it
+    Column("updated_at", DateTime, nullable=False),
+)
+SCHEMA_FINGERPRINT_KEY = "metadata"
+
+
+def _fingerprint_upsert(dialect_name: str, fingerprint: str, create_all_ms: float) -> Optional[Insert]:
+    """One INSERT ... ON CONFLICT (key) DO UPDATE, so workers starting together cannot collide."""
+    values = dict(
+        key=SCHEMA_FINGERPRINT_KEY, fingerprint=fingerprint, create_all_ms=create_all_ms, updated_at=datetime.now()
+    )
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None  # no portable upsert: the fingerprint is just not stored
+    statement = dialect_insert(schema_meta).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=[schema_meta.c.key],
+        set_={name: statement.excluded[name] for name in ("fingerprint", "create_all_ms", "updated_at")},
+    )
+
+
+def _is_duplicate_ddl_error(error: BaseException) -> bool:
+    """True for asyncpg's duplicate table / unique violation, also when wrapped by SQLAlchemy."""
+    duplicate = (UniqueViolationError, DuplicateTableError)
+    if isinstance(error, duplicate):
+        return True
+    orig = getattr(error, "orig", None)
+    # SQLAlchemy's asyncpg adapter re-raises the driver error as its own, chained via __cause__
+    return isinstance(orig, duplicate) or isinstance(getattr(orig, "__cause__", None), duplicate)
+
+
+class PoolStats:
+    """Counters for connection checkouts, including a histogram of time spent waiting for one."""
+
+    # Upper bounds in milliseconds; the last bucket catches everything slower
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.wait_counts = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        self.checkouts += 1
+        self.wait_total_ms += wait_ms
+        self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+        for index, bound in enumerate(self.WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                self.wait_counts[index] += 1
+                return
+        self.wait_counts[-1] += 1
+
+    def histogram(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in self.WAIT_BUCKETS_MS] + ["inf"]
+        return dict(zip(labels, self.wait_counts))
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.observe_wait(time.perf_counter() - start)
+
+
+class WriteTrackingSession(Session):
+    """Session that records in ``info["wrote"]`` whether it sent any INSERT/UPDATE/DELETE.
+
+    The tables written are collected too; on commit their cached list counts are
+    dropped, whether the write came from a service or straight from a router.
+    """
+
+
+def _written_tables(session) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+@event.listens_for(WriteTrackingSession, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+    # The session still holds the pre-flush sets here
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            tables.add(table)
+
+
+@event.listens_for(WriteTrackingSession, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and getattr(table, "name", None):
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(WriteTrackingSession, "after_commit")
+def _invalidate_written_counts(session):
+    for table in session.info.pop("written_tables", ()):
+        count_cache.invalidate(table)
+
+
+@event.listens_for(WriteTrackingSession, "after_rollback")
+def _forget_written_tables(session):
+    session.info.pop("written_tables", None)
+
+
+# Clients that wrote recently; their reads stay on the primary so they see their own writes
+recent_writers = TTLCache(settings.read_after_write_cache_size, settings.read_after_write_window)
+
+# Seconds behind the primary; 0 when caught up (both LSNs equal) even if nothing was replayed lately
+REPLICA_LAG_SQL = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+
+# Plan-only EXPLAIN per dialect: the statement is not executed
+EXPLAIN_PREFIX = {
+    "postgresql": "EXPLAIN (ANALYZE off, FORMAT JSON) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+EXPLAINABLE_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class SlowQueryLog:
+    """Statements slower than slow_query_threshold_ms, grouped by shape.
+
+    Keeps a ring buffer of the most recent slow executions and per-shape totals
+    (bounded LRU, same size). The first execution of a shape, and one per
+    slow_query_explain_interval after that, gets its plan captured by a background
+    task, so the request that hit it is not delayed. The EXPLAIN opens its own
+    unpooled connection: it never waits for (or holds) a slot of the request pool,
+    which on Lambda "single" mode is the one connection the next request needs.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._recent = deque(maxlen=maxsize)
+        self._shapes: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._explain_tasks = set()
+        # Request engine -> NullPool engine on the same URL, dropped along with it
+        self._explain_engines = weakref.WeakKeyDictionary()
+
+    def observe(self, conn, statement, parameters, executemany, elapsed_ms):
+        if elapsed_ms < settings.slow_query_threshold_ms or self.maxsize <= 0:
+            return
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return  # our own plan capture
+        shape = statement_shape(statement)
+        now = time.time()
+        with self._lock:
+            self._recent.append({"at": now, "ms": round(elapsed_ms, 3), "shape": shape})
+            entry = self._shapes.get(shape)
+            if entry is None:
+                entry = self._shapes[shape] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "explained_at": None,
+                    "explaining": False,
+                }
+                while len(self._shapes) > self.maxsize:
+                    self._shapes.popitem(last=False)
+            self._shapes.move_to_end(shape)
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = now
+            needs_plan = (
+                not entry["explaining"]
+                and (entry["explained_at"] is None or now - entry["explained_at"] > settings.slow_query_explain_interval)
+            )
+            if needs_plan and self._can_explain(conn, statement, executemany):
+                entry["explaining"] = True
+            else:
+                needs_plan = False
+
+        logger.warning(f"Slow query ({elapsed_ms:.1f}ms): {shape[:500]}")
+        if needs_plan:
+            self._schedule_explain(conn.engine, statement, parameters, shape)
+
+    def _can_explain(self, conn, statement, executemany) -> bool:
+        if not settings.slow_query_explain or executemany:
+            return False
+        if conn.engine.dialect.name not in EXPLAIN_PREFIX:
+            return False
+        if len(self._explain_tasks) >= settings.slow_query_max_pending_explains:
+            return False
+        return statement.lstrip().split(None, 1)[0].upper() in EXPLAINABLE_STATEMENTS
+
+    def _schedule_explain(self, sync_engine, statement, parameters, shape):
+        engine = next(
+            (e for e in (db_manager.engine, db_manager.read_engine) if e is not None and e.sync_engine is sync_engine),
+            None,
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if engine is None or loop is None:
+            self._set_plan(shape, None)
+            return
+        # Parameters are only held until the EXPLAIN has run; they are never stored
+        if isinstance(parameters, dict):
+            parameters = dict(parameters)
+        elif parameters is not None:
+            parameters = tuple(parameters)
+        task = loop.create_task(self._explain(engine, statement, parameters, shape))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, engine, statement, parameters, shape):
+        dialect = engine.dialect.name
+        plan = None
+        with suspend_request_stats():
+            try:
+                async with self._explain_engine(engine).connect() as conn:
+                    result = await conn.exec_driver_sql(EXPLAIN_PREFIX[dialect] + statement, parameters)
+                    rows = result.fetchall()
+                if dialect == "postgresql":
+                    plan = rows[0][0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                else:
+                    plan = [{"id": row[0], "parent": row[1], "detail": row[-1]} for row in rows]
+            except Exception as e:
+                logger.warning(f"Failed to EXPLAIN slow query: {e}")
+                plan = {"error": str(e)}
+        self._set_plan(shape, plan)
+
+    def _explain_engine(self, engine):
+        explain_engine = self._explain_engines.get(engine.sync_engine)
+        if explain_engine is None:
+            # Not instrumented: the plan capture stays out of the pool and query stats
+            explain_engine = create_async_engine(engine.url, poolclass=NullPool)
+            self._explain_engines[engine.sync_engine] = explain_engine
+        return explain_engine
+
+    def _set_plan(self, shape, plan):
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is not None:
+                entry["explaining"] = False
+                if plan is not None:
+                    entry["plan"] = plan
+                    entry["explained_at"] = time.time()
+
+    def top(self, limit: int = 20) -> dict:
+        """Top offenders by total time, plus the most recent slow executions."""
+        with self._lock:
+            shapes = sorted(self._shapes.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+            recent = list(self._recent)[-limit:]
+        return {
+            "threshold_ms": settings.slow_query_threshold_ms,
+            "top": [
+                {
+                    "shape": shape,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 3),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "last_seen": datetime.fromtimestamp(entry["last_seen"]).isoformat(),
+                    "plan": entry["plan"],
+                    "explained_at": (
+                        datetime.fromtimestamp(entry["explained_at"]).isoformat() if entry["explained_at"] else None
+                    ),
+                }
+                for shape, entry in shapes
+            ],
+            "recent": [
+                {**event, "at": datetime.fromtimestamp(event["at"]).isoformat()} for event in reversed(recent)
+            ],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._shapes.clear()
+
+
+slow_query_log = SlowQueryLog(settings.slow_query_log_size)
+add_statement_observer(slow_query_log.observe)
+
+
 class DatabaseManager:
     def __init__(self):
         self.engine = None
         self._initialized = False
         self.async_session_maker = None
+        self.read_engine = None  # optional replica from DATABASE_READ_URL
+        self.read_session_maker = None
+        self._replica_lag = None  # last measured lag in seconds, None if unknown
+        self._replica_lag_checked_at = 0.0
+        self._pool_loop = None  # event loop the pooled connections belong to
         self._init_lock = asyncio.Lock()  # Protect initialization process
         self._table_creation_lock = asyncio.Lock()  # Protect table creation process
 
@@ -113,29 +451,58 @@ class DatabaseManager:
                 or os.environ.get("IS_LAMBDA", "").lower() in ("true", "1", "yes")
             )
 
-            if is_lambda:
+            if is_lambda and settings.db_lambda_pool_mode == "null":
                 # Lambda: Use NullPool to avoid connection state conflicts
                 # NullPool creates a fresh connection for each request, avoiding "cannot switch to state" errors
                 engine_kwargs["poolclass"] = NullPool
                 # NullPool doesn't support pool_timeout, pool_size, max_overflow, pool_recycle, or pool_pre_ping
                 # These parameters are only valid for QueuePool
                 logger.info("Using NullPool for Lambda environment to avoid connection state conflicts")
+            elif is_lambda:
+                # Lambda: a container serves one request at a time, so keep exactly one connection.
+                # pre_ping revalidates it after a freeze/thaw; a short recycle drops it before
+                # server-side idle timeouts. get_db replaces the pool if the event loop changes.
+                engine_kwargs["poolclass"] = InstrumentedQueuePool
+                engine_kwargs["pool_size"] = 1
+                engine_kwargs["max_overflow"] = 0
+                engine_kwargs["pool_pre_ping"] = True
+                engine_kwargs["pool_recycle"] = settings.db_lambda_pool_recycle
+                engine_kwargs["pool_timeout"] = settings.db_pool_timeout
+                logger.info("Using single-connection pool for Lambda environment")
             else:
                 # Non-Lambda: Use QueuePool with connection pooling
-                engine_kwargs["pool_pre_ping"] = True  # Verify connections before using them
-                engine_kwargs["pool_size"] = 10  # Connection pool size
-                engine_kwargs["max_overflow"] = 20  # Maximum overflow connections
-                engine_kwargs["pool_recycle"] = 3600  # Connection recycle time (1 hour)
-                engine_kwargs["pool_timeout"] = 30  # Connection acquisition timeout (30 seconds)
-                logger.info("Using QueuePool with connection pooling for non-Lambda environment")
+                engine_kwargs["poolclass"] = InstrumentedQueuePool
+                engine_kwargs["pool_pre_ping"] = settings.db_pool_pre_ping  # Verify connections before using them
+                engine_kwargs["pool_size"] = settings.db_pool_size  # Connection pool size
+                engine_kwargs["max_overflow"] = settings.db_max_overflow  # Maximum overflow connections
+                engine_kwargs["pool_recycle"] = settings.db_pool_recycle  # Connection recycle time
+                engine_kwargs["pool_timeout"] = settings.db_pool_timeout  # Connection acquisition timeout
+                logger.info(
+                    f"Using QueuePool with connection pooling for non-Lambda environment "
+                    f"(size={settings.db_pool_size}, max_overflow={settings.db_max_overflow})"
+                )
 
             self.engine = create_async_engine(database_url, **engine_kwargs)
+            install_sql_instrumentation(self.engine)
+            self._pool_loop = asyncio.get_running_loop()
             logger.info("Database engine created successfully")
 
             logger.info("Creating async session maker...")
-            self.async_session_maker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+            self.async_session_maker = async_sessionmaker(
+                self.engine, class_=AsyncSession, sync_session_class=WriteTrackingSession, expire_on_commit=False
+            )
             logger.info("Async session maker created successfully")
 
+            if settings.database_read_url:
+                # Same pool configuration as the primary, sized independently by the replica's own limits
+                read_url = self._normalize_async_database_url(settings.database_read_url)
+                self.read_engine = create_async_engine(read_url, **engine_kwargs)
+                install_sql_instrumentation(self.read_engine)
+                self.read_session_maker = async_sessionmaker(
+                    self.read_engine, class_=AsyncSession, expire_on_commit=False
+                )
+                logger.info("Read replica engine created successfully")
+
             logger.info("Database connection initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}", exc_info=True)
@@ -152,6 +519,8 @@ class DatabaseManager:
 
         try:
             await self.engine.dispose()
+            if self.read_engine:
+                await self.read_engine.dispose()
             logger.info("Database connection closed and engine disposed")
         except Exception as e:
             logger.warning(f"Error disposing database engine: {e}")
@@ -159,10 +528,131 @@ class DatabaseManager:
             # Always reset references even if dispose fails
             self.engine = None
             self.async_session_maker = None
+            self.read_engine = None
+            self.read_session_maker = None
+            self._replica_lag = None
+            self._replica_lag_checked_at = 0.0
             self._initialized = False  # Reset initialization flag
 
+    async def ensure_pool_loop(self):
+        """Replace the pool if we are now running on a different event loop.
+
+        asyncpg connections are bound to the loop that opened them; on Lambda the
+        initialization may run on another loop than later invocations.
+        """
+        loop = asyncio.get_running_loop()
+        if self.engine is None or self._pool_loop is loop:
+            return
+        if self._pool_loop is not None:
+            logger.info("Event loop changed, replacing database connection pool")
+            # close=False: the old connections belong to the other loop and cannot be closed from here
+            await self.engine.dispose(close=False)
+            if self.read_engine:
+                await self.read_engine.dispose(close=False)
+        self._pool_loop = loop
+
+    async def replica_lag(self) -> Optional[float]:
+        """Replication lag of the read replica in seconds, measured at most once per check interval.
+
+        Returns None when it cannot be measured, which callers treat as too stale.
+        """
+        now = time.monotonic()
+        if now - self._replica_lag_checked_at < settings.read_replica_lag_check_interval:
+            return self._replica_lag
+        # Claim the slot first so concurrent requests reuse the previous value instead of piling on
+        self._replica_lag_checked_at = now
+        lag_sql = REPLICA_LAG_SQL.get(self.read_engine.dialect.name)
+        if lag_sql is None:
+            self._replica_lag = 0.0
+            return self._replica_lag
+        try:
+            async with self.read_engine.connect() as conn:
+                self._replica_lag = float((await conn.execute(text(lag_sql))).scalar() or 0.0)
+        except Exception as e:
+            logger.warning(f"Failed to measure replica lag, routing reads to primary: {e}")
+            self._replica_lag = None
+        return self._replica_lag
+
+    async def use_replica(self, client_key: Optional[str]) -> bool:
+        """Whether a read for this client may go to the replica."""
+        if not self.read_session_maker:
+            return False
+        if client_key and recent_writers.get(client_key):
+            return False
+        lag = await self.replica_lag()
+        return lag is not None and lag <= settings.read_replica_max_lag
+
+    @staticmethod
+    def _pool_details(pool) -> dict:
+        details = {"pool_class": type(pool).__name__}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            details.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+            )
+        return details
+
+    def pool_status(self) -> dict:
+        """Live pool statistics for monitoring."""
+        if not self.engine:
+            return {"initialized": False}
+        status = {"initialized": True, **self._pool_details(self.engine.sync_engine.pool)}
+        if self.read_engine:
+            status["replica"] = {
+                **self._pool_details(self.read_engine.sync_engine.pool),
+                "lag_seconds": self._replica_lag,
+            }
+        checkouts = pool_stats.checkouts
+        status["checkouts"] = checkouts
+        status["timeouts"] = pool_stats.timeouts
+        status["wait_ms"] = {
+            "avg": round(pool_stats.wait_total_ms / checkouts, 3) if checkouts else 0.0,
+            "max": round(pool_stats.wait_max_ms, 3),
+            "histogram": pool_stats.histogram(),
+        }
+        return status
+
+    def schema_fingerprint(self) -> str:
+        """Hash of the DDL create_all would emit for the currently imported models on this dialect.
+
+        Statements run by after_create listeners are included through Base.metadata.info["extra_ddl"]
+        (name -> statements), so changing them also reruns create_all.
+        """
+        dialect = self.engine.dialect
+        ddl = []
+        for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+            ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+            for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+                ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+        for _, statements in sorted(Base.metadata.info.get("extra_ddl", {}).items()):
+            ddl.extend(statements)
+        return hashlib.blake2b("\n".join(ddl).encode(), digest_size=16).hexdigest()
+
+    async def _stored_schema_fingerprint(self):
+        """(fingerprint, create_all_ms) from schema_meta, or None if absent/unreadable."""
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.execute(
+                    select(schema_meta.c.fingerprint, schema_meta.c.create_all_ms).where(
+                        schema_meta.c.key == SCHEMA_FINGERPRINT_KEY
+                    )
+                )
+                return result.first()
+        except Exception as e:
+            # Typically the table does not exist yet on a fresh database
+            logger.debug(f"No stored schema fingerprint: {e}")
+            return None
+
     async def create_tables(self):
-        """Create all tables with thread safety"""
+        """Create all tables with thread safety
+
+        Skips create_all when schema_meta holds the fingerprint of the current metadata,
+        so warm starts cost one primary-key lookup instead of a catalog query per table.
+        """
         start_time = time.time()
         logger.debug("[DB_OP] Starting create_tables")
         await self._table_creation_lock.acquire()
@@ -179,19 +669,45 @@ class DatabaseManager:
             # await self.check_and_repair_existing_tables()
             # logger.info("🔧 Table structure repair completed")
 
+            fingerprint = None
+            if settings.schema_fingerprint_check:
+                try:
+                    fingerprint = self.schema_fingerprint()
+                except Exception as e:
+                    # Leave the error to create_all, which reports it with full context
+                    logger.warning(f"Could not compute schema fingerprint, running create_all: {e}")
+            if fingerprint:
+                stored = await self._stored_schema_fingerprint()
+                if stored is not None and stored.fingerprint == fingerprint:
+                    self._initialized = True
+                    check_ms = (time.time() - start_time) * 1000
+                    saved = (
+                        f", saved ~{stored.create_all_ms - check_ms:.1f}ms vs last create_all"
+                        if stored.create_all_ms is not None
+                        else ""
+                    )
+                    logger.info(f"Schema fingerprint {fingerprint} unchanged, skipped create_all ({check_ms:.1f}ms{saved})")
+                    return
+
             try:
                 logger.info("🔧 Starting table creation...")
+                create_start = time.time()
                 async with self.engine.begin() as conn:
                     await conn.run_sync(Base.metadata.create_all)
+                    create_all_ms = (time.time() - create_start) * 1000
+                    upsert = _fingerprint_upsert(conn.dialect.name, fingerprint, create_all_ms) if fingerprint else None
+                    if upsert is not None:
+                        await conn.execute(upsert)
                     self._initialized = True
-                    logger.info("Tables initialized successfully")
+                    logger.info(f"Tables initialized successfully (create_all {create_all_ms:.1f}ms)")
                     logger.debug(f"[DB_OP] Create tables completed in {time.time() - start_time:.4f}s")
-            except (UniqueViolationError, DuplicateTableError) as e:
+            except Exception as e:
+                if not _is_duplicate_ddl_error(e):
+                    logger.error(f"Failed to create tables: {e}")
+                    raise
+                # Another worker created the tables (or stored the fingerprint) at the same time
                 self._initialized = True
                 logger.info(f"Duplicate table creation: {e}, ignored.")
-            except Exception as e:
-                logger.error(f"Failed to create tables: {e}")
-                raise
         finally:
             self._table_creation_lock.release()
 
@@ -509,11 +1025,17 @@ class DatabaseManager:
 db_manager = DatabaseManager()
 
 
-async def get_db() -> AsyncSession:
-    """FastAPI dependency for database session with lazy initialization support"""
-    start_time = time.time()
-    logger.debug("[DB_OP] Starting get_db session creation")
+def _client_key(request: Optional[Request]) -> Optional[str]:
+    """Identify the caller for read-after-write stickiness: session token, bearer token or IP."""
+    if request is None:
+        return None
+    token = request.query_params.get("token") or request.headers.get("authorization")
+    if token:
+        return "t:" + hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+    return f"ip:{request.client.host}" if request.client else None
 
+
+async def _ensure_session_maker() -> None:
     # Lazy initialization for Lambda environments where lifespan may not trigger
     if not db_manager.async_session_maker:
         logger.warning("Database session maker not available, attempting lazy initialization...")
@@ -527,8 +1049,13 @@ async def get_db() -> AsyncSession:
         logger.error("No async database session maker available after initialization attempt")
         raise RuntimeError("Database not initialized")
 
+    await db_manager.ensure_pool_loop()
+
+
+@asynccontextmanager
+async def _session_scope(session_maker, start_time: float):
     try:
-        async with db_manager.async_session_maker() as session:
+        async with session_maker() as session:
             logger.debug(f"[DB_OP] Database session created successfully in {time.time() - start_time:.4f}s")
             try:
                 yield session
@@ -543,3 +1070,36 @@ async def get_db() -> AsyncSession:
     except Exception as e:
         logger.error(f"Failed to create database session: {e}", exc_info=True)
         raise
+
+
+async def get_db(request: Request = None) -> AsyncSession:
+    """FastAPI dependency for database session with lazy initialization support"""
+    start_time = time.time()
+    logger.debug("[DB_OP] Starting get_db session creation")
+
+    await _ensure_session_maker()
+
+    async with _session_scope(db_manager.async_session_maker, start_time) as session:
+        try:
+            yield session
+        finally:
+            if session.info.get("wrote") and (client_key := _client_key(request)):
+                recent_writers.set(client_key, True)
+
+
+async def get_read_db(request: Request = None) -> AsyncSession:
+    """FastAPI dependency for read-only routes.
+
+    Uses the DATABASE_READ_URL replica when one is configured, its lag is within
+    read_replica_max_lag and the client has not written within read_after_write_window;
+    otherwise falls back to the primary, exactly like get_db.
+    """
+    start_time = time.time()
+    logger.debug("[DB_OP] Starting get_read_db session creation")
+
+    await _ensure_session_maker()
+
+    use_replica = await db_manager.use_replica(_client_key(request))
+    session_maker = db_manager.read_session_maker if use_replica else db_manager.async_session_maker
+    async with _session_scope(session_maker, start_time) as session:
+        yield session
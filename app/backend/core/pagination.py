@@ -0,0 +1,150 @@
+import base64
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, inspect, or_, tuple_
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the request."""
+
+
+def resolve_sort(model, sort: Optional[str]) -> Tuple[Any, bool]:
+    """Resolve a `sort` parameter ('field' or '-field') to (column, descending).
+
+    No sort means the default `id DESC` ordering; a field that is not a mapped
+    column raises ValueError.
+    """
+    if not sort:
+        return model.id, True
+    descending = sort.startswith("-")
+    field_name = sort[1:] if descending else sort
+    if field_name not in inspect(model).column_attrs:
+        raise ValueError(f"Unknown sort field: {field_name}")
+    return getattr(model, field_name), descending
+
+
+def _nullable(sort_column) -> bool:
+    return any(column.nullable for column in sort_column.property.columns)
+
+
+def order_by_keyset(query, model, sort_column, descending: bool):
+    """Apply a total ordering: the sort column then the primary key as tie-breaker.
+
+    For a NOT NULL sort column this is plain ``col DESC, id DESC`` (or ASC), which an
+    index on ``(..., col DESC, id DESC)`` serves in either direction. Nullable columns
+    keep their NULLs last, which such an index cannot serve on Postgres.
+    """
+    if sort_column is model.id:
+        return query.order_by(model.id.desc() if descending else model.id.asc())
+    if not _nullable(sort_column):
+        if descending:
+            return query.order_by(sort_column.desc(), model.id.desc())
+        return query.order_by(sort_column.asc(), model.id.asc())
+    if descending:
+        return query.order_by(sort_column.desc().nulls_last(), model.id.desc())
+    return query.order_by(sort_column.asc().nulls_last(), model.id.asc())
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise InvalidCursorError("Invalid cursor")
+    return value
+
+
+def _coerce_value(column, value: Any) -> Any:
+    """Match a decoded cursor value to the column's Python type; raises InvalidCursorError.
+
+    A cursor is client-supplied: a value of the wrong type would otherwise only fail
+    in the driver (a 500) or silently compare as something else.
+    """
+    if value is None:
+        if not _nullable(column):
+            raise InvalidCursorError("Invalid cursor")
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, bool) != (python_type is bool):
+        raise InvalidCursorError("Invalid cursor")
+    if python_type in (float, Decimal) and isinstance(value, (int, float)):
+        return float(value) if python_type is float else Decimal(str(value))
+    if python_type is date and isinstance(value, datetime):
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(value, python_type):
+        raise InvalidCursorError("Invalid cursor")
+    return value
+
+
+def encode_cursor(sort: Optional[str], sort_value: Any, obj_id: Any) -> str:
+    """Encode the position after a row as an opaque URL-safe token."""
+    payload = json.dumps([sort or "", _encode_value(sort_value), obj_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[str], model) -> Tuple[Any, Any]:
+    """Decode a cursor into (sort_value, id); it must have been issued for the same sort.
+
+    Both values are checked against (and converted to) their column's type.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, sort_value, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        sort_value = _decode_value(sort_value)
+    except InvalidCursorError:
+        raise
+    except Exception as e:
+        logger.debug(f"Failed to decode cursor: {e}")
+        raise InvalidCursorError("Invalid cursor")
+    if cursor_sort != (sort or ""):
+        raise InvalidCursorError("Cursor does not match the requested sort")
+    sort_column, _ = resolve_sort(model, sort)
+    return _coerce_value(sort_column, sort_value), _coerce_value(model.id, obj_id)
+
+
+def keyset_condition(model, sort_column, descending: bool, sort_value: Any, obj_id: Any):
+    """WHERE clause selecting the rows strictly after (sort_value, obj_id) in keyset order."""
+    after_id = model.id < obj_id if descending else model.id > obj_id
+    if sort_column is model.id:
+        return after_id
+    if not _nullable(sort_column):
+        # Row-value comparison: one index range seek on (col, id)
+        position = tuple_(sort_column, model.id)
+        bound = tuple_(sort_value, obj_id)
+        return position < bound if descending else position > bound
+    if sort_value is None:
+        # Already inside the trailing NULL block: only the tie-breaker moves forward
+        return and_(sort_column.is_(None), after_id)
+    after_value = sort_column < sort_value if descending else sort_column > sort_value
+    return or_(after_value, and_(sort_column == sort_value, after_id), sort_column.is_(None))
+
+
+def next_cursor(items: Sequence[Any], sort: Optional[str], sort_column, has_more: bool) -> Optional[str]:
+    """Cursor for the page following `items`, or None when this was the last page."""
+    if not has_more or not items:
+        return None
+    last = items[-1]
+    return encode_cursor(sort, getattr(last, sort_column.key), last.id)
+
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Split a `limit + 1` fetch into the page and a has-more flag."""
+    return rows[:limit], len(rows) > limit
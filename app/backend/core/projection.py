@@ -0,0 +1,57 @@
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, create_model
+from sqlalchemy import inspect
+
+from core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class FieldProjection:
+    """Turns a `fields=a,b,c` query parameter into a column projection and a trimmed response.
+
+    Field names are validated once against the mapped columns of the ORM model; the
+    trimmed pydantic model for each distinct field set is built once and cached.
+    """
+
+    def __init__(self, model, response_model: Type[BaseModel]):
+        self.model = model
+        self.response_model = response_model
+        self.columns = frozenset(attr.key for attr in inspect(model).column_attrs)
+        self._trimmed_model = lru_cache(maxsize=128)(self._build_trimmed_model)
+
+    def parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Parse and validate a comma-separated field list; None means all fields."""
+        if not fields:
+            return None
+        requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        if not requested:
+            return None
+        unknown = [name for name in requested if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return requested
+
+    def _build_trimmed_model(self, fields: Tuple[str, ...]) -> Type[BaseModel]:
+        declared = self.response_model.model_fields
+        definitions: Dict[str, Any] = {}
+        for name in fields:
+            field = declared.get(name)
+            definitions[name] = (Optional[field.annotation], None) if field is not None else (Any, None)
+        return create_model(f"{self.response_model.__name__}Projection", **definitions)
+
+    def dump(self, obj: Any, fields: Tuple[str, ...]) -> Dict[str, Any]:
+        """Serialize only the projected attributes of an ORM object."""
+        trimmed = self._trimmed_model(fields)
+        return trimmed.model_validate({name: getattr(obj, name) for name in fields}).model_dump(mode="json")
+
+    def item_response(self, obj: Any, fields: Tuple[str, ...]) -> FastJSONResponse:
+        return FastJSONResponse(content=self.dump(obj, fields))
+
+    def list_response(self, result: Dict[str, Any], fields: Tuple[str, ...]) -> FastJSONResponse:
+        content = {key: value for key, value in result.items() if key != "items"}
+        content["items"] = [self.dump(obj, fields) for obj in result["items"]]
+        return FastJSONResponse(content=content)
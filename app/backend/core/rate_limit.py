@@ -0,0 +1,293 @@
+"""
+Sliding-window rate limiting for abuse-prone endpoints.
+
+Each key keeps two fixed-window counters (current and previous) and the rate is
+estimated as ``previous * (1 - elapsed / window) + current``, so memory is O(1)
+per key regardless of the limit. Keys combine the rule, a scope (client IP, or
+the email / session token of the request) and its value.
+
+Backends:
+- memory: per-process LRU of counters, bounded by RATE_LIMIT_MAX_KEYS.
+- database: one upserted row per key in `rate_limits`, shared by all workers and
+  Lambda instances; expired rows are purged in the background.
+
+If the backend fails the request is let through: an outage of the limiter must
+not take login down with it.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from core.background import PeriodicTask
+from core.config import settings
+from core.database import db_manager
+from models.rate_limits import RateLimits
+from sqlalchemy import case, delete
+
+logger = logging.getLogger(__name__)
+
+# Email-scoped routes take small JSON bodies; larger ones are refused with 413 before being buffered
+MAX_IDENTITY_BODY_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    scope: str  # "ip", "email" or "token"
+    limit: int
+    window: int  # seconds
+
+
+# (method, path) -> limits; every limit must pass
+RATE_LIMIT_RULES: Dict[Tuple[str, str], List[RateLimit]] = {
+    ("POST", "/api/v1/auth/login"): [RateLimit("ip", 30, 60), RateLimit("email", 5, 60)],
+    ("POST", "/api/v1/auth/register"): [RateLimit("ip", 10, 600), RateLimit("email", 3, 600)],
+    ("POST", "/api/v1/auth/forgot-password"): [RateLimit("ip", 5, 600), RateLimit("email", 3, 3600)],
+    ("POST", "/api/v1/listings/create"): [RateLimit("ip", 30, 3600), RateLimit("token", 10, 3600)],
+}
+
+
+def _estimate(count: int, previous_count: int, elapsed: float, window: int) -> float:
+    return previous_count * (1 - elapsed / window) + count
+
+
+def _retry_after(count: int, previous_count: int, elapsed: float, limit: int, window: int) -> int:
+    """Seconds until one more request would fit under the limit."""
+    if count < limit and previous_count:
+        # Wait for the previous window's weight to decay enough
+        wait = window * (1 - (limit - 1 - count) / previous_count) - elapsed
+    else:
+        # Wait for the next window, where today's count becomes the decaying one
+        wait = (window - elapsed) + window * max(0.0, 1 - (limit - 1) / count if count else 0.0)
+    return max(1, math.ceil(wait))
+
+
+class MemoryRateLimitBackend:
+    """Per-process counters in a bounded LRU."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, List[int]]" = OrderedDict()  # key -> [window, count, previous]
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, window_index: int) -> Tuple[int, int]:
+        """Count one request and return (count, previous_count) for the current window."""
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < window_index - 1:
+                entry = [window_index, 0, 0]
+            elif entry[0] == window_index - 1:
+                entry = [window_index, 0, entry[1]]
+            entry[1] += 1
+            self._counters[key] = entry
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+            return entry[1], entry[2]
+
+
+class DatabaseRateLimitBackend:
+    """Counters in the rate_limits table, updated with one atomic upsert per hit."""
+
+    async def hit(self, key: str, window_index: int, window: int) -> Tuple[int, int]:
+        async with db_manager.async_session_maker() as db:
+            dialect = db.bind.dialect.name
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            elif dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                raise RuntimeError(f"Rate limit database backend does not support {dialect}")
+
+            stmt = insert(RateLimits).values(
+                key=key, window=window_index, count=1, previous_count=0, expires_at=(window_index + 2) * window
+            )
+            # SET expressions see the row as it was before this statement
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RateLimits.key],
+                set_={
+                    "count": case((RateLimits.window == window_index, RateLimits.count + 1), else_=1),
+                    "previous_count": case(
+                        (RateLimits.window == window_index, RateLimits.previous_count),
+                        (RateLimits.window == window_index - 1, RateLimits.count),
+                        else_=0,
+                    ),
+                    "window": window_index,
+                    "expires_at": (window_index + 2) * window,
+                },
+            ).returning(RateLimits.count, RateLimits.previous_count)
+            result = await db.execute(stmt)
+            count, previous_count = result.one()
+            await db.commit()
+            return count, previous_count
+
+
+class RateLimiter:
+    def __init__(self, backend: str, max_keys: int):
+        self.backend = backend
+        self._memory = MemoryRateLimitBackend(max_keys)
+        self._database = DatabaseRateLimitBackend()
+
+    async def check(self, key: str, rule: RateLimit) -> Optional[int]:
+        """Count a request against a rule; returns Retry-After seconds when over the limit."""
+        now = time.time()
+        window_index = int(now // rule.window)
+        elapsed = now - window_index * rule.window
+        if self.backend == "database":
+            count, previous_count = await self._database.hit(key, window_index, rule.window)
+        else:
+            count, previous_count = await self._memory.hit(key, window_index)
+        if _estimate(count, previous_count, elapsed, rule.window) <= rule.limit:
+            return None
+        return _retry_after(count, previous_count, elapsed, rule.limit, rule.window)
+
+
+rate_limiter = RateLimiter(settings.rate_limit_backend, settings.rate_limit_max_keys)
+
+
+async def purge_expired_rate_limits() -> int:
+    if rate_limiter.backend != "database":
+        return 0
+    async with db_manager.async_session_maker() as db:
+        result = await db.execute(delete(RateLimits).where(RateLimits.expires_at < int(time.time())))
+        await db.commit()
+        return result.rowcount or 0
+
+
+rate_limit_purger = PeriodicTask("Rate limit purge", 600, purge_expired_rate_limits)
+
+
+# ------------------ Middleware ------------------
+def _client_ip(scope) -> str:
+    if settings.rate_limit_trust_forwarded_for:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _digest(value: str) -> str:
+    # Keys may be persisted; don't store emails or tokens in clear
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def _email_from_body(body: bytes) -> Optional[str]:
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def _token_from_query(scope) -> Optional[str]:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("token")
+    return values[0] if values else None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RATE_LIMIT_RULES; over-limit requests get 429 with Retry-After."""
+
+    def __init__(self, app, rules: Dict[Tuple[str, str], List[RateLimit]] = RATE_LIMIT_RULES):
+        self.app = app
+        self.rules = {(method, path.rstrip("/")): limits for (method, path), limits in rules.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+        limits = self.rules.get((scope["method"], scope["path"].rstrip("/")))
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        # Buffer the (small) JSON body so an email can be read, then replay it downstream
+        body = b""
+        if any(rule.scope == "email" for rule in limits):
+            receive, body = await self._buffer_body(scope, receive)
+            if receive is None:
+                await self._send_error(send, 413, "Requisição muito grande.")
+                return
+
+        identities: Dict[str, Callable[[], Optional[str]]] = {
+            "ip": lambda: _client_ip(scope),
+            "email": lambda: _email_from_body(body),
+            "token": lambda: _token_from_query(scope),
+        }
+        retry_after = 0
+        for index, rule in enumerate(limits):
+            value = identities[rule.scope]()
+            if not value:
+                continue
+            key = f"{scope['path'].rstrip('/')}:{index}:{rule.scope}:{_digest(value)}"
+            try:
+                wait = await rate_limiter.check(key, rule)
+            except Exception as e:
+                logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+                continue
+            if wait:
+                retry_after = max(retry_after, wait)
+
+        if retry_after:
+            logger.info(f"Rate limit exceeded on {scope['path']}")
+            await self._send_error(
+                send, 429, "Muitas tentativas. Tente novamente mais tarde.", [(b"retry-after", str(retry_after).encode())]
+            )
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _buffer_body(scope, receive):
+        """Read the body for replay; (None, b"") once it exceeds MAX_IDENTITY_BODY_BYTES.
+
+        The limit is checked against Content-Length first and then per chunk, so an
+        oversized body is never held in memory.
+        """
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > MAX_IDENTITY_BODY_BYTES:
+                return None, b""
+        chunks, size, more = [], 0, True
+        while more:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_IDENTITY_BODY_BYTES:
+                return None, b""
+            chunks.append(chunk)
+            more = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay, body
+
+    @staticmethod
+    async def _send_error(send, status: int, detail: str, headers: Sequence[Tuple[bytes, bytes]] = ()):
+        payload = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()),
+                    *headers,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
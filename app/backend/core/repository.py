@@ -0,0 +1,569 @@
+"""
+Generic async CRUD repository shared by the model services.
+
+Per model, the column map and the frozen set of field names are computed once
+(``ModelInfo``). List, count and get-by-id statements are built with bind
+parameters and cached per shape (filtered fields, owner scoping, sort, cursor
+mode, projection), so a call validates its keys against the frozen set, picks
+the cached statement and only binds values.
+
+``query_dict`` maps a field to a value (equality; None means IS NULL) or to an
+operator object, e.g. ``{"amount": {"$gte": 10, "$lte": 50}, "status": {"$in": ["a", "b"]}}``:
+
+- ``$in``: list of values (IN, one expanding bind parameter)
+- ``$gte`` / ``$lte``: inclusive range bounds
+- ``$prefix``: string prefix (LIKE 'value%' with wildcards escaped)
+- ``$ne``: not equal (NULLs never match; ``{"$ne": null}`` means IS NOT NULL)
+- ``$null``: true for IS NULL, false for IS NOT NULL
+
+The first time a filter shape is compiled it is checked against the model's
+indexes; shapes no index can serve are logged and listed by ``index_advice_report``.
+
+Subclasses set ``model`` and, for per-user records, ``owner_field``.
+"""
+
+import logging
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from sqlalchemy import (
+    Integer,
+    PrimaryKeyConstraint,
+    UniqueConstraint,
+    bindparam,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from core.counting import count_total
+from core.pagination import decode_cursor, keyset_condition, next_cursor, order_by_keyset, resolve_sort, split_page
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT")
+
+# Per filtered field, in sorted order: (field name, ((operator, flag), ...)). The flag is
+# only used by "null" (IS NULL vs IS NOT NULL); equality with None and {"$ne": null}
+# are normalized to it so the same SQL shares one cached statement.
+FilterShape = Tuple[Tuple[str, Tuple[Tuple[str, bool], ...]], ...]
+
+FILTER_OPERATORS = frozenset({"$in", "$gte", "$lte", "$prefix", "$ne", "$null"})
+# Operators a B-tree index whose leading column is the field can serve
+INDEXABLE_OPERATORS = frozenset({"eq", "in", "gte", "lte", "prefix"})
+
+_index_advice: Dict[Tuple[str, FilterShape, bool], dict] = {}
+_index_advice_lock = threading.Lock()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _coerce(name: str, column, value: Any) -> Any:
+    """Check (and convert) one operand against the column's Python type; raises ValueError.
+
+    Numbers may come as numeric strings and dates as ISO strings, since JSON has
+    no date type. Anything else that does not match the column is refused here,
+    instead of failing in the driver.
+    """
+    python_type = _python_type(column)
+    if python_type is None or value is None:
+        return value
+    try:
+        if python_type is bool:
+            if isinstance(value, bool):
+                return value
+        elif python_type is int:
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+            if isinstance(value, str):
+                return int(value)
+        elif python_type in (float, Decimal):
+            if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+                return python_type(value) if python_type is Decimal else float(value)
+        elif python_type is str:
+            if isinstance(value, str):
+                return value
+        elif python_type in (datetime, date):
+            if isinstance(value, str):
+                return python_type.fromisoformat(value)
+        else:
+            return value
+    except (ValueError, ArithmeticError):
+        pass
+    raise ValueError(f"Invalid value for {name} (expected {python_type.__name__}): {value!r}")
+
+
+def compile_filter(name: str, column, value: Any) -> Tuple[Tuple[Tuple[str, bool], ...], Dict[str, Any]]:
+    """Turn one query_dict entry into its shape part and bind parameters; raises ValueError."""
+    if not isinstance(value, dict):
+        if value is None:
+            return (("null", True),), {}
+        return (("eq", False),), {f"f_{name}_eq": _coerce(name, column, value)}
+    unknown = [op for op in value if op not in FILTER_OPERATORS]
+    if unknown or not value:
+        raise ValueError(f"Unsupported filter operator(s) on {name}: {', '.join(unknown) or 'none given'}")
+    ops, params = [], {}
+    for op, operand in value.items():
+        key = op[1:]
+        if op == "$null":
+            if not isinstance(operand, bool):
+                raise ValueError(f"$null on {name} expects true or false")
+            ops.append((key, operand))
+        elif op == "$ne" and operand is None:
+            ops.append(("null", False))
+        elif op == "$in":
+            if not isinstance(operand, list):
+                raise ValueError(f"$in on {name} expects a list")
+            ops.append((key, False))
+            params[f"f_{name}_{key}"] = [_coerce(name, column, item) for item in operand]
+        elif op == "$prefix":
+            if not isinstance(operand, str) or _python_type(column) is not str:
+                raise ValueError(f"$prefix on {name} expects a string field and value")
+            ops.append((key, False))
+            params[f"f_{name}_{key}"] = _escape_like(operand) + "%"
+        else:
+            if operand is None or isinstance(operand, (dict, list)):
+                raise ValueError(f"{op} on {name} expects a scalar value")
+            ops.append((key, False))
+            params[f"f_{name}_{key}"] = _coerce(name, column, operand)
+    return tuple(sorted(ops)), params
+
+
+def _describe(op: str, flag: bool) -> str:
+    if op == "null":
+        return "IS NULL" if flag else "IS NOT NULL"
+    return f"${op}"
+
+
+def index_advice_report() -> List[dict]:
+    """Filter shapes seen so far, with whether an index of the model can serve them."""
+    with _index_advice_lock:
+        return sorted(_index_advice.values(), key=lambda advice: (advice["supported"], advice["table"]))
+
+
+class ModelInfo:
+    """Column map, field set and statement caches of one ORM model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model.__tablename__
+        self.columns = {attr.key: getattr(model, attr.key) for attr in inspect(model).column_attrs}
+        self.fields = frozenset(self.columns)
+        self.list_statement = lru_cache(maxsize=256)(self._build_list_statement)
+        self.count_statement = lru_cache(maxsize=256)(self._build_count_statement)
+        self.id_statement = lru_cache(maxsize=64)(self._build_id_statement)
+
+    def check_fields(self, names, kind: str = "filter") -> None:
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown {kind} fields: {', '.join(unknown)}")
+
+    def compile_filters(self, query_dict: Dict[str, Any]) -> Tuple[FilterShape, Dict[str, Any]]:
+        """Validate a query_dict and split it into its statement shape and bind parameters."""
+        self.check_fields(query_dict)
+        shape, params = [], {}
+        for name in sorted(query_dict):
+            ops, field_params = compile_filter(name, self.columns[name], query_dict[name])
+            shape.append((name, ops))
+            params.update(field_params)
+        return tuple(shape), params
+
+    def _where(self, filters: FilterShape, owner_field: Optional[str]) -> list:
+        clauses = []
+        if owner_field:
+            clauses.append(self.columns[owner_field] == bindparam("owner", type_=self.columns[owner_field].type))
+        for name, ops in filters:
+            column = self.columns[name]
+            for op, flag in ops:
+                bind = bindparam(f"f_{name}_{op}", type_=column.type)
+                if op == "eq":
+                    clauses.append(column == bind)
+                elif op == "ne":
+                    clauses.append(column != bind)
+                elif op == "null":
+                    clauses.append(column.is_(None) if flag else column.is_not(None))
+                elif op == "in":
+                    clauses.append(column.in_(bindparam(f"f_{name}_in", type_=column.type, expanding=True)))
+                elif op == "gte":
+                    clauses.append(column >= bind)
+                elif op == "lte":
+                    clauses.append(column <= bind)
+                elif op == "prefix":
+                    clauses.append(column.like(bind, escape="\\"))
+        return clauses
+
+    def _leading_index_columns(self) -> frozenset:
+        """Columns that lead an index, primary key or unique constraint of the model's table."""
+        table = self.model.__table__
+        leading = set()
+        for index in table.indexes:
+            expressions = list(index.expressions)
+            # Unwrap DESC / collation wrappers to the column itself
+            first = getattr(expressions[0], "element", expressions[0]) if expressions else None
+            if getattr(first, "table", None) is table:
+                leading.add(first.key)
+        for constraint in table.constraints:
+            if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)) and constraint.columns:
+                leading.add(next(iter(constraint.columns)).key)
+        return frozenset(leading)
+
+    def _advise(self, filters: FilterShape, owner_field: Optional[str]) -> None:
+        """Record (and warn once) whether any index can serve this filter shape."""
+        if not filters and not owner_field:
+            return
+        # IS NULL can use a B-tree index too (NULLs are stored); IS NOT NULL and != cannot
+        indexable = {
+            name for name, ops in filters if any(op in INDEXABLE_OPERATORS or (op == "null" and flag) for op, flag in ops)
+        }
+        if owner_field:
+            indexable.add(owner_field)
+        usable = sorted(indexable & self._leading_index_columns())
+        advice = {
+            "table": self.name,
+            "filters": {name: [_describe(op, flag) for op, flag in ops] for name, ops in filters},
+            "owner_scoped": bool(owner_field),
+            "supported": bool(usable),
+            "indexed_columns": usable,
+        }
+        if not usable:
+            candidates = sorted(indexable) or [name for name, _ in filters]
+            advice["suggestion"] = f"add an index on {self.name}({', '.join(candidates)})"
+            logger.warning(
+                f"No index supports filter shape on {self.name}: {advice['filters']}; {advice['suggestion']}"
+            )
+        with _index_advice_lock:
+            _index_advice[(self.name, filters, bool(owner_field))] = advice
+
+    def _projection(self, fields: Optional[Tuple[str, ...]]):
+        return load_only(*(self.columns[name] for name in fields))
+
+    def _build_list_statement(
+        self,
+        filters: FilterShape,
+        owner_field: Optional[str],
+        sort: Optional[str],
+        cursor_mode: Optional[str],
+        fields: Optional[Tuple[str, ...]],
+    ):
+        model = self.model
+        sort_column, descending = resolve_sort(model, sort)
+        self._advise(filters, owner_field)
+        query = select(model).where(*self._where(filters, owner_field))
+        if fields:
+            # Projection push-down: only SELECT the requested columns (plus the keyset sort key)
+            query = query.options(self._projection(tuple(dict.fromkeys((*fields, sort_column.key)))))
+        if cursor_mode:
+            # Keyset mode: seek past the last row of the previous page instead of OFFSET
+            sort_value = None if cursor_mode == "null" else bindparam("cursor_value", type_=sort_column.type)
+            cursor_id = bindparam("cursor_id", type_=model.id.type)
+            query = query.where(keyset_condition(model, sort_column, descending, sort_value, cursor_id))
+        else:
+            query = query.offset(bindparam("offset", type_=Integer))
+        query = order_by_keyset(query, model, sort_column, descending)
+        return query.limit(bindparam("limit", type_=Integer)), sort_column
+
+    def _build_count_statement(self, filters: FilterShape, owner_field: Optional[str]):
+        return select(func.count(self.model.id)).where(*self._where(filters, owner_field))
+
+    def _build_id_statement(self, owner_field: Optional[str], fields: Optional[Tuple[str, ...]]):
+        query = select(self.model).where(self.model.id == bindparam("id", type_=self.model.id.type))
+        if owner_field:
+            query = query.where(*self._where((), owner_field))
+        if fields:
+            query = query.options(self._projection(fields))
+        return query
+
+
+@lru_cache(maxsize=None)
+def model_info(model) -> ModelInfo:
+    return ModelInfo(model)
+
+
+# ------------------ Repository ------------------
+class CRUDRepository(Generic[ModelT]):
+    """CRUD, pagination and bulk operations for one model; see the module docstring."""
+
+    model: Type[ModelT]
+    owner_field: Optional[str] = None  # column restricting rows to a user, e.g. "user_id"
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.info = model_info(self.model)
+
+    def _owner(self, user_id: Optional[str]) -> Optional[str]:
+        """The owner column to scope by, if a user_id was given."""
+        if not user_id:
+            return None
+        if not self.owner_field:
+            raise ValueError(f"{self.model.__name__} records have no owner")
+        return self.owner_field
+
+    def _invalidate(self, obj_ids: Sequence[Any] = ()) -> None:
+        """Drop cached data after a write; subclasses extend it for their own caches.
+
+        Cached list counts are dropped by the session on commit (see WriteTrackingSession).
+        """
+
+    async def create(self, data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[ModelT]:
+        """Create a new record"""
+        try:
+            if self._owner(user_id):
+                data[self.owner_field] = user_id
+            obj = self.model(**data)
+            self.db.add(obj)
+            await self.db.commit()
+            await self.db.refresh(obj)
+            self._invalidate()
+            logger.info(f"Created {self.info.name} with id: {obj.id}")
+            return obj
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error creating {self.info.name}: {str(e)}")
+            raise
+
+    async def check_ownership(self, obj_id: Any, user_id: str) -> bool:
+        """Check if user owns this record"""
+        try:
+            obj = await self.get_by_id(obj_id, user_id=user_id)
+            return obj is not None
+        except Exception as e:
+            logger.error(f"Error checking ownership for {self.info.name} {obj_id}: {str(e)}")
+            return False
+
+    async def get_by_id(
+        self, obj_id: Any, user_id: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> Optional[ModelT]:
+        """Get a record by ID (scoped to the user's own records when user_id is given)"""
+        try:
+            owner = self._owner(user_id)
+            fields = tuple(fields) if fields else None
+            if fields:
+                self.info.check_fields(fields, "projection")
+            params = {"id": obj_id}
+            if owner:
+                params["owner"] = user_id
+            result = await self.db.execute(self.info.id_statement(owner, fields), params)
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Error fetching {self.info.name} {obj_id}: {str(e)}")
+            raise
+
+    async def get_list(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        user_id: Optional[str] = None,
+        query_dict: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_strategy: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get a paginated list of records (scoped to the user's own records when user_id is given)"""
+        try:
+            owner = self._owner(user_id)
+            query_dict = query_dict or {}
+            shape, params = self.info.compile_filters(query_dict)
+            fields = tuple(fields) if fields else None
+            if fields:
+                self.info.check_fields(fields, "projection")
+
+            filters: Dict[str, Any] = dict(query_dict)
+            if owner:
+                params["owner"] = user_id
+                filters[owner] = user_id
+
+            total, total_is_estimate = await count_total(
+                self.db,
+                self.info.name,
+                self.info.count_statement(shape, owner),
+                filters,
+                strategy=count_strategy,
+                params=params,
+            )
+
+            cursor_mode = None
+            page_params = dict(params, limit=limit + 1)
+            if cursor:
+                sort_value, last_id = decode_cursor(cursor, sort, self.model)
+                cursor_mode = "null" if sort_value is None else "value"
+                page_params["cursor_id"] = last_id
+                if sort_value is not None:
+                    page_params["cursor_value"] = sort_value
+            else:
+                page_params["offset"] = skip
+            query, sort_column = self.info.list_statement(shape, owner, sort, cursor_mode, fields)
+
+            result = await self.db.execute(query, page_params)
+            items, has_more = split_page(result.scalars().all(), limit)
+
+            return {
+                "items": items,
+                "total": total,
+                "total_is_estimate": total_is_estimate,
+                "skip": skip,
+                "limit": limit,
+                "next_cursor": next_cursor(items, sort, sort_column, has_more),
+            }
+        except Exception as e:
+            logger.error(f"Error fetching {self.info.name} list: {str(e)}")
+            raise
+
+    async def update(
+        self, obj_id: Any, update_data: Dict[str, Any], user_id: Optional[str] = None
+    ) -> Optional[ModelT]:
+        """Update a record (requires ownership when user_id is given)"""
+        try:
+            obj = await self.get_by_id(obj_id, user_id=user_id)
+            if not obj:
+                logger.warning(f"{self.model.__name__} {obj_id} not found for update")
+                return None
+            self._apply(obj, update_data)
+
+            await self.db.commit()
+            await self.db.refresh(obj)
+            self._invalidate((obj_id,))
+            logger.info(f"Updated {self.info.name} {obj_id}")
+            return obj
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating {self.info.name} {obj_id}: {str(e)}")
+            raise
+
+    def _apply(self, obj: ModelT, update_data: Dict[str, Any]) -> None:
+        for key, value in update_data.items():
+            if key in self.info.fields and key != self.owner_field:
+                setattr(obj, key, value)
+
+    async def delete(self, obj_id: Any, user_id: Optional[str] = None) -> bool:
+        """Delete a record (requires ownership when user_id is given)"""
+        try:
+            obj = await self.get_by_id(obj_id, user_id=user_id)
+            if not obj:
+                logger.warning(f"{self.model.__name__} {obj_id} not found for deletion")
+                return False
+            await self.db.delete(obj)
+            await self.db.commit()
+            self._invalidate((obj_id,))
+            logger.info(f"Deleted {self.info.name} {obj_id}")
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error deleting {self.info.name} {obj_id}: {str(e)}")
+            raise
+
+    async def create_many(self, items: List[Dict[str, Any]], user_id: Optional[str] = None) -> List[ModelT]:
+        """Create several records with one multi-row INSERT ... RETURNING, committed once"""
+        if not items:
+            return []
+        try:
+            owner = self._owner(user_id)
+            rows = [{**item, owner: user_id} if owner else dict(item) for item in items]
+            result = await self.db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+            )
+            objs = list(result.all())
+            await self.db.commit()
+            self._invalidate([obj.id for obj in objs])
+            logger.info(f"Created {len(objs)} {self.info.name}")
+            return objs
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk creating {self.info.name}: {str(e)}")
+            raise
+
+    async def update_many(
+        self, updates: Sequence[Tuple[Any, Dict[str, Any]]], user_id: Optional[str] = None
+    ) -> List[ModelT]:
+        """Update several records: one SELECT, batched UPDATEs, one commit
+
+        Ids that do not exist (or belong to another user) are skipped, like update().
+        """
+        if not updates:
+            return []
+        try:
+            owner = self._owner(user_id)
+            query = select(self.model).where(self.model.id.in_({obj_id for obj_id, _ in updates}))
+            if owner:
+                query = query.where(self.info.columns[owner] == user_id)
+            objs = {obj.id: obj for obj in (await self.db.scalars(query)).all()}
+            updated = []
+            for obj_id, update_data in updates:
+                obj = objs.get(obj_id)
+                if obj is None:
+                    logger.warning(f"{self.model.__name__} {obj_id} not found for update")
+                    continue
+                self._apply(obj, update_data)
+                updated.append(obj)
+            # The flush groups rows changing the same columns into one executemany
+            await self.db.commit()
+            self._invalidate([obj.id for obj in updated])
+            logger.info(f"Updated {len(updated)} {self.info.name}")
+            return updated
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk updating {self.info.name}: {str(e)}")
+            raise
+
+    async def delete_many(self, obj_ids: Sequence[Any], user_id: Optional[str] = None) -> int:
+        """Delete several records with one DELETE; returns the number deleted"""
+        if not obj_ids:
+            return 0
+        try:
+            owner = self._owner(user_id)
+            stmt = delete(self.model).where(self.model.id.in_(set(obj_ids)))
+            if owner:
+                stmt = stmt.where(self.info.columns[owner] == user_id)
+            result = await self.db.execute(stmt, execution_options={"synchronize_session": False})
+            await self.db.commit()
+            self._invalidate(obj_ids)
+            logger.info(f"Deleted {result.rowcount} {self.info.name}")
+            return result.rowcount
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk deleting {self.info.name}: {str(e)}")
+            raise
+
+    async def get_by_field(self, field_name: str, field_value: Any) -> Optional[ModelT]:
+        """Get a record by any field"""
+        try:
+            if field_name not in self.info.fields:
+                raise ValueError(f"Field {field_name} does not exist on {self.model.__name__}")
+            result = await self.db.execute(select(self.model).where(self.info.columns[field_name] == field_value))
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Error fetching {self.info.name} by {field_name}: {str(e)}")
+            raise
+
+    async def list_by_field(self, field_name: str, field_value: Any, skip: int = 0, limit: int = 20) -> List[ModelT]:
+        """Get a list of records filtered by field"""
+        try:
+            if field_name not in self.info.fields:
+                raise ValueError(f"Field {field_name} does not exist on {self.model.__name__}")
+            result = await self.db.execute(
+                select(self.model)
+                .where(self.info.columns[field_name] == field_value)
+                .offset(skip)
+                .limit(limit)
+                .order_by(self.model.id.desc())
+            )
+            return result.scalars().all()
+        except Exception as e:
+            logger.error(f"Error fetching {self.info.name} by {field_name}: {str(e)}")
+            raise
@@ -0,0 +1,243 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor events on every engine feed a request-scoped collector (set by
+``SQLMetricsMiddleware`` in a ContextVar) with the statement count, total DB time
+and the slowest statement. At the end of the request:
+- a ``Server-Timing: db;dur=...`` header is added to the response,
+- the numbers are folded into per-route aggregates served at /database/queries,
+- statements repeated with the same shape at least SQL_N_PLUS_ONE_THRESHOLD times
+  are logged as a likely N+1.
+
+Other recorders (the slow-query log) subscribe with ``add_statement_observer``.
+
+``capture_queries`` / ``assert_max_queries`` collect statements regardless of the
+request context, for use in tests (the TestClient runs the app in another thread).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from core.config import settings
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept for the slowest-statement and N+1 reports
+MAX_STATEMENT_CHARS = 500
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a parameterized statement so calls differing only in IN-list length compare equal."""
+    return _IN_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Statements executed while one collector is active."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement[:MAX_STATEMENT_CHARS]
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+class RouteQueryMetrics:
+    """Aggregates of QueryStats per route template, for the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, dict] = {}
+
+    def observe(self, route: str, stats: QueryStats, n_plus_one: bool) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "statements": 0,
+                    "max_statements": 0,
+                    "db_ms": 0.0,
+                    "slowest_ms": 0.0,
+                    "slowest_statement": None,
+                    "n_plus_one": 0,
+                }
+            entry["requests"] += 1
+            entry["statements"] += stats.count
+            entry["max_statements"] = max(entry["max_statements"], stats.count)
+            entry["db_ms"] += stats.total_ms
+            if stats.slowest_ms > entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest_ms
+                entry["slowest_statement"] = stats.slowest_statement
+            entry["n_plus_one"] += int(n_plus_one)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    "avg_statements": round(entry["statements"] / entry["requests"], 2),
+                    "avg_db_ms": round(entry["db_ms"] / entry["requests"], 3),
+                    "db_ms": round(entry["db_ms"], 3),
+                    "slowest_ms": round(entry["slowest_ms"], 3),
+                }
+                for route, entry in self._routes.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_metrics = RouteQueryMetrics()
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+_captures: List[QueryStats] = []
+# fn(conn, statement, parameters, executemany, elapsed_ms), called for every statement
+_statement_observers: List[Callable] = []
+
+
+def add_statement_observer(observer: Callable) -> None:
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+@contextmanager
+def suspend_request_stats() -> Iterator[None]:
+    """Don't attribute statements run in this block (e.g. background EXPLAINs) to the current request."""
+    token = _request_stats.set(None)
+    try:
+        yield
+    finally:
+        _request_stats.reset(token)
+
+
+# ------------------ Engine hooks ------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    for capture in _captures:
+        capture.record(statement, elapsed_ms)
+    for observer in _statement_observers:
+        try:
+            observer(conn, statement, parameters, executemany, elapsed_ms)
+        except Exception as e:
+            logger.debug(f"Statement observer failed: {e}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def install_sql_instrumentation(engine) -> None:
+    """Attach the cursor hooks to an (async or sync) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# ------------------ Middleware ------------------
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope["path"]
+    return f"{scope['method']} {path}"
+
+
+class SQLMetricsMiddleware:
+    """ASGI middleware collecting per-request SQL statistics (see module docstring)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.sql_metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.sql_server_timing and stats.count:
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'.encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            if stats.count:
+                self._report(_route_name(scope), stats)
+
+    @staticmethod
+    def _report(route: str, stats: QueryStats) -> None:
+        repeated = stats.repeated_shapes(settings.sql_n_plus_one_threshold)
+        for shape, n in repeated.items():
+            logger.warning(f"Possible N+1 on {route}: {n}x {shape[:MAX_STATEMENT_CHARS]}")
+        route_query_metrics.observe(route, stats, bool(repeated))
+
+
+# ------------------ Test helpers ------------------
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Collect every statement executed in the block, from any thread or request."""
+    stats = QueryStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block executes more than `limit` statements, e.g.
+
+        with assert_max_queries(2):
+            client.get("/api/v1/profiles/favorites/list", params={"token": token})
+    """
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        shapes = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.most_common())
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{shapes}")
@@ -0,0 +1,15 @@
+from core.database import get_db
+from fastapi import Depends, HTTPException, Query, status
+from services.sessions import SessionService, SessionUser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def get_session_user(
+    token: str = Query(..., description="Session token returned by login/register"),
+    db: AsyncSession = Depends(get_db),
+) -> SessionUser:
+    """Dependency resolving the `token` query parameter to the logged-in Anonimax user."""
+    user = await SessionService(db).resolve(token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autorizado")
+    return user
@@ -6,7 +6,11 @@ import traceback
 from contextlib import asynccontextmanager
 from datetime import datetime
 
+from core.background import start_periodic_tasks, stop_periodic_tasks
 from core.config import settings
+from core.rate_limit import RateLimitMiddleware
+from core.sql_metrics import SQLMetricsMiddleware
+from core.responses import FastJSONResponse
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -16,6 +20,7 @@ from fastapi.routing import APIRouter
 from services.database import initialize_database, close_database
 from services.mock_data import initialize_mock_data
 from services.auth import initialize_admin_user
+import services.payment_verifier  # noqa: F401  (registers the BRZ verification PeriodicTask)
 # MODULE_IMPORTS_END
 
 
@@ -69,11 +74,13 @@ async def lifespan(app: FastAPI):
     await initialize_database()
     await initialize_mock_data()
     await initialize_admin_user()
+    await start_periodic_tasks()
     # MODULE_STARTUP_END
 
     logger.info("=== Application startup completed successfully ===")
     yield
     # MODULE_SHUTDOWN_START
+    await stop_periodic_tasks()
     await close_database()
     # MODULE_SHUTDOWN_END
 
@@ -83,10 +90,15 @@ app = FastAPI(
     description="A best-practice FastAPI template with modular architecture",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 
 # MODULE_MIDDLEWARE_START
+# Added first so CORS (outermost) also decorates 429 responses
+app.add_middleware(RateLimitMiddleware)
+# Wraps the rate limiter so its database backend's statements are counted too
+app.add_middleware(SQLMetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origin_regex=r".*",
@@ -1,7 +1,10 @@
+import logging
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, event, text
 from core.database import Base
 
+logger = logging.getLogger(__name__)
+
 class Listings(Base):
     __tablename__ = "listings"
 
@@ -14,6 +17,125 @@ class Listings(Base):
     state = Column(String(2), nullable=True)
     status = Column(String(20), default="pending")  # pending, active, rejected, expired
     payment_status = Column(String(20), default="pending")  # pending, verified, rejected
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    expires_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Every created_at index ends with id, the keyset tie-breaker, so cursor pages are one range seek
+        # Public feed: status='active' [AND state=?] [AND category=?] ORDER BY created_at DESC
+        Index(
+            "ix_listings_active_created_at",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        Index(
+            "ix_listings_active_state_created_at",
+            state,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        Index(
+            "ix_listings_active_category_created_at",
+            category,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Admin: [status=?] ORDER BY created_at DESC
+        Index("ix_listings_status_created_at", status, created_at.desc(), id.desc()),
+        Index("ix_listings_created_at", created_at.desc(), id.desc()),
+        # My listings: user_id=? ORDER BY created_at DESC
+        Index("ix_listings_user_id_created_at", user_id, created_at.desc(), id.desc()),
+    )
+
+
+# ------------------ Full-text search ------------------
+# Postgres: the document expression must be byte-for-byte identical in the GIN index
+# and in ListingsService.search, otherwise the planner will not use the index.
+SEARCH_CONFIG = "portuguese"
+SEARCH_DOCUMENT_SQL = (
+    f"to_tsvector('{SEARCH_CONFIG}', anonimax_unaccent(coalesce(title, '') || ' ' || coalesce(content, '')))"
+)
+
+# unaccent() is only STABLE, so wrap it in an IMMUTABLE function usable in an index expression.
+# Without the extension the wrapper degrades to the identity function.
+POSTGRES_UNACCENT_FUNCTION = (
+    "CREATE OR REPLACE FUNCTION anonimax_unaccent(text) RETURNS text "
+    "AS $$ SELECT {body} $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+)
+POSTGRES_SEARCH_INDEX = f"CREATE INDEX IF NOT EXISTS ix_listings_search ON listings USING GIN ({SEARCH_DOCUMENT_SQL})"
+
+# SQLite: FTS5 table keyed on the listing id and kept in sync with triggers (no stemmer; prefix
+# queries instead). It stores its own copy of the text: an external-content table would have to map
+# through listings' implicit rowid, which VACUUM may renumber since the primary key is a String.
+# id is UNINDEXED, so the triggers' lookups by id scan the FTS table.
+SQLITE_SEARCH_TABLE = "listings_fts"
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5("
+    "id UNINDEXED, title, content, tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER IF NOT EXISTS listings_fts_ai AFTER INSERT ON listings BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}(id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS listings_fts_ad AFTER DELETE ON listings BEGIN
+        DELETE FROM {SQLITE_SEARCH_TABLE} WHERE id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS listings_fts_au AFTER UPDATE OF title, content ON listings BEGIN
+        UPDATE {SQLITE_SEARCH_TABLE} SET title = new.title, content = new.content WHERE id = old.id;
+    END""",
+]
+SQLITE_SEARCH_BACKFILL = f"INSERT INTO {SQLITE_SEARCH_TABLE}(id, title, content) SELECT id, title, content FROM listings"
+# Earlier versions created an external-content table over listings.rowid; it is replaced on startup
+SQLITE_LEGACY_SEARCH_DROP = [
+    "DROP TRIGGER IF EXISTS listings_fts_ai",
+    "DROP TRIGGER IF EXISTS listings_fts_ad",
+    "DROP TRIGGER IF EXISTS listings_fts_au",
+    f"DROP TABLE IF EXISTS {SQLITE_SEARCH_TABLE}",
+]
+
+
+def create_search_index(target, connection, **kw):
+    """Create the dialect-specific search index after create_all.
+
+    Registered on the metadata (not the table) so it also runs against databases
+    whose listings table already exists. Every statement is idempotent.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        # The extension needs elevated privileges; don't abort create_all if it is unavailable
+        try:
+            with connection.begin_nested():
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+            body = "public.unaccent('public.unaccent', $1)"
+        except Exception as e:
+            logger.warning(f"unaccent extension unavailable, search will be accent-sensitive: {e}")
+            body = "$1"
+        connection.execute(text(POSTGRES_UNACCENT_FUNCTION.format(body=body)))
+        connection.execute(text(POSTGRES_SEARCH_INDEX))
+    elif dialect == "sqlite":
+        existing = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type='table' AND name=:name"), {"name": SQLITE_SEARCH_TABLE}
+        ).scalar()
+        if existing and "content_rowid" in existing:
+            for statement in SQLITE_LEGACY_SEARCH_DROP:
+                connection.execute(text(statement))
+            existing = None
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        if not existing:
+            # Backfill rows that were inserted before the FTS table existed
+            connection.execute(text(SQLITE_SEARCH_BACKFILL))
+
+
+event.listen(Base.metadata, "after_create", create_search_index)
+# Part of the schema fingerprint, so a changed search DDL is applied to existing databases
+Base.metadata.info.setdefault("extra_ddl", {})["listings_search"] = [
+    POSTGRES_UNACCENT_FUNCTION,
+    POSTGRES_SEARCH_INDEX,
+    *SQLITE_SEARCH_DDL,
+]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, String, DateTime, Float, Integer, ForeignKey, Index, text
 from core.database import Base
 
 class Payments(Base):
@@ -10,10 +10,35 @@ class Payments(Base):
     anonimax_id = Column(String(20), nullable=False, index=True)
     listing_id = Column(String(36), ForeignKey("listings.id"), nullable=True)
     amount = Column(Float, nullable=False)
+    reference = Column(Integer, nullable=True)  # amount = price + reference ten-thousandths (assign_payment_reference)
     currency = Column(String(10), default="BRZ")
     network = Column(String(50), default="Polygon")
-    tx_hash = Column(String(100), nullable=True)
+    tx_hash = Column(String(100), nullable=True)  # stored stripped and lowercase (normalize_tx_hash)
     type = Column(String(20), default="listing")  # listing, subscription
-    status = Column(String(20), default="pending")  # pending, verified, rejected
-    created_at = Column(DateTime, default=datetime.now)
-    verified_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    status = Column(String(20), default="pending")  # pending, verified, rejected, expired
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    submitted_at = Column(DateTime, nullable=True)  # last time a tx_hash was submitted
+    verified_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Admin: [status=?] ORDER BY created_at DESC
+        Index("ix_payments_status_created_at", status, created_at.desc(), id.desc()),
+        Index("ix_payments_created_at", created_at.desc(), id.desc()),
+        # A transaction pays for one payment only. Partial, so a pending or rejected claim on
+        # someone else's hash cannot block the payment it really belongs to
+        Index(
+            "ux_payments_tx_hash_verified",
+            tx_hash,
+            unique=True,
+            postgresql_where=text("status = 'verified'"),
+            sqlite_where=text("status = 'verified'"),
+        ),
+        # An open payment's amount identifies it on chain; expired and verified ones free their reference
+        Index(
+            "ux_payments_reference_open",
+            reference,
+            unique=True,
+            postgresql_where=text("reference IS NOT NULL AND status IN ('pending', 'rejected')"),
+            sqlite_where=text("reference IS NOT NULL AND status IN ('pending', 'rejected')"),
+        ),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, Integer, String
+from core.database import Base
+
+
+class RateLimits(Base):
+    """Shared sliding-window counters, one row per limiter key."""
+    __tablename__ = "rate_limits"
+
+    key = Column(String(255), primary_key=True)
+    window = Column(BigInteger, nullable=False)  # index of the current fixed window
+    count = Column(Integer, nullable=False, default=0)
+    previous_count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(BigInteger, nullable=False, index=True)  # epoch seconds; purge after this
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String
+from core.database import Base
+
+
+class WorkerCursors(Base):
+    """Resume position of a background worker that walks a table in batches."""
+    __tablename__ = "worker_cursors"
+
+    name = Column(String(64), primary_key=True)
+    position = Column(String(255), nullable=False, default="")  # last key processed; "" = start over
+    updated_at = Column(DateTime, nullable=False)
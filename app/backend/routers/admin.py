@@ -4,13 +4,18 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 
-from core.database import get_db
+from core.auth import revoke_user_access_tokens
+from core.database import get_db, get_read_db
 from models.users import Users
 from models.profiles import Profiles
 from models.listings import Listings
 from models.payments import Payments
+from services.listings import listing_detail_cache
+from services.payments import PAYMENT_ACTIONS, decide_payment
+from services.sessions import SessionService
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
@@ -26,6 +31,82 @@ class ListingActionRequest(BaseModel):
     listing_id: str
     action: str  # approve, reject
 
+class AdminLoginResponse(BaseModel):
+    message: str
+    token: str
+
+class UserStats(BaseModel):
+    total: int
+    verified: int
+
+class ListingStats(BaseModel):
+    total: int
+    active: int
+    pending: int
+
+class PaymentStats(BaseModel):
+    pending: int
+    verified: int
+    total_revenue: float
+
+class StatsResponse(BaseModel):
+    users: UserStats
+    listings: ListingStats
+    payments: PaymentStats
+
+class AdminUserResponse(BaseModel):
+    id: str
+    email: str
+    anonimax_id: str
+    is_verified: Optional[bool] = None
+    is_admin: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AdminUsersListResponse(BaseModel):
+    users: List[AdminUserResponse]
+
+class AdminListingResponse(BaseModel):
+    id: str
+    anonimax_id: str
+    title: str
+    content: str
+    category: str
+    state: Optional[str] = None
+    status: Optional[str] = None
+    payment_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AdminListingsListResponse(BaseModel):
+    listings: List[AdminListingResponse]
+
+class AdminPaymentResponse(BaseModel):
+    id: str
+    anonimax_id: str
+    listing_id: Optional[str] = None
+    amount: float
+    currency: Optional[str] = None
+    network: Optional[str] = None
+    tx_hash: Optional[str] = None
+    type: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    verified_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AdminPaymentsListResponse(BaseModel):
+    payments: List[AdminPaymentResponse]
+
+class MessageResponse(BaseModel):
+    message: str
+
 # Admin credentials (in production, use proper auth)
 ADMIN_EMAIL = "admin@anonimax.com"
 ADMIN_PASSWORD = "admin123"
@@ -33,7 +114,7 @@ ADMIN_PASSWORD = "admin123"
 def verify_admin(email: str, password: str) -> bool:
     return email == ADMIN_EMAIL and password == ADMIN_PASSWORD
 
-@router.post("/login")
+@router.post("/login", response_model=AdminLoginResponse)
 async def admin_login(
     data: AdminLoginRequest,
 ):
@@ -43,10 +124,10 @@ async def admin_login(
     
     return {"message": "Login admin realizado", "token": "admin-token"}
 
-@router.get("/stats")
+@router.get("/stats", response_model=StatsResponse)
 async def get_stats(
     admin_token: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get platform statistics"""
     try:
@@ -106,7 +187,7 @@ async def get_stats(
         logging.error(f"Get stats error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/users")
+@router.get("/users", response_model=AdminUsersListResponse)
 async def list_users(
     admin_token: str,
     db: AsyncSession = Depends(get_db),
@@ -119,26 +200,14 @@ async def list_users(
         result = await db.execute(select(Users).order_by(Users.created_at.desc()).limit(100))
         users = result.scalars().all()
         
-        return {
-            "users": [
-                {
-                    "id": u.id,
-                    "email": u.email,
-                    "anonimax_id": u.anonimax_id,
-                    "is_verified": u.is_verified,
-                    "is_admin": u.is_admin,
-                    "created_at": u.created_at,
-                }
-                for u in users
-            ]
-        }
+        return {"users": users}
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"List users error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/listings")
+@router.get("/listings", response_model=AdminListingsListResponse)
 async def list_all_listings(
     admin_token: str,
     status: Optional[str] = None,
@@ -156,29 +225,14 @@ async def list_all_listings(
         result = await db.execute(query.order_by(Listings.created_at.desc()).limit(100))
         listings = result.scalars().all()
         
-        return {
-            "listings": [
-                {
-                    "id": l.id,
-                    "anonimax_id": l.anonimax_id,
-                    "title": l.title,
-                    "content": l.content,
-                    "category": l.category,
-                    "state": l.state,
-                    "status": l.status,
-                    "payment_status": l.payment_status,
-                    "created_at": l.created_at,
-                }
-                for l in listings
-            ]
-        }
+        return {"listings": listings}
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"List listings error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/payments")
+@router.get("/payments", response_model=AdminPaymentsListResponse)
 async def list_payments(
     admin_token: str,
     status: Optional[str] = None,
@@ -196,31 +250,14 @@ async def list_payments(
         result = await db.execute(query.order_by(Payments.created_at.desc()).limit(100))
         payments = result.scalars().all()
         
-        return {
-            "payments": [
-                {
-                    "id": p.id,
-                    "anonimax_id": p.anonimax_id,
-                    "listing_id": p.listing_id,
-                    "amount": p.amount,
-                    "currency": p.currency,
-                    "network": p.network,
-                    "tx_hash": p.tx_hash,
-                    "type": p.type,
-                    "status": p.status,
-                    "created_at": p.created_at,
-                    "verified_at": p.verified_at,
-                }
-                for p in payments
-            ]
-        }
+        return {"payments": payments}
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"List payments error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/payments/verify")
+@router.post("/payments/verify", response_model=MessageResponse)
 async def verify_payment(
     data: PaymentVerifyRequest,
     admin_token: str,
@@ -237,45 +274,26 @@ async def verify_payment(
         if not payment:
             raise HTTPException(status_code=404, detail="Pagamento não encontrado")
         
+        if data.action not in PAYMENT_ACTIONS:
+            raise HTTPException(status_code=400, detail="Ação inválida")
+        
+        await decide_payment(db, payment, data.action)
         if data.action == "verify":
-            payment.status = "verified"
-            payment.verified_at = datetime.now()
-            
-            # Activate the listing
-            if payment.listing_id:
-                result = await db.execute(select(Listings).where(Listings.id == payment.listing_id))
-                listing = result.scalar_one_or_none()
-                if listing:
-                    listing.status = "active"
-                    listing.payment_status = "verified"
-                    listing.expires_at = datetime.now() + timedelta(days=30)
-                    listing.updated_at = datetime.now()
-            
             message = "Pagamento verificado e anúncio ativado"
-        elif data.action == "reject":
-            payment.status = "rejected"
-            
-            if payment.listing_id:
-                result = await db.execute(select(Listings).where(Listings.id == payment.listing_id))
-                listing = result.scalar_one_or_none()
-                if listing:
-                    listing.payment_status = "rejected"
-                    listing.updated_at = datetime.now()
-            
-            message = "Pagamento rejeitado"
         else:
-            raise HTTPException(status_code=400, detail="Ação inválida")
-        
-        await db.commit()
+            message = "Pagamento rejeitado"
         
         return {"message": message}
     except HTTPException:
         raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Transação já utilizada por outro pagamento")
     except Exception as e:
         logging.error(f"Verify payment error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/listings/action")
+@router.post("/listings/action", response_model=MessageResponse)
 async def listing_action(
     data: ListingActionRequest,
     admin_token: str,
@@ -304,6 +322,7 @@ async def listing_action(
         
         listing.updated_at = datetime.now()
         await db.commit()
+        listing_detail_cache.pop(listing.id)
         
         return {"message": message}
     except HTTPException:
@@ -312,7 +331,7 @@ async def listing_action(
         logging.error(f"Listing action error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/users/{user_id}")
+@router.delete("/users/{user_id}", response_model=MessageResponse)
 async def delete_user(
     user_id: str,
     admin_token: str,
@@ -332,6 +351,7 @@ async def delete_user(
         # Delete user's listings
         result = await db.execute(select(Listings).where(Listings.user_id == user_id))
         listings = result.scalars().all()
+        listing_ids = [listing.id for listing in listings]
         for listing in listings:
             await db.delete(listing)
         
@@ -347,9 +367,12 @@ async def delete_user(
         if profile:
             await db.delete(profile)
         
-        # Delete user
+        # Delete user; ending the sessions commits it all, then drops this worker's session cache
         await db.delete(user)
-        await db.commit()
+        await SessionService(db).revoke_user(user_id)
+        revoke_user_access_tokens(user_id)
+        for listing_id in listing_ids:
+            listing_detail_cache.pop(listing_id)
         
         return {"message": "Usuário excluído com sucesso"}
     except HTTPException:
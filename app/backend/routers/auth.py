@@ -1,28 +1,29 @@
 import logging
 import uuid
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-import hashlib
-import secrets
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 
 from core.database import get_db
-from models.users import Users, generate_anonimax_id, generate_verification_token
+from models.users import Users, generate_anonimax_id
 from models.profiles import Profiles
+from dependencies.session import get_session_user
+from services.sessions import SessionService, SessionUser
+from services.passwords import PasswordHasherBusy, dummy_password_hash, password_hasher
+from services.user_tokens import RESET_PASSWORD, VERIFY_EMAIL, UserTokenService
+from core.auth import revoke_access_token
+from core.config import settings
+from dependencies.auth import bearer_scheme
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
-# Simple password hashing (in production, use bcrypt)
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verify_password(password: str, hashed: str) -> bool:
-    return hash_password(password) == hashed
-
-def generate_token() -> str:
-    return secrets.token_urlsafe(32)
+# 36^8 possible ids: a collision is rare, several in a row means something else is wrong
+ANONIMAX_ID_MAX_ATTEMPTS = 5
 
 class RegisterRequest(BaseModel):
     email: EmailStr
@@ -63,57 +64,58 @@ async def register(
 ):
     """Register a new user"""
     try:
-        # Check if email already exists
-        result = await db.execute(select(Users).where(Users.email == data.email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Este email já está cadastrado")
-        
         # Validate password
         if len(data.password) < 6:
             raise HTTPException(status_code=400, detail="A senha deve ter pelo menos 6 caracteres")
         
-        # Generate unique Anonimax ID
-        anonimax_id = generate_anonimax_id()
-        while True:
-            result = await db.execute(select(Users).where(Users.anonimax_id == anonimax_id))
-            if not result.scalar_one_or_none():
-                break
-            anonimax_id = generate_anonimax_id()
-        
-        # Create user
-        user_id = str(uuid.uuid4())
-        verification_token = generate_verification_token()
+        password_hash = await password_hasher.hash(data.password)
         
-        user = Users(
-            id=user_id,
-            email=data.email,
-            password_hash=hash_password(data.password),
-            anonimax_id=anonimax_id,
-            is_verified=False,
-            is_admin=False,
-            verification_token=verification_token,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-        db.add(user)
-        
-        # Create profile
-        profile = Profiles(
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            anonimax_id=anonimax_id,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-        db.add(profile)
-        
-        await db.commit()
-        await db.refresh(user)
-        
-        # Generate auth token
-        token = generate_token()
+        # The unique indexes on email and anonimax_id do the checking: the happy path is a
+        # single INSERT transaction, and only an Anonimax ID collision is retried
+        for attempt in range(1, ANONIMAX_ID_MAX_ATTEMPTS + 1):
+            user_id = str(uuid.uuid4())
+            anonimax_id = generate_anonimax_id()
+            now = datetime.now()
+            
+            user = Users(
+                id=user_id,
+                email=data.email,
+                password_hash=password_hash,
+                anonimax_id=anonimax_id,
+                is_verified=False,
+                is_admin=False,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(user)
+            
+            # Create profile
+            profile = Profiles(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                anonimax_id=anonimax_id,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(profile)
+            
+            # Open a session and issue the verification token in the same transaction
+            token = await SessionService(db).create(user_id)
+            verification_token = await UserTokenService(db).issue(
+                user_id, VERIFY_EMAIL, timedelta(hours=settings.verification_token_ttl_hours)
+            )
+            
+            try:
+                await db.commit()
+                break
+            except IntegrityError as e:
+                await db.rollback()
+                if "anonimax_id" not in str(e.orig):
+                    # Only email is left unique on users
+                    raise HTTPException(status_code=400, detail="Este email já está cadastrado")
+                logging.warning(f"Anonimax ID collision on attempt {attempt}, retrying")
+        else:
+            raise HTTPException(status_code=503, detail="Não foi possível gerar um Anonimax ID, tente novamente")
         
         # Get frontend host for verification link
         frontend_host = request.headers.get("App-Host", "")
@@ -137,6 +139,8 @@ async def register(
         )
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
     except Exception as e:
         logging.error(f"Registration error: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao criar conta: {str(e)}")
@@ -152,12 +156,20 @@ async def login(
         user = result.scalar_one_or_none()
         
         if not user:
+            # Same KDF work as a wrong password, so the response time does not reveal the email exists
+            await password_hasher.verify(data.password, dummy_password_hash())
             raise HTTPException(status_code=401, detail="Email ou senha incorretos")
         
-        if not verify_password(data.password, user.password_hash):
+        matches, new_hash = await password_hasher.verify(data.password, user.password_hash)
+        if not matches:
             raise HTTPException(status_code=401, detail="Email ou senha incorretos")
         
-        token = generate_token()
+        # Transparently upgrade legacy/outdated hashes, committed with the new session
+        if new_hash:
+            user.password_hash = new_hash
+        
+        token = await SessionService(db).create(user.id)
+        await db.commit()
         
         return AuthResponse(
             user=UserResponse(
@@ -173,6 +185,8 @@ async def login(
         )
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
     except Exception as e:
         logging.error(f"Login error: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao fazer login: {str(e)}")
@@ -184,19 +198,14 @@ async def verify_email(
 ):
     """Verify user email"""
     try:
-        result = await db.execute(select(Users).where(Users.verification_token == data.token))
-        user = result.scalar_one_or_none()
+        user_id = await UserTokenService(db).consume(data.token, VERIFY_EMAIL)
         
-        if not user:
+        if not user_id:
             raise HTTPException(status_code=400, detail="Token de verificação inválido")
         
-        if user.is_verified:
-            return {"message": "Email já verificado", "success": True}
-        
-        user.is_verified = True
-        user.verification_token = None
-        user.updated_at = datetime.now()
-        
+        await db.execute(
+            update(Users).where(Users.id == user_id).values(is_verified=True, updated_at=datetime.now())
+        )
         await db.commit()
         
         return {"message": "Email verificado com sucesso!", "success": True}
@@ -221,11 +230,9 @@ async def forgot_password(
         if not user:
             return {"message": "Se o email existir, você receberá instruções para redefinir sua senha"}
         
-        reset_token = generate_verification_token()
-        user.reset_token = reset_token
-        user.reset_token_expires = datetime.now() + timedelta(hours=1)
-        user.updated_at = datetime.now()
-        
+        reset_token = await UserTokenService(db).issue(
+            user.id, RESET_PASSWORD, timedelta(hours=settings.reset_token_ttl_hours)
+        )
         await db.commit()
         
         frontend_host = request.headers.get("App-Host", "")
@@ -247,38 +254,66 @@ async def reset_password(
 ):
     """Reset password with token"""
     try:
-        result = await db.execute(select(Users).where(Users.reset_token == data.token))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=400, detail="Token inválido ou expirado")
-        
-        if user.reset_token_expires and user.reset_token_expires < datetime.now():
-            raise HTTPException(status_code=400, detail="Token expirado")
-        
+        # Validate before consuming, so a rejected password does not burn the token
         if len(data.password) < 6:
             raise HTTPException(status_code=400, detail="A senha deve ter pelo menos 6 caracteres")
         
-        user.password_hash = hash_password(data.password)
-        user.reset_token = None
-        user.reset_token_expires = None
-        user.updated_at = datetime.now()
+        password_hash = await password_hasher.hash(data.password)
         
-        await db.commit()
+        tokens = UserTokenService(db)
+        user_id = await tokens.consume(data.token, RESET_PASSWORD)
+        
+        if not user_id:
+            raise HTTPException(status_code=400, detail="Token inválido ou expirado")
+        
+        await db.execute(
+            update(Users)
+            .where(Users.id == user_id)
+            .values(password_hash=password_hash, updated_at=datetime.now())
+        )
+        # Any other reset link sent earlier is now void, and every existing session is logged out
+        await tokens.revoke(user_id, RESET_PASSWORD)
+        # Commits the new password and the revoked tokens along with the sessions
+        await SessionService(db).revoke_user(user_id)
         
         return {"message": "Senha redefinida com sucesso!", "success": True}
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
     except Exception as e:
         logging.error(f"Reset password error: {e}")
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
-@router.get("/me")
+@router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    token: str,
+    user: SessionUser = Depends(get_session_user),
+):
+    """Get current user info"""
+    return UserResponse(
+        id=user.id,
+        email=user.email,
+        anonimax_id=user.anonimax_id,
+        is_admin=user.is_admin,
+        is_verified=user.is_verified,
+        created_at=user.created_at,
+    )
+
+@router.post("/logout")
+async def logout(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get current user info (simplified - in production use proper JWT)"""
-    # In a real app, decode the JWT token to get user ID
-    # For this demo, we'll use a simple approach
-    raise HTTPException(status_code=501, detail="Use login endpoint to get user info")
\ No newline at end of file
+    """End the current session (session token and/or bearer access token)"""
+    if not token and not credentials:
+        raise HTTPException(status_code=400, detail="Nenhuma sessão informada")
+    try:
+        if token:
+            await SessionService(db).revoke(token)
+        if credentials and credentials.scheme.lower() == "bearer":
+            revoke_access_token(credentials.credentials)
+        return {"message": "Sessão encerrada", "success": True}
+    except Exception as e:
+        logging.error(f"Logout error: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
@@ -7,7 +7,9 @@ from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_db, get_read_db
+from core.projection import FieldProjection
+from models.categories import Categories
 from services.categories import CategoriesService
 
 # Set up logging
@@ -49,8 +51,10 @@ class CategoriesListResponse(BaseModel):
     """List response schema"""
     items: List[CategoriesResponse]
     total: int
+    total_is_estimate: bool = False
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class CategoriesBatchCreateRequest(BaseModel):
@@ -74,15 +78,20 @@ class CategoriesBatchDeleteRequest(BaseModel):
     ids: List[int]
 
 
+categories_projection = FieldProjection(Categories, CategoriesResponse)
+
+
 # ---------- Routes ----------
 @router.get("", response_model=CategoriesListResponse)
 async def query_categoriess(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Query categoriess with filtering, sorting, and pagination"""
     logger.debug(f"Querying categoriess: query={query}, sort={sort}, skip={skip}, limit={limit}, fields={fields}")
@@ -97,16 +106,24 @@ async def query_categoriess(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        projection = categories_projection.parse(fields)
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
         )
         logger.debug(f"Found {result['total']} categoriess")
+        if projection:
+            return categories_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying categoriess: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -114,12 +131,14 @@ async def query_categoriess(
 
 @router.get("/all", response_model=CategoriesListResponse)
 async def query_categoriess_all(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     # Query categoriess with filtering, sorting, and pagination without user limitation
     logger.debug(f"Querying categoriess: query={query}, sort={sort}, skip={skip}, limit={limit}, fields={fields}")
@@ -134,16 +153,24 @@ async def query_categoriess_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        projection = categories_projection.parse(fields)
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
         )
         logger.debug(f"Found {result['total']} categoriess")
+        if projection:
+            return categories_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying categoriess: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -153,21 +180,26 @@ async def query_categoriess_all(
 async def get_categories(
     id: int,
     fields: str = Query(None, description="Comma-separated list of fields to return"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a single categories by ID"""
     logger.debug(f"Fetching categories with id: {id}, fields={fields}")
     
     service = CategoriesService(db)
     try:
-        result = await service.get_by_id(id)
+        projection = categories_projection.parse(fields)
+        result = await service.get_by_id(id, fields=projection)
         if not result:
             logger.warning(f"Categories with id {id} not found")
             raise HTTPException(status_code=404, detail="Categories not found")
         
+        if projection:
+            return categories_projection.item_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching categories {id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -206,13 +238,10 @@ async def create_categoriess_batch(
     logger.debug(f"Batch creating {len(request.items)} categoriess")
     
     service = CategoriesService(db)
-    results = []
     
     try:
-        for item_data in request.items:
-            result = await service.create(item_data.model_dump())
-            if result:
-                results.append(result)
+        # One multi-row INSERT in one transaction: all items are created or none
+        results = await service.create_many([item.model_dump() for item in request.items])
         
         logger.info(f"Batch created {len(results)} categoriess successfully")
         return results
@@ -231,15 +260,14 @@ async def update_categoriess_batch(
     logger.debug(f"Batch updating {len(request.items)} categoriess")
     
     service = CategoriesService(db)
-    results = []
     
     try:
-        for item in request.items:
-            # Only include non-None values for partial updates
-            update_dict = {k: v for k, v in item.updates.model_dump().items() if v is not None}
-            result = await service.update(item.id, update_dict)
-            if result:
-                results.append(result)
+        # Only include non-None values for partial updates
+        updates = [
+            (item.id, {k: v for k, v in item.updates.model_dump().items() if v is not None})
+            for item in request.items
+        ]
+        results = await service.update_many(updates)
         
         logger.info(f"Batch updated {len(results)} categoriess successfully")
         return results
@@ -288,13 +316,9 @@ async def delete_categoriess_batch(
     logger.debug(f"Batch deleting {len(request.ids)} categoriess")
     
     service = CategoriesService(db)
-    deleted_count = 0
     
     try:
-        for item_id in request.ids:
-            success = await service.delete(item_id)
-            if success:
-                deleted_count += 1
+        deleted_count = await service.delete_many(request.ids)
         
         logger.info(f"Batch deleted {deleted_count} categoriess successfully")
         return {"message": f"Successfully deleted {deleted_count} categoriess", "deleted_count": deleted_count}
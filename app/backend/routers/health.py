@@ -1,5 +1,13 @@
-from fastapi import APIRouter
-from services.database import check_database_health
+from dependencies.auth import get_admin_user
+from fastapi import APIRouter, Depends, Query
+from schemas.auth import UserResponse
+from services.database import (
+    check_database_health,
+    get_index_advice,
+    get_pool_stats,
+    get_query_stats,
+    get_slow_queries,
+)
 
 router = APIRouter(prefix="/database", tags=["database"])
 
@@ -9,3 +17,30 @@ async def database_health_check():
     """Check database connection health"""
     is_healthy = await check_database_health()
     return {"status": "healthy" if is_healthy else "unhealthy", "service": "database"}
+
+
+@router.get("/pool")
+async def database_pool_stats(_current_user: UserResponse = Depends(get_admin_user)):
+    """Connection pool statistics (checked out, overflow, checkout wait time histogram) (admin only)"""
+    return get_pool_stats()
+
+
+@router.get("/queries")
+async def database_query_stats(_current_user: UserResponse = Depends(get_admin_user)):
+    """Per-route SQL statistics (statement counts, DB time, slowest statement, N+1 hits) (admin only)"""
+    return get_query_stats()
+
+
+@router.get("/slow-queries")
+async def database_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    _current_user: UserResponse = Depends(get_admin_user),
+):
+    """Slow statements grouped by shape, top offenders by total time, with EXPLAIN plans (admin only)"""
+    return get_slow_queries(limit)
+
+
+@router.get("/index-advice")
+async def database_index_advice(_current_user: UserResponse = Depends(get_admin_user)):
+    """Filter shapes seen by list endpoints and whether an index serves them (admin only)"""
+    return get_index_advice()
@@ -1,37 +1,32 @@
 import logging
 import uuid
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
-import re
+from typing import List, Optional
 
-from core.database import get_db
-from models.users import Users
+from core.database import get_db, get_read_db
+from dependencies.session import get_session_user
+from core.responses import FastJSONResponse, etag_matches, weak_etag
 from models.profiles import Profiles
 from models.listings import Listings
 from models.payments import Payments
+from services.listings import ListingsService, listing_detail_cache
+from services.payments import (
+    LISTING_PRICE,
+    TX_HASH_RE,
+    PaymentReferencesExhausted,
+    assign_payment_reference,
+    normalize_tx_hash,
+    submit_tx_hash,
+)
+from services.sessions import SessionUser
+from utils.personal_info import check_personal_info
 
 router = APIRouter(prefix="/api/v1/listings", tags=["listings"])
 
-# Personal info patterns to detect
-PERSONAL_INFO_PATTERNS = [
-    (r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', 'Email detectado'),
-    (r'(\+55\s?)?(\(?\d{2}\)?[\s.-]?)?\d{4,5}[\s.-]?\d{4}', 'Telefone detectado'),
-    (r'whatsapp|wpp|zap|whats', 'WhatsApp detectado'),
-    (r'\d{3}\.?\d{3}\.?\d{3}-?\d{2}', 'CPF detectado'),
-]
-
-def check_personal_info(text: str) -> list:
-    """Check for personal information in text"""
-    issues = []
-    for pattern, message in PERSONAL_INFO_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            issues.append(message)
-    return issues
-
 class ListingCreate(BaseModel):
     title: str
     content: str
@@ -42,22 +37,66 @@ class PaymentSubmit(BaseModel):
     listing_id: str
     tx_hash: str
 
-@router.post("/create")
+class ListingResponse(BaseModel):
+    id: str
+    anonimax_id: str
+    title: str
+    content: str
+    category: str
+    state: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class MyListingResponse(ListingResponse):
+    payment_status: Optional[str] = None
+    payment_amount: Optional[float] = None  # exact BRZ amount to send while the payment is open
+
+class ListingsListResponse(BaseModel):
+    listings: List[ListingResponse]
+    total: Optional[int] = None
+
+class MyListingsListResponse(BaseModel):
+    listings: List[MyListingResponse]
+
+class ListingAuthorResponse(BaseModel):
+    session_id: Optional[str] = None
+    crypto_type: Optional[str] = None
+    crypto_network: Optional[str] = None
+    crypto_address: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ListingDetailResponse(BaseModel):
+    listing: ListingResponse
+    profile: Optional[ListingAuthorResponse] = None
+
+class ListingCreatedResponse(BaseModel):
+    id: str
+    anonimax_id: str
+    title: str
+    status: str
+    payment_status: str
+    payment_amount: float  # exact BRZ amount to send: it identifies the payment on chain
+    message: str
+
+class MessageResponse(BaseModel):
+    message: str
+
+class PaymentSubmittedResponse(MessageResponse):
+    payment_amount: float  # the transfer must pay exactly this amount
+
+@router.post("/create", response_model=ListingCreatedResponse)
 async def create_listing(
     data: ListingCreate,
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new listing"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         # Validate title
         if len(data.title) < 5:
             raise HTTPException(status_code=400, detail="Título muito curto (mín 5 caracteres)")
@@ -108,20 +147,19 @@ async def create_listing(
         )
         db.add(listing)
         
-        # Create payment record
+        # Create payment record; its amount (price + unique reference) identifies it on chain
         payment = Payments(
             id=str(uuid.uuid4()),
             user_id=user.id,
             anonimax_id=profile.anonimax_id,
             listing_id=listing_id,
-            amount=10.0,
             currency="BRZ",
             network="Polygon",
             type="listing",
             status="pending",
             created_at=datetime.now(),
         )
-        db.add(payment)
+        await assign_payment_reference(db, payment, LISTING_PRICE)
         
         await db.commit()
         await db.refresh(listing)
@@ -132,160 +170,130 @@ async def create_listing(
             "title": listing.title,
             "status": listing.status,
             "payment_status": listing.payment_status,
+            "payment_amount": payment.amount,
             "message": "Anúncio criado! Aguardando pagamento.",
         }
     except HTTPException:
         raise
+    except PaymentReferencesExhausted as e:
+        logging.error(f"Create listing error: {e}")
+        raise HTTPException(
+            status_code=503, detail="Muitos pagamentos em aberto no momento. Tente novamente mais tarde."
+        )
     except Exception as e:
         logging.error(f"Create listing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/")
+@router.get("/", response_model=ListingsListResponse)
 async def list_listings(
     token: str,
     state: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List active listings"""
     try:
-        query = select(Listings).where(Listings.status == "active")
-        
-        if state:
-            query = query.where(Listings.state == state)
-        if category:
-            query = query.where(Listings.category == category)
-        
-        result = await db.execute(query.order_by(Listings.created_at.desc()).limit(100))
-        listings = result.scalars().all()
-        
-        # Filter by search if provided
-        if search:
-            search_lower = search.lower()
-            listings = [
-                l for l in listings
-                if search_lower in (l.title or "").lower()
-                or search_lower in (l.content or "").lower()
-            ]
+        total = None
+        if search and search.strip():
+            # Ranked full-text search over the whole active set
+            result = await ListingsService(db).search(
+                search.strip(), skip=skip, limit=limit, state=state, category=category
+            )
+            listings = result["items"]
+            total = result["total"]
+        else:
+            query = select(Listings).where(Listings.status == "active")
+
+            if state:
+                query = query.where(Listings.state == state)
+            if category:
+                query = query.where(Listings.category == category)
+
+            result = await db.execute(query.order_by(Listings.created_at.desc()).offset(skip).limit(limit))
+            listings = result.scalars().all()
         
-        return {
-            "listings": [
-                {
-                    "id": l.id,
-                    "anonimax_id": l.anonimax_id,
-                    "title": l.title,
-                    "content": l.content,
-                    "category": l.category,
-                    "state": l.state,
-                    "status": l.status,
-                    "created_at": l.created_at,
-                }
-                for l in listings
-            ]
-        }
+        return {"listings": listings, "total": total}
     except Exception as e:
         logging.error(f"List listings error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/my-listings")
+@router.get("/my-listings", response_model=MyListingsListResponse)
 async def get_my_listings(
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get current user's listings"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         result = await db.execute(
-            select(Listings).where(Listings.user_id == user.id).order_by(Listings.created_at.desc())
+            select(Listings, Payments.amount)
+            .outerjoin(Payments, Payments.listing_id == Listings.id)
+            .where(Listings.user_id == user.id)
+            .order_by(Listings.created_at.desc())
         )
-        listings = result.scalars().all()
+        listings = [
+            {**MyListingResponse.model_validate(listing).model_dump(), "payment_amount": amount}
+            for listing, amount in result.all()
+        ]
         
-        return {
-            "listings": [
-                {
-                    "id": l.id,
-                    "anonimax_id": l.anonimax_id,
-                    "title": l.title,
-                    "content": l.content,
-                    "category": l.category,
-                    "state": l.state,
-                    "status": l.status,
-                    "payment_status": l.payment_status,
-                    "created_at": l.created_at,
-                }
-                for l in listings
-            ]
-        }
+        return {"listings": listings}
     except Exception as e:
         logging.error(f"Get my listings error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{listing_id}")
+@router.get("/{listing_id}", response_model=ListingDetailResponse)
 async def get_listing(
     listing_id: str,
     token: str,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get listing details with author profile"""
+    """Get listing details with author profile (supports If-None-Match)"""
     try:
-        result = await db.execute(select(Listings).where(Listings.id == listing_id))
-        listing = result.scalar_one_or_none()
-        
-        if not listing:
-            raise HTTPException(status_code=404, detail="Anúncio não encontrado")
-        
-        # Get author's profile
-        result = await db.execute(select(Profiles).where(Profiles.anonimax_id == listing.anonimax_id))
-        profile = result.scalar_one_or_none()
-        
-        return {
-            "listing": {
-                "id": listing.id,
-                "anonimax_id": listing.anonimax_id,
-                "title": listing.title,
-                "content": listing.content,
-                "category": listing.category,
-                "state": listing.state,
-                "status": listing.status,
-                "created_at": listing.created_at,
-            },
-            "profile": {
-                "session_id": profile.session_id if profile else None,
-                "crypto_type": profile.crypto_type if profile else None,
-                "crypto_network": profile.crypto_network if profile else None,
-                "crypto_address": profile.crypto_address if profile else None,
-            } if profile else None,
-        }
+        cached = listing_detail_cache.get(listing_id)
+        if cached:
+            etag, content = cached
+        else:
+            row = await ListingsService(db).get_with_author(listing_id)
+            if not row:
+                raise HTTPException(status_code=404, detail="Anúncio não encontrado")
+
+            listing, profile = row
+            etag = weak_etag(
+                listing.id,
+                listing.updated_at,
+                profile.id if profile else None,
+                profile.updated_at if profile else None,
+            )
+            content = None
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        if content is None:
+            content = ListingDetailResponse.model_validate(
+                {"listing": listing, "profile": profile}
+            ).model_dump(mode="json")
+            listing_detail_cache.set(listing_id, (etag, content))
+
+        return FastJSONResponse(content=content, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Get listing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/submit-payment")
+@router.post("/submit-payment", response_model=PaymentSubmittedResponse)
 async def submit_payment(
     data: PaymentSubmit,
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Submit payment proof for a listing"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         # Find the payment record
         result = await db.execute(
             select(Payments).where(
@@ -297,13 +305,18 @@ async def submit_payment(
         
         if not payment:
             raise HTTPException(status_code=404, detail="Pagamento não encontrado")
+        if payment.status == "verified":
+            raise HTTPException(status_code=400, detail="Pagamento já verificado")
+        if payment.status == "expired":
+            raise HTTPException(status_code=400, detail="Pagamento expirado")
         
-        payment.tx_hash = data.tx_hash
-        payment.updated_at = datetime.now()
+        tx_hash = normalize_tx_hash(data.tx_hash)
+        if not TX_HASH_RE.match(tx_hash):
+            raise HTTPException(status_code=400, detail="Hash de transação inválido")
         
-        await db.commit()
+        await submit_tx_hash(db, payment, tx_hash)
         
-        return {"message": "Comprovante enviado! Aguarde verificação."}
+        return {"message": "Comprovante enviado! Aguarde verificação.", "payment_amount": payment.amount}
     except HTTPException:
         raise
     except Exception as e:
@@ -8,6 +8,8 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from core.projection import FieldProjection
+from models.payments import Payments
 from services.payments import PaymentsService
 from dependencies.auth import get_current_user
 from schemas.auth import UserResponse
@@ -58,8 +60,10 @@ class PaymentsListResponse(BaseModel):
     """List response schema"""
     items: List[PaymentsResponse]
     total: int
+    total_is_estimate: bool = False
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class PaymentsBatchCreateRequest(BaseModel):
@@ -83,13 +87,18 @@ class PaymentsBatchDeleteRequest(BaseModel):
     ids: List[int]
 
 
+payments_projection = FieldProjection(Payments, PaymentsResponse)
+
+
 # ---------- Routes ----------
 @router.get("", response_model=PaymentsListResponse)
 async def query_paymentss(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
@@ -107,17 +116,25 @@ async def query_paymentss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        projection = payments_projection.parse(fields)
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
             user_id=str(current_user.id),
         )
         logger.debug(f"Found {result['total']} paymentss")
+        if projection:
+            return payments_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying paymentss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -125,10 +142,12 @@ async def query_paymentss(
 
 @router.get("/all", response_model=PaymentsListResponse)
 async def query_paymentss_all(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
     db: AsyncSession = Depends(get_db),
 ):
@@ -145,16 +164,24 @@ async def query_paymentss_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        projection = payments_projection.parse(fields)
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
         )
         logger.debug(f"Found {result['total']} paymentss")
+        if projection:
+            return payments_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying paymentss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -172,14 +199,19 @@ async def get_payments(
     
     service = PaymentsService(db)
     try:
-        result = await service.get_by_id(id, user_id=str(current_user.id))
+        projection = payments_projection.parse(fields)
+        result = await service.get_by_id(id, user_id=str(current_user.id), fields=projection)
         if not result:
             logger.warning(f"Payments with id {id} not found")
             raise HTTPException(status_code=404, detail="Payments not found")
         
+        if projection:
+            return payments_projection.item_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching payments {id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -220,13 +252,10 @@ async def create_paymentss_batch(
     logger.debug(f"Batch creating {len(request.items)} paymentss")
     
     service = PaymentsService(db)
-    results = []
     
     try:
-        for item_data in request.items:
-            result = await service.create(item_data.model_dump(), user_id=str(current_user.id))
-            if result:
-                results.append(result)
+        # One multi-row INSERT in one transaction: all items are created or none
+        results = await service.create_many([item.model_dump() for item in request.items], user_id=str(current_user.id))
         
         logger.info(f"Batch created {len(results)} paymentss successfully")
         return results
@@ -246,15 +275,14 @@ async def update_paymentss_batch(
     logger.debug(f"Batch updating {len(request.items)} paymentss")
     
     service = PaymentsService(db)
-    results = []
     
     try:
-        for item in request.items:
-            # Only include non-None values for partial updates
-            update_dict = {k: v for k, v in item.updates.model_dump().items() if v is not None}
-            result = await service.update(item.id, update_dict, user_id=str(current_user.id))
-            if result:
-                results.append(result)
+        # Only include non-None values for partial updates
+        updates = [
+            (item.id, {k: v for k, v in item.updates.model_dump().items() if v is not None})
+            for item in request.items
+        ]
+        results = await service.update_many(updates, user_id=str(current_user.id))
         
         logger.info(f"Batch updated {len(results)} paymentss successfully")
         return results
@@ -305,13 +333,9 @@ async def delete_paymentss_batch(
     logger.debug(f"Batch deleting {len(request.ids)} paymentss")
     
     service = PaymentsService(db)
-    deleted_count = 0
     
     try:
-        for item_id in request.ids:
-            success = await service.delete(item_id, user_id=str(current_user.id))
-            if success:
-                deleted_count += 1
+        deleted_count = await service.delete_many(request.ids, user_id=str(current_user.id))
         
         logger.info(f"Batch deleted {deleted_count} paymentss successfully")
         return {"message": f"Successfully deleted {deleted_count} paymentss", "deleted_count": deleted_count}
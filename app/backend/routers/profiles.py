@@ -7,9 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional, List
 
-from core.database import get_db
-from models.users import Users
+from core.database import get_db, get_read_db
+from dependencies.session import get_session_user
 from models.profiles import Profiles, Favorites
+from services.listings import listing_detail_cache
+from services.sessions import SessionUser
 
 router = APIRouter(prefix="/api/v1/profiles", tags=["profiles"])
 
@@ -26,73 +28,72 @@ class FavoriteCreate(BaseModel):
     custom_name: Optional[str] = None
     custom_description: Optional[str] = None
 
-async def get_user_by_token(token: str, db: AsyncSession) -> Users:
-    """Simple token validation - in production use proper JWT"""
-    # For demo, we'll look up user by a simple mechanism
-    # In real app, decode JWT and get user_id
-    result = await db.execute(select(Users).limit(1))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=401, detail="Não autorizado")
-    return user
+class ProfileResponse(BaseModel):
+    id: str
+    anonimax_id: str
+    session_id: Optional[str] = None
+    crypto_type: Optional[str] = None
+    crypto_network: Optional[str] = None
+    crypto_address: Optional[str] = None
+    state: Optional[str] = None
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ProfilesListResponse(BaseModel):
+    profiles: List[ProfileResponse]
+
+class FavoriteProfileResponse(BaseModel):
+    session_id: Optional[str] = None
+    state: Optional[str] = None
 
-@router.get("/me")
+    class Config:
+        from_attributes = True
+
+class FavoriteResponse(BaseModel):
+    id: str
+    target_anonimax_id: str
+    custom_name: Optional[str] = None
+    custom_description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    profile: Optional[FavoriteProfileResponse] = None
+
+class FavoritesListResponse(BaseModel):
+    favorites: List[FavoriteResponse]
+
+class MessageResponse(BaseModel):
+    message: str
+
+@router.get("/me", response_model=ProfileResponse)
 async def get_my_profile(
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get current user's profile"""
     try:
-        # In production, decode token to get user_id
-        # For demo, we'll use email from token (simplified)
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        # Get the first user for demo (in production, decode JWT)
-        user = users[0]
-        
         result = await db.execute(select(Profiles).where(Profiles.user_id == user.id))
         profile = result.scalar_one_or_none()
         
         if not profile:
             raise HTTPException(status_code=404, detail="Perfil não encontrado")
         
-        return {
-            "id": profile.id,
-            "anonimax_id": profile.anonimax_id,
-            "session_id": profile.session_id,
-            "crypto_type": profile.crypto_type,
-            "crypto_network": profile.crypto_network,
-            "crypto_address": profile.crypto_address,
-            "state": profile.state,
-            "description": profile.description,
-            "created_at": profile.created_at,
-        }
+        return profile
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Get profile error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.put("/me")
+@router.put("/me", response_model=MessageResponse)
 async def update_my_profile(
     data: ProfileUpdate,
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Update current user's profile"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         result = await db.execute(select(Profiles).where(Profiles.user_id == user.id))
         profile = result.scalar_one_or_none()
         
@@ -117,6 +118,8 @@ async def update_my_profile(
         
         profile.updated_at = datetime.now()
         await db.commit()
+        # Cached listing details embed the author's contact fields
+        listing_detail_cache.clear()
         
         return {"message": "Perfil atualizado com sucesso"}
     except HTTPException:
@@ -125,12 +128,12 @@ async def update_my_profile(
         logging.error(f"Update profile error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/")
+@router.get("/", response_model=ProfilesListResponse)
 async def list_profiles(
     token: str,
     state: Optional[str] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all profiles with optional filters"""
     try:
@@ -151,42 +154,19 @@ async def list_profiles(
                 or search_lower in (p.description or "").lower()
             ]
         
-        return {
-            "profiles": [
-                {
-                    "id": p.id,
-                    "anonimax_id": p.anonimax_id,
-                    "session_id": p.session_id,
-                    "crypto_type": p.crypto_type,
-                    "crypto_network": p.crypto_network,
-                    "crypto_address": p.crypto_address,
-                    "state": p.state,
-                    "description": p.description,
-                    "created_at": p.created_at,
-                }
-                for p in profiles
-            ]
-        }
+        return {"profiles": profiles}
     except Exception as e:
         logging.error(f"List profiles error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/favorites")
+@router.post("/favorites", response_model=MessageResponse)
 async def add_favorite(
     data: FavoriteCreate,
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Add a profile to favorites"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         # Check if already favorited
         result = await db.execute(
             select(Favorites).where(
@@ -217,67 +197,46 @@ async def add_favorite(
         logging.error(f"Add favorite error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/favorites/list")
+@router.get("/favorites/list", response_model=FavoritesListResponse)
 async def list_favorites(
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """List user's favorites"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
+        # Favorites with their target profiles in one round trip
         result = await db.execute(
-            select(Favorites).where(Favorites.user_id == user.id).order_by(Favorites.created_at.desc())
+            select(Favorites, Profiles)
+            .outerjoin(Profiles, Profiles.anonimax_id == Favorites.target_anonimax_id)
+            .where(Favorites.user_id == user.id)
+            .order_by(Favorites.created_at.desc())
         )
-        favorites = result.scalars().all()
         
-        # Get profiles for each favorite
-        favorites_with_profiles = []
-        for fav in favorites:
-            result = await db.execute(
-                select(Profiles).where(Profiles.anonimax_id == fav.target_anonimax_id)
-            )
-            profile = result.scalar_one_or_none()
-            
-            favorites_with_profiles.append({
+        favorites_with_profiles = [
+            {
                 "id": fav.id,
                 "target_anonimax_id": fav.target_anonimax_id,
                 "custom_name": fav.custom_name,
                 "custom_description": fav.custom_description,
                 "created_at": fav.created_at,
-                "profile": {
-                    "session_id": profile.session_id if profile else None,
-                    "state": profile.state if profile else None,
-                } if profile else None,
-            })
+                "profile": profile,
+            }
+            for fav, profile in result.all()
+        ]
         
         return {"favorites": favorites_with_profiles}
     except Exception as e:
         logging.error(f"List favorites error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/favorites/{favorite_id}")
+@router.delete("/favorites/{favorite_id}", response_model=MessageResponse)
 async def remove_favorite(
     favorite_id: str,
-    token: str,
+    user: SessionUser = Depends(get_session_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Remove a favorite"""
     try:
-        result = await db.execute(select(Users))
-        users = result.scalars().all()
-        
-        if not users:
-            raise HTTPException(status_code=401, detail="Não autorizado")
-        
-        user = users[0]
-        
         result = await db.execute(
             select(Favorites).where(Favorites.id == favorite_id, Favorites.user_id == user.id)
         )
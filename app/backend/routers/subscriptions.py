@@ -8,6 +8,8 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from core.projection import FieldProjection
+from models.subscriptions import Subscriptions
 from services.subscriptions import SubscriptionsService
 from dependencies.auth import get_current_user
 from schemas.auth import UserResponse
@@ -61,8 +63,10 @@ class SubscriptionsListResponse(BaseModel):
     """List response schema"""
     items: List[SubscriptionsResponse]
     total: int
+    total_is_estimate: bool = False
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class SubscriptionsBatchCreateRequest(BaseModel):
@@ -86,13 +90,18 @@ class SubscriptionsBatchDeleteRequest(BaseModel):
     ids: List[int]
 
 
+subscriptions_projection = FieldProjection(Subscriptions, SubscriptionsResponse)
+
+
 # ---------- Routes ----------
 @router.get("", response_model=SubscriptionsListResponse)
 async def query_subscriptionss(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
@@ -110,17 +119,25 @@ async def query_subscriptionss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        projection = subscriptions_projection.parse(fields)
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
             user_id=str(current_user.id),
         )
         logger.debug(f"Found {result['total']} subscriptionss")
+        if projection:
+            return subscriptions_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying subscriptionss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -128,10 +145,12 @@ async def query_subscriptionss(
 
 @router.get("/all", response_model=SubscriptionsListResponse)
 async def query_subscriptionss_all(
-    query: str = Query(None, description="Query conditions (JSON string)"),
+    query: str = Query(None, description="Query conditions (JSON string; operators: $in, $gte, $lte, $prefix, $ne, $null)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's next_cursor (overrides skip)"),
+    count: str = Query(None, description="Total count strategy: exact, cached or estimate"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
     db: AsyncSession = Depends(get_db),
 ):
@@ -148,16 +167,24 @@ async def query_subscriptionss_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        projection = subscriptions_projection.parse(fields)
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            cursor=cursor,
+            count_strategy=count,
+            fields=projection,
         )
         logger.debug(f"Found {result['total']} subscriptionss")
+        if projection:
+            return subscriptions_projection.list_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying subscriptionss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -175,14 +202,19 @@ async def get_subscriptions(
     
     service = SubscriptionsService(db)
     try:
-        result = await service.get_by_id(id, user_id=str(current_user.id))
+        projection = subscriptions_projection.parse(fields)
+        result = await service.get_by_id(id, user_id=str(current_user.id), fields=projection)
         if not result:
             logger.warning(f"Subscriptions with id {id} not found")
             raise HTTPException(status_code=404, detail="Subscriptions not found")
         
+        if projection:
+            return subscriptions_projection.item_response(result, projection)
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching subscriptions {id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -223,13 +255,10 @@ async def create_subscriptionss_batch(
     logger.debug(f"Batch creating {len(request.items)} subscriptionss")
     
     service = SubscriptionsService(db)
-    results = []
     
     try:
-        for item_data in request.items:
-            result = await service.create(item_data.model_dump(), user_id=str(current_user.id))
-            if result:
-                results.append(result)
+        # One multi-row INSERT in one transaction: all items are created or none
+        results = await service.create_many([item.model_dump() for item in request.items], user_id=str(current_user.id))
         
         logger.info(f"Batch created {len(results)} subscriptionss successfully")
         return results
@@ -249,15 +278,14 @@ async def update_subscriptionss_batch(
     logger.debug(f"Batch updating {len(request.items)} subscriptionss")
     
     service = SubscriptionsService(db)
-    results = []
     
     try:
-        for item in request.items:
-            # Only include non-None values for partial updates
-            update_dict = {k: v for k, v in item.updates.model_dump().items() if v is not None}
-            result = await service.update(item.id, update_dict, user_id=str(current_user.id))
-            if result:
-                results.append(result)
+        # Only include non-None values for partial updates
+        updates = [
+            (item.id, {k: v for k, v in item.updates.model_dump().items() if v is not None})
+            for item in request.items
+        ]
+        results = await service.update_many(updates, user_id=str(current_user.id))
         
         logger.info(f"Batch updated {len(results)} subscriptionss successfully")
         return results
@@ -308,13 +336,9 @@ async def delete_subscriptionss_batch(
     logger.debug(f"Batch deleting {len(request.ids)} subscriptionss")
     
     service = SubscriptionsService(db)
-    deleted_count = 0
     
     try:
-        for item_id in request.ids:
-            success = await service.delete(item_id, user_id=str(current_user.id))
-            if success:
-                deleted_count += 1
+        deleted_count = await service.delete_many(request.ids, user_id=str(current_user.id))
         
         logger.info(f"Batch deleted {deleted_count} subscriptionss successfully")
         return {"message": f"Successfully deleted {deleted_count} subscriptionss", "deleted_count": deleted_count}
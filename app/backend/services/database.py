@@ -2,7 +2,9 @@ import logging
 import os
 import time
 
-from core.database import db_manager
+from core.database import db_manager, slow_query_log
+from core.repository import index_advice_report
+from core.sql_metrics import route_query_metrics
 from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
@@ -26,6 +28,27 @@ async def check_database_health() -> bool:
         return False
 
 
+def get_pool_stats() -> dict:
+    """Live connection pool statistics"""
+    return db_manager.pool_status()
+
+
+def get_query_stats() -> dict:
+    """Per-route SQL statement counts and timings"""
+    return route_query_metrics.snapshot()
+
+
+def get_slow_queries(limit: int = 20) -> dict:
+    """Slowest statement shapes by total time, with captured plans"""
+    return slow_query_log.top(limit)
+
+
+def get_index_advice() -> dict:
+    """Filter shapes used by list endpoints, unindexed ones first"""
+    shapes = index_advice_report()
+    return {"unsupported": sum(not shape["supported"] for shape in shapes), "shapes": shapes}
+
+
 async def initialize_database():
     """Initialize database and create tables"""
     if "MGX_IGNORE_INIT_DB" in os.environ:
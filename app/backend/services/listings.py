@@ -1,96 +1,108 @@
 import logging
-from typing import Optional, Dict, Any, List
+import re
+from typing import Optional, Dict, Any, Sequence, Tuple
 
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal_column, table, column
 
-from models.listings import Listings
+from core.cache import TTLCache
+from core.config import settings
+from core.repository import CRUDRepository
+from models.listings import Listings, SEARCH_CONFIG, SEARCH_DOCUMENT_SQL, SQLITE_SEARCH_TABLE
+from models.profiles import Profiles
 
 logger = logging.getLogger(__name__)
 
+_SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Hot listing detail payloads: listing_id -> (etag, serialized body).
+# Writes that change a listing's visible state must pop its entry.
+listing_detail_cache = TTLCache(
+    maxsize=settings.listing_detail_cache_size, ttl=settings.listing_detail_cache_ttl
+)
+
 
 # ------------------ Service Layer ------------------
-class ListingsService:
+class ListingsService(CRUDRepository[Listings]):
     """Service layer for Listings operations"""
 
-    def __init__(self, db: AsyncSession):
-        self.db = db
-
-    async def create(self, data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Listings]:
-        """Create a new listings"""
-        try:
-            if user_id:
-                data['user_id'] = user_id
-            obj = Listings(**data)
-            self.db.add(obj)
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Created listings with id: {obj.id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error creating listings: {str(e)}")
-            raise
+    model = Listings
+    owner_field = "user_id"  # users can only see and change their own records
 
-    async def check_ownership(self, obj_id: int, user_id: str) -> bool:
-        """Check if user owns this record"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            return obj is not None
-        except Exception as e:
-            logger.error(f"Error checking ownership for listings {obj_id}: {str(e)}")
-            return False
+    def _invalidate(self, obj_ids: Sequence[Any] = ()) -> None:
+        super()._invalidate(obj_ids)
+        for obj_id in obj_ids:
+            listing_detail_cache.pop(obj_id)
 
-    async def get_by_id(self, obj_id: int, user_id: Optional[str] = None) -> Optional[Listings]:
-        """Get listings by ID (user can only see their own records)"""
+    async def get_with_author(self, listing_id: str) -> Optional[Tuple[Listings, Optional[Profiles]]]:
+        """Get a listing together with its author's profile in a single query"""
         try:
-            query = select(Listings).where(Listings.id == obj_id)
-            if user_id:
-                query = query.where(Listings.user_id == user_id)
+            query = (
+                select(Listings, Profiles)
+                .outerjoin(Profiles, Profiles.anonimax_id == Listings.anonimax_id)
+                .where(Listings.id == listing_id)
+                .limit(1)
+            )
             result = await self.db.execute(query)
-            return result.scalar_one_or_none()
+            row = result.first()
+            return tuple(row) if row else None
         except Exception as e:
-            logger.error(f"Error fetching listings {obj_id}: {str(e)}")
+            logger.error(f"Error fetching listings {listing_id} with author: {str(e)}")
             raise
 
-    async def get_list(
-        self, 
-        skip: int = 0, 
-        limit: int = 20, 
-        user_id: Optional[str] = None,
-        query_dict: Optional[Dict[str, Any]] = None,
-        sort: Optional[str] = None,
+    async def search(
+        self,
+        search: str,
+        skip: int = 0,
+        limit: int = 20,
+        state: Optional[str] = None,
+        category: Optional[str] = None,
+        status: str = "active",
     ) -> Dict[str, Any]:
-        """Get paginated list of listingss (user can only see their own records)"""
-        try:
-            query = select(Listings)
-            count_query = select(func.count(Listings.id))
-            
-            if user_id:
-                query = query.where(Listings.user_id == user_id)
-                count_query = count_query.where(Listings.user_id == user_id)
-            
-            if query_dict:
-                for field, value in query_dict.items():
-                    if hasattr(Listings, field):
-                        query = query.where(getattr(Listings, field) == value)
-                        count_query = count_query.where(getattr(Listings, field) == value)
-            
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+        """Ranked full-text search over listings title and content.
 
-            if sort:
-                if sort.startswith('-'):
-                    field_name = sort[1:]
-                    if hasattr(Listings, field_name):
-                        query = query.order_by(getattr(Listings, field_name).desc())
-                else:
-                    if hasattr(Listings, sort):
-                        query = query.order_by(getattr(Listings, sort))
+        Postgres uses the GIN-indexed tsvector expression, SQLite the listings_fts
+        FTS5 table. Other dialects fall back to a case-insensitive LIKE scan.
+        """
+        try:
+            dialect = self.db.bind.dialect.name
+            filters = [Listings.status == status]
+            if state:
+                filters.append(Listings.state == state)
+            if category:
+                filters.append(Listings.category == category)
+
+            if dialect == "postgresql":
+                document = literal_column(SEARCH_DOCUMENT_SQL)
+                ts_query = func.websearch_to_tsquery(
+                    literal_column(f"'{SEARCH_CONFIG}'"), func.anonimax_unaccent(search)
+                )
+                filters.append(document.bool_op("@@")(ts_query))
+                order_by = [func.ts_rank_cd(document, ts_query).desc(), Listings.created_at.desc()]
+                base = select(Listings)
+                count_base = select(func.count(Listings.id))
+            elif dialect == "sqlite":
+                match = self._fts5_query(search)
+                if not match:
+                    return {"items": [], "total": 0, "skip": skip, "limit": limit}
+                fts = table(SQLITE_SEARCH_TABLE, column("id"))
+                join_on = fts.c.id == Listings.id
+                filters.append(literal_column(SQLITE_SEARCH_TABLE).op("MATCH")(match))
+                order_by = [func.bm25(literal_column(SQLITE_SEARCH_TABLE)), Listings.created_at.desc()]
+                base = select(Listings).select_from(Listings).join(fts, join_on)
+                count_base = select(func.count(Listings.id)).select_from(Listings).join(fts, join_on)
             else:
-                query = query.order_by(Listings.id.desc())
+                pattern = f"%{search.lower()}%"
+                filters.append(
+                    func.lower(Listings.title).like(pattern) | func.lower(Listings.content).like(pattern)
+                )
+                order_by = [Listings.created_at.desc()]
+                base = select(Listings)
+                count_base = select(func.count(Listings.id))
+
+            count_result = await self.db.execute(count_base.where(*filters))
+            total = count_result.scalar()
 
-            result = await self.db.execute(query.offset(skip).limit(limit))
+            result = await self.db.execute(base.where(*filters).order_by(*order_by).offset(skip).limit(limit))
             items = result.scalars().all()
 
             return {
@@ -100,73 +112,11 @@ class ListingsService:
                 "limit": limit,
             }
         except Exception as e:
-            logger.error(f"Error fetching listings list: {str(e)}")
+            logger.error(f"Error searching listings: {str(e)}")
             raise
 
-    async def update(self, obj_id: int, update_data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Listings]:
-        """Update listings (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Listings {obj_id} not found for update")
-                return None
-            for key, value in update_data.items():
-                if hasattr(obj, key) and key != 'user_id':
-                    setattr(obj, key, value)
-
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Updated listings {obj_id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error updating listings {obj_id}: {str(e)}")
-            raise
-
-    async def delete(self, obj_id: int, user_id: Optional[str] = None) -> bool:
-        """Delete listings (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Listings {obj_id} not found for deletion")
-                return False
-            await self.db.delete(obj)
-            await self.db.commit()
-            logger.info(f"Deleted listings {obj_id}")
-            return True
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error deleting listings {obj_id}: {str(e)}")
-            raise
-
-    async def get_by_field(self, field_name: str, field_value: Any) -> Optional[Listings]:
-        """Get listings by any field"""
-        try:
-            if not hasattr(Listings, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Listings")
-            result = await self.db.execute(
-                select(Listings).where(getattr(Listings, field_name) == field_value)
-            )
-            return result.scalar_one_or_none()
-        except Exception as e:
-            logger.error(f"Error fetching listings by {field_name}: {str(e)}")
-            raise
-
-    async def list_by_field(
-        self, field_name: str, field_value: Any, skip: int = 0, limit: int = 20
-    ) -> List[Listings]:
-        """Get list of listingss filtered by field"""
-        try:
-            if not hasattr(Listings, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Listings")
-            result = await self.db.execute(
-                select(Listings)
-                .where(getattr(Listings, field_name) == field_value)
-                .offset(skip)
-                .limit(limit)
-                .order_by(Listings.id.desc())
-            )
-            return result.scalars().all()
-        except Exception as e:
-            logger.error(f"Error fetching listingss by {field_name}: {str(e)}")
-            raise
\ No newline at end of file
+    @staticmethod
+    def _fts5_query(search: str) -> str:
+        """Build an FTS5 MATCH expression of quoted prefix terms (all terms must match)"""
+        tokens = _SEARCH_TOKEN_RE.findall(search)
+        return " ".join(f'"{token}"*' for token in tokens)
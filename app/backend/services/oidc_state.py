@@ -0,0 +1,101 @@
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from core.background import PeriodicTask
+from core.cache import TTLCache
+from core.config import settings
+from core.database import db_manager
+from models.auth import OIDCState
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class OIDCStateStore(ABC):
+    """Storage for the short-lived (state -> nonce, code_verifier) pairs of an OIDC login."""
+
+    @abstractmethod
+    async def put(self, state: str, nonce: str, code_verifier: str) -> None:
+        """Store a state until OIDC_STATE_TTL_MINUTES from now."""
+
+    @abstractmethod
+    async def pop(self, state: str) -> Optional[Dict[str, str]]:
+        """Atomically consume a state; returns None if it is unknown, expired or already used."""
+
+    @abstractmethod
+    async def purge(self) -> int:
+        """Remove expired states; returns how many were removed."""
+
+
+class DatabaseOIDCStateStore(OIDCStateStore):
+    """Keeps states in the oidc_states table, so any node can finish a login.
+
+    Expired rows are ignored on read and removed by the background purger, never
+    on the login path.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def put(self, state: str, nonce: str, code_verifier: str) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.oidc_state_ttl_minutes)
+        self.db.add(OIDCState(state=state, nonce=nonce, code_verifier=code_verifier, expires_at=expires_at))
+        await self.db.commit()
+
+    async def pop(self, state: str) -> Optional[Dict[str, str]]:
+        # DELETE ... RETURNING: one statement, so two callbacks can never consume the same state
+        result = await self.db.execute(
+            delete(OIDCState)
+            .where(OIDCState.state == state, OIDCState.expires_at > datetime.now(timezone.utc))
+            .returning(OIDCState.nonce, OIDCState.code_verifier)
+        )
+        row = result.first()
+        await self.db.commit()
+        if not row:
+            return None
+        return {"nonce": row.nonce, "code_verifier": row.code_verifier}
+
+    async def purge(self) -> int:
+        result = await self.db.execute(delete(OIDCState).where(OIDCState.expires_at <= datetime.now(timezone.utc)))
+        await self.db.commit()
+        return result.rowcount or 0
+
+
+class MemoryOIDCStateStore(OIDCStateStore):
+    """In-process TTL map. Only correct when the login callback hits the same process."""
+
+    def __init__(self, maxsize: int = 10000):
+        self._states = TTLCache(maxsize=maxsize, ttl=settings.oidc_state_ttl_minutes * 60)
+
+    async def put(self, state: str, nonce: str, code_verifier: str) -> None:
+        self._states.set(state, {"nonce": nonce, "code_verifier": code_verifier})
+
+    async def pop(self, state: str) -> Optional[Dict[str, str]]:
+        return self._states.pop(state)
+
+    async def purge(self) -> int:
+        return self._states.purge()
+
+
+memory_oidc_state_store = MemoryOIDCStateStore()
+
+
+def get_oidc_state_store(db: AsyncSession) -> OIDCStateStore:
+    """Return the store selected by OIDC_STATE_BACKEND."""
+    if settings.oidc_state_backend == "memory":
+        return memory_oidc_state_store
+    return DatabaseOIDCStateStore(db)
+
+
+# ------------------ Background purge ------------------
+async def purge_expired_oidc_states() -> int:
+    if settings.oidc_state_backend == "memory":
+        return await memory_oidc_state_store.purge()
+    async with db_manager.async_session_maker() as db:
+        return await DatabaseOIDCStateStore(db).purge()
+
+
+oidc_state_purger = PeriodicTask("OIDC state purge", settings.oidc_state_purge_interval, purge_expired_oidc_states)
@@ -0,0 +1,111 @@
+"""
+Password hashing off the event loop.
+
+Hashes use stdlib scrypt (memory-hard, no extra dependency) and are stored as
+``scrypt$<n>$<r>$<p>$<salt>$<hash>``. The KDF runs in a bounded thread pool -
+hashlib releases the GIL while it works - so a login never stalls other
+requests. When more than PASSWORD_HASH_MAX_PENDING hashes are queued, new ones
+are refused instead of letting every login's latency grow without bound.
+
+Legacy unsalted SHA-256 hex digests still verify, and verify() hands back a
+replacement hash so the caller can upgrade the row after a successful login.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES
+    )
+
+
+def hash_password_sync(password: str) -> str:
+    n = settings.password_scrypt_n
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def dummy_password_hash() -> str:
+    """A well-formed hash at the current cost that no password matches.
+
+    Verifying against it takes as long as against a real hash, so a login for an
+    unknown email costs the same as one with a wrong password.
+    """
+    n = settings.password_scrypt_n
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_b64encode(bytes(SALT_BYTES))}${_b64encode(bytes(KEY_BYTES))}"
+
+
+def verify_password_sync(password: str, stored: str) -> Tuple[bool, bool]:
+    """Return (matches, needs_rehash)."""
+    if stored.startswith("scrypt$"):
+        try:
+            _, n, r, p, salt, expected = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+            digest = _scrypt(password, base64.b64decode(salt), n, r, p)
+        except ValueError:
+            logger.warning("Malformed scrypt password hash")
+            return False, False
+        matches = hmac.compare_digest(digest, base64.b64decode(expected))
+        return matches, matches and (n, r, p) != (settings.password_scrypt_n, SCRYPT_R, SCRYPT_P)
+
+    # Legacy: unsalted SHA-256 hex digest
+    legacy = hashlib.sha256(password.encode()).hexdigest()
+    matches = hmac.compare_digest(legacy, stored)
+    return matches, matches
+
+
+class PasswordHasher:
+    """Runs the KDF in a bounded worker pool."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusy("Password hashing queue is full")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password_sync, password)
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, Optional[str]]:
+        """Check a password; on success with an outdated hash also return its replacement."""
+        matches, needs_rehash = await self._run(verify_password_sync, password, stored)
+        if matches and needs_rehash:
+            return True, await self.hash(password)
+        return matches, None
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_pending)
@@ -0,0 +1,288 @@
+"""
+On-chain verification of BRZ payments on Polygon.
+
+Every PAYMENT_VERIFY_INTERVAL seconds, pending payments whose tx_hash was submitted
+less than PAYMENT_VERIFY_MAX_AGE seconds ago are read in id order after a cursor
+stored in `worker_cursors`. A restart resumes
+where the last run stopped, and every pending payment is revisited once per pass.
+Their receipts are fetched with batched JSON-RPC: each POST carries up to
+PAYMENT_VERIFY_BATCH_SIZE ``eth_getTransactionReceipt`` calls, with
+PAYMENT_VERIFY_CONCURRENCY POSTs in flight. Then, per payment:
+
+- verify: the transaction succeeded, has PAYMENT_VERIFY_CONFIRMATIONS blocks on top,
+  and its BRZ ``Transfer`` logs pay exactly the amount to PAYMENT_RECIPIENT_ADDRESS
+  (amounts are unique per open payment, see ``unique_payment_amount``);
+- reject: the transaction reverted, pays another amount or to someone else, or it was
+  already used by another payment (ux_payments_tx_hash_verified also enforces this
+  when two runs race);
+- retry next pass: not found or not mined yet, too few confirmations, an RPC error,
+  or a malformed hash (rows from before submit-payment validated it).
+
+Nothing is rejected for a hash that can't be read: a payment still undecided after
+PAYMENT_VERIFY_MAX_AGE drops out of the window and stays pending for an admin, and
+a rejected payment goes back to pending when a new hash is submitted.
+
+Decisions go through ``decide_payment``, the same transition as the admin endpoint.
+``tests.fakes.fake_polygon_rpc`` serves a scriptable chain for local runs and tests.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from decimal import ROUND_CEILING, Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from core.background import PeriodicTask
+from core.config import settings
+from core.database import db_manager
+from models.payments import Payments
+from models.worker_cursors import WorkerCursors
+from services.payments import TX_HASH_RE, decide_payment
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "brz_payment_verifier"
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+# ERC-20 decimals()
+DECIMALS_SELECTOR = "0x313ce567"
+
+
+class RPCError(Exception):
+    """A JSON-RPC call failed (transport error or an error object in the response)."""
+
+
+class PolygonRPC:
+    """Minimal JSON-RPC client that sends calls as batch requests."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+
+    async def batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """Run calls in one POST; each result is the value or an RPCError, in call order."""
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)
+        ]
+        try:
+            response = await self.client.post(self.url, json=payload)
+            response.raise_for_status()
+            replies = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise RPCError(f"batch of {len(calls)} failed: {e}")
+        if not isinstance(replies, list):
+            # Some nodes answer a rejected batch with a single error object
+            raise RPCError(f"batch of {len(calls)} failed: {replies}")
+        results: List[Any] = [RPCError("no reply")] * len(calls)
+        for reply in replies:
+            index = reply.get("id")
+            if isinstance(index, int) and 0 <= index < len(calls):
+                error = reply.get("error")
+                results[index] = RPCError(str(error)) if error else reply.get("result")
+        return results
+
+
+def _address(value: str) -> str:
+    """Normalize an address, or a 32-byte topic holding one, to lowercase 0x + 40 hex."""
+    return "0x" + value.lower()[-40:]
+
+
+def transferred_amount(receipt: dict, token: str, recipient: str) -> int:
+    """Sum of `token` Transfer log values to `recipient` in a receipt, in base units."""
+    token, recipient = _address(token), _address(recipient)
+    total = 0
+    for log in receipt.get("logs") or ():
+        topics = log.get("topics") or []
+        if (
+            len(topics) == 3
+            and topics[0].lower() == TRANSFER_TOPIC
+            and _address(log.get("address", "")) == token
+            and _address(topics[2]) == recipient
+        ):
+            total += int(log.get("data") or "0x0", 16)
+    return total
+
+
+def required_amount(amount: float, decimals: int) -> int:
+    """Payment amount in token base units, rounded up."""
+    scaled = Decimal(str(amount)) * (Decimal(10) ** decimals)
+    return int(scaled.to_integral_value(rounding=ROUND_CEILING))
+
+
+def assess(payment: Payments, receipt: Optional[dict], head: int, decimals: int) -> Tuple[Optional[str], str]:
+    """Decide one payment from its receipt: ("verify" | "reject" | None to retry, reason)."""
+    if not receipt or receipt.get("blockNumber") is None:
+        return None, "not mined"
+    if int(receipt.get("status") or "0x0", 16) != 1:
+        return "reject", "transaction reverted"
+    confirmations = head - int(receipt["blockNumber"], 16) + 1
+    if confirmations < settings.payment_verify_confirmations:
+        return None, f"{confirmations} confirmations"
+    paid = transferred_amount(receipt, settings.brz_token_address, settings.payment_recipient_address)
+    required = required_amount(payment.amount, decimals)
+    if paid != required:
+        # Someone else's transfer (for their own amount) or a wrong amount
+        return "reject", f"paid {paid} base units to the recipient, expected exactly {required}"
+    return "verify", f"paid {paid} base units"
+
+
+def verifier_enabled() -> bool:
+    return bool(settings.polygon_rpc_url and settings.brz_token_address and settings.payment_recipient_address)
+
+
+class PaymentVerifier:
+    """One pass over a window of pending payments (see module docstring)."""
+
+    def __init__(self):
+        self._decimals: Optional[int] = None  # BRZ decimals(), read once from the contract
+
+    async def _load_window(self) -> Tuple[List[Payments], str]:
+        """Next pending payments after the stored cursor, and the cursor to store after them."""
+        limit = max(1, settings.payment_verify_batch_size) * max(1, settings.payment_verify_concurrency)
+        submitted_after = datetime.now() - timedelta(seconds=settings.payment_verify_max_age)
+        async with db_manager.async_session_maker() as db:
+            state = await db.get(WorkerCursors, CURSOR_NAME)
+            position = state.position if state else ""
+            result = await db.execute(
+                select(Payments)
+                .where(
+                    Payments.status == "pending",
+                    Payments.tx_hash.is_not(None),
+                    Payments.submitted_at >= submitted_after,
+                    Payments.id > position,
+                )
+                .order_by(Payments.id)
+                .limit(limit)
+            )
+            payments = list(result.scalars())
+        # A short window reached the end: start over on the next run
+        next_position = payments[-1].id if len(payments) == limit else ""
+        return payments, next_position
+
+    async def _receipts(self, rpc: PolygonRPC, hashes: List[str]) -> Dict[str, Any]:
+        size = max(1, settings.payment_verify_batch_size)
+        chunks = [hashes[i : i + size] for i in range(0, len(hashes), size)]
+
+        async def fetch(chunk: List[str]) -> List[Any]:
+            try:
+                return await rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk])
+            except RPCError as e:
+                return [e] * len(chunk)
+
+        results = await asyncio.gather(*(fetch(chunk) for chunk in chunks))
+        return {tx_hash: receipt for chunk, replies in zip(chunks, results) for tx_hash, receipt in zip(chunk, replies)}
+
+    async def _chain_state(self, rpc: PolygonRPC) -> Tuple[int, int]:
+        calls = [("eth_blockNumber", [])]
+        if self._decimals is None:
+            calls.append(("eth_call", [{"to": settings.brz_token_address, "data": DECIMALS_SELECTOR}, "latest"]))
+        results = await rpc.batch(calls)
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+        if self._decimals is None:
+            self._decimals = int(results[1], 16)
+        return int(results[0], 16), self._decimals
+
+    async def _used_hashes(self, hashes: List[str]) -> set:
+        """tx hashes already claimed by a verified payment (served by ux_payments_tx_hash_verified)."""
+        async with db_manager.async_session_maker() as db:
+            result = await db.execute(
+                select(Payments.tx_hash).where(Payments.status == "verified", Payments.tx_hash.in_(hashes))
+            )
+            return set(result.scalars())
+
+    async def _apply(self, decisions: List[Tuple[str, str, str]], next_position: str) -> None:
+        """Apply (payment id, action, reason) decisions and store the cursor."""
+        async with db_manager.async_session_maker() as db:
+            for payment_id, action, reason in decisions:
+                # Re-read under lock: an admin or another worker may have decided it meanwhile
+                result = await db.execute(
+                    select(Payments)
+                    .where(Payments.id == payment_id, Payments.status == "pending")
+                    .with_for_update(skip_locked=True)
+                )
+                payment = result.scalar_one_or_none()
+                if payment is None:
+                    continue
+                try:
+                    await decide_payment(db, payment, action)
+                except IntegrityError:
+                    # Another worker or an admin verified a payment with the same tx_hash first
+                    await db.rollback()
+                    logger.warning(f"Payment {payment_id} not verified: tx_hash already used by another payment")
+                    continue
+                logger.info(f"Payment {payment_id} {action}: {reason}")
+            state = await db.get(WorkerCursors, CURSOR_NAME)
+            if state is None:
+                state = WorkerCursors(name=CURSOR_NAME)
+                db.add(state)
+            state.position = next_position
+            state.updated_at = datetime.now()
+            await db.commit()
+
+    async def run(self, client: Optional[httpx.AsyncClient] = None) -> Dict[str, int]:
+        """Check one window of pending payments; returns counts per outcome."""
+        counts = {"checked": 0, "verified": 0, "rejected": 0, "retry": 0}
+        if not verifier_enabled():
+            return counts
+        payments, next_position = await self._load_window()
+        if not payments:
+            await self._apply([], next_position)
+            return counts
+
+        owned = client is None
+        client = client or httpx.AsyncClient(timeout=settings.payment_verify_rpc_timeout)
+        try:
+            rpc = PolygonRPC(client, settings.polygon_rpc_url)
+            head, decimals = await self._chain_state(rpc)
+            hashes = sorted({payment.tx_hash for payment in payments})
+            valid = [tx_hash for tx_hash in hashes if TX_HASH_RE.match(tx_hash)]
+            receipts = await self._receipts(rpc, valid)
+        finally:
+            if owned:
+                await client.aclose()
+
+        claimed = await self._used_hashes(valid)
+        decisions = []
+        # Oldest payment first, so the first claim on a shared tx_hash is the one that counts
+        for payment in sorted(payments, key=lambda p: (p.created_at or datetime.min, p.id)):
+            tx_hash = payment.tx_hash
+            counts["checked"] += 1
+            if not TX_HASH_RE.match(tx_hash):
+                action, reason = None, "malformed tx_hash"
+            elif tx_hash in claimed:
+                action, reason = "reject", "tx_hash already used by another payment"
+            elif isinstance(receipts.get(tx_hash), RPCError):
+                action, reason = None, str(receipts[tx_hash])
+            else:
+                action, reason = assess(payment, receipts.get(tx_hash), head, decimals)
+            if action is None:
+                counts["retry"] += 1
+                logger.debug(f"Payment {payment.id} not decided yet: {reason}")
+                continue
+            if action == "verify":
+                claimed.add(tx_hash)
+            counts["verified" if action == "verify" else "rejected"] += 1
+            decisions.append((payment.id, action, reason))
+
+        await self._apply(decisions, next_position)
+        return counts
+
+
+payment_verifier = PaymentVerifier()
+
+
+async def verify_pending_payments() -> None:
+    counts = await payment_verifier.run()
+    if counts["checked"]:
+        logger.info(f"BRZ payment verification: {counts}")
+
+
+payment_verification_task = PeriodicTask(
+    "BRZ payment verification", settings.payment_verify_interval, verify_pending_payments
+)
@@ -1,172 +1,167 @@
-import logging
-from typing import Optional, Dict, Any, List
+import re
+import secrets
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-from sqlalchemy import select, func
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.background import PeriodicTask
+from core.config import settings
+from core.database import db_manager
+from core.repository import CRUDRepository
+from models.listings import Listings
 from models.payments import Payments
+from services.listings import listing_detail_cache
 
-logger = logging.getLogger(__name__)
+PAYMENT_ACTIONS = ("verify", "reject")
+TX_HASH_RE = re.compile(r"^0x[0-9a-f]{64}$")  # a normalized (lowercase) transaction hash
+# A verified listing payment keeps the listing active for this long
+LISTING_ACTIVE_PERIOD = timedelta(days=30)
+LISTING_PRICE = Decimal("10")
+# Every open payment asks for the price plus its own number of ten-thousandths of BRZ, so a
+# transfer pays exactly one payment: copying someone else's tx_hash can't verify yours
+PAYMENT_REFERENCE_UNIT = Decimal("0.0001")
+PAYMENT_REFERENCE_STEPS = 9999
+PAYMENT_REFERENCE_ATTEMPTS = 5  # concurrent creates may pick the same reference (ux_payments_reference_open)
+# Statuses that hold a reference: a rejected payment can still be resubmitted
+OPEN_PAYMENT_STATUSES = ("pending", "rejected")
+
+
+class PaymentReferencesExhausted(Exception):
+    """Every payment reference is held by an open payment."""
 
 
 # ------------------ Service Layer ------------------
-class PaymentsService:
+class PaymentsService(CRUDRepository[Payments]):
     """Service layer for Payments operations"""
 
-    def __init__(self, db: AsyncSession):
-        self.db = db
+    model = Payments
+    owner_field = "user_id"  # users can only see and change their own records
 
-    async def create(self, data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Payments]:
-        """Create a new payments"""
-        try:
-            if user_id:
-                data['user_id'] = user_id
-            obj = Payments(**data)
-            self.db.add(obj)
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Created payments with id: {obj.id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error creating payments: {str(e)}")
-            raise
-
-    async def check_ownership(self, obj_id: int, user_id: str) -> bool:
-        """Check if user owns this record"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            return obj is not None
-        except Exception as e:
-            logger.error(f"Error checking ownership for payments {obj_id}: {str(e)}")
-            return False
-
-    async def get_by_id(self, obj_id: int, user_id: Optional[str] = None) -> Optional[Payments]:
-        """Get payments by ID (user can only see their own records)"""
-        try:
-            query = select(Payments).where(Payments.id == obj_id)
-            if user_id:
-                query = query.where(Payments.user_id == user_id)
-            result = await self.db.execute(query)
-            return result.scalar_one_or_none()
-        except Exception as e:
-            logger.error(f"Error fetching payments {obj_id}: {str(e)}")
-            raise
-
-    async def get_list(
-        self, 
-        skip: int = 0, 
-        limit: int = 20, 
-        user_id: Optional[str] = None,
-        query_dict: Optional[Dict[str, Any]] = None,
-        sort: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Get paginated list of paymentss (user can only see their own records)"""
-        try:
-            query = select(Payments)
-            count_query = select(func.count(Payments.id))
-            
-            if user_id:
-                query = query.where(Payments.user_id == user_id)
-                count_query = count_query.where(Payments.user_id == user_id)
-            
-            if query_dict:
-                for field, value in query_dict.items():
-                    if hasattr(Payments, field):
-                        query = query.where(getattr(Payments, field) == value)
-                        count_query = count_query.where(getattr(Payments, field) == value)
-            
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
-
-            if sort:
-                if sort.startswith('-'):
-                    field_name = sort[1:]
-                    if hasattr(Payments, field_name):
-                        query = query.order_by(getattr(Payments, field_name).desc())
-                else:
-                    if hasattr(Payments, sort):
-                        query = query.order_by(getattr(Payments, sort))
-            else:
-                query = query.order_by(Payments.id.desc())
-
-            result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
-
-            return {
-                "items": items,
-                "total": total,
-                "skip": skip,
-                "limit": limit,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching payments list: {str(e)}")
-            raise
-
-    async def update(self, obj_id: int, update_data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Payments]:
-        """Update payments (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Payments {obj_id} not found for update")
-                return None
-            for key, value in update_data.items():
-                if hasattr(obj, key) and key != 'user_id':
-                    setattr(obj, key, value)
-
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Updated payments {obj_id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error updating payments {obj_id}: {str(e)}")
-            raise
-
-    async def delete(self, obj_id: int, user_id: Optional[str] = None) -> bool:
-        """Delete payments (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Payments {obj_id} not found for deletion")
-                return False
-            await self.db.delete(obj)
-            await self.db.commit()
-            logger.info(f"Deleted payments {obj_id}")
-            return True
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error deleting payments {obj_id}: {str(e)}")
-            raise
-
-    async def get_by_field(self, field_name: str, field_value: Any) -> Optional[Payments]:
-        """Get payments by any field"""
-        try:
-            if not hasattr(Payments, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Payments")
-            result = await self.db.execute(
-                select(Payments).where(getattr(Payments, field_name) == field_value)
+
+async def assign_payment_reference(db: AsyncSession, payment: Payments, price: Decimal) -> None:
+    """Give a new payment a reference no other open payment holds, set its amount and add it (not committed).
+
+    The insert runs in a savepoint and is retried with another reference when a concurrent
+    create took the same one; raises PaymentReferencesExhausted when none is left.
+    """
+    for _ in range(PAYMENT_REFERENCE_ATTEMPTS):
+        # At most PAYMENT_REFERENCE_STEPS rows, read from ux_payments_reference_open
+        result = await db.execute(
+            select(Payments.reference).where(
+                Payments.reference.is_not(None), Payments.status.in_(OPEN_PAYMENT_STATUSES)
             )
-            return result.scalar_one_or_none()
-        except Exception as e:
-            logger.error(f"Error fetching payments by {field_name}: {str(e)}")
-            raise
-
-    async def list_by_field(
-        self, field_name: str, field_value: Any, skip: int = 0, limit: int = 20
-    ) -> List[Payments]:
-        """Get list of paymentss filtered by field"""
+        )
+        taken = set(result.scalars())
+        free = [step for step in range(1, PAYMENT_REFERENCE_STEPS + 1) if step not in taken]
+        if not free:
+            break
+        payment.reference = secrets.choice(free)
+        payment.amount = float(price + payment.reference * PAYMENT_REFERENCE_UNIT)
         try:
-            if not hasattr(Payments, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Payments")
-            result = await self.db.execute(
-                select(Payments)
-                .where(getattr(Payments, field_name) == field_value)
-                .offset(skip)
-                .limit(limit)
-                .order_by(Payments.id.desc())
+            async with db.begin_nested():
+                db.add(payment)
+            return
+        except IntegrityError:
+            continue
+    raise PaymentReferencesExhausted(f"No free payment reference for amount {price}")
+
+
+def normalize_tx_hash(tx_hash: str) -> str:
+    """Transaction hashes are compared and stored stripped and lowercase."""
+    return tx_hash.strip().lower()
+
+
+async def submit_tx_hash(db: AsyncSession, payment: Payments, tx_hash: str) -> None:
+    """Attach a (normalized, valid) tx_hash to a payment for verification, then commit.
+
+    A rejected payment goes back to pending, so a wrong hash can be replaced by the right one.
+    """
+    payment.tx_hash = tx_hash
+    payment.submitted_at = datetime.now()
+    if payment.status == "rejected":
+        payment.status = "pending"
+        if payment.listing_id:
+            result = await db.execute(select(Listings).where(Listings.id == payment.listing_id))
+            listing = result.scalar_one_or_none()
+            if listing:
+                listing.payment_status = "pending"
+                listing.updated_at = payment.submitted_at
+    await db.commit()
+    if payment.listing_id:
+        listing_detail_cache.pop(payment.listing_id)
+
+
+async def decide_payment(db: AsyncSession, payment: Payments, action: str) -> None:
+    """Verify or reject a payment and update its listing, then commit.
+
+    Shared by the admin endpoint and the on-chain verifier; raises ValueError for an unknown action,
+    and IntegrityError when verifying a tx_hash that another verified payment already holds.
+    """
+    if action not in PAYMENT_ACTIONS:
+        raise ValueError(f"Invalid payment action: {action}")
+    now = datetime.now()
+    listing = None
+    if payment.listing_id:
+        result = await db.execute(select(Listings).where(Listings.id == payment.listing_id))
+        listing = result.scalar_one_or_none()
+
+    if action == "verify":
+        payment.status = "verified"
+        payment.verified_at = now
+        if listing:
+            # Activate the listing
+            listing.status = "active"
+            listing.payment_status = "verified"
+            listing.expires_at = now + LISTING_ACTIVE_PERIOD
+            listing.updated_at = now
+    else:
+        payment.status = "rejected"
+        if listing:
+            listing.payment_status = "rejected"
+            listing.updated_at = now
+
+    await db.commit()
+    if payment.listing_id:
+        listing_detail_cache.pop(payment.listing_id)
+
+
+# ------------------ Background expiry ------------------
+async def expire_open_payments() -> int:
+    """Expire payments left open for PAYMENT_REFERENCE_TTL_DAYS so their references can be reused.
+
+    Covers payments that never got a tx_hash and rejected ones not resubmitted since; a hash
+    still waiting for an admin keeps its payment pending.
+    """
+    cutoff = datetime.now() - timedelta(days=settings.payment_reference_ttl_days)
+    async with db_manager.async_session_maker() as db:
+        result = await db.execute(
+            update(Payments)
+            .where(
+                Payments.reference.is_not(None),
+                or_(
+                    (Payments.status == "pending") & Payments.tx_hash.is_(None) & (Payments.created_at < cutoff),
+                    (Payments.status == "rejected")
+                    & (func.coalesce(Payments.submitted_at, Payments.created_at) < cutoff),
+                ),
             )
-            return result.scalars().all()
-        except Exception as e:
-            logger.error(f"Error fetching paymentss by {field_name}: {str(e)}")
-            raise
\ No newline at end of file
+            .values(status="expired")
+            .returning(Payments.listing_id)
+        )
+        expired = list(result.scalars())
+        listing_ids = [listing_id for listing_id in expired if listing_id]
+        if listing_ids:
+            await db.execute(
+                update(Listings)
+                .where(Listings.id.in_(listing_ids))
+                .values(payment_status="expired", updated_at=datetime.now())
+            )
+        await db.commit()
+    for listing_id in listing_ids:
+        listing_detail_cache.pop(listing_id)
+    return len(expired)
+
+
+payment_expirer = PeriodicTask("Open payment expiry", settings.payment_expire_interval, expire_open_payments)
@@ -1,172 +1,10 @@
-import logging
-from typing import Optional, Dict, Any, List
-
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from core.repository import CRUDRepository
 from models.profiles import Profiles
 
-logger = logging.getLogger(__name__)
-
 
 # ------------------ Service Layer ------------------
-class ProfilesService:
+class ProfilesService(CRUDRepository[Profiles]):
     """Service layer for Profiles operations"""
 
-    def __init__(self, db: AsyncSession):
-        self.db = db
-
-    async def create(self, data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Profiles]:
-        """Create a new profiles"""
-        try:
-            if user_id:
-                data['user_id'] = user_id
-            obj = Profiles(**data)
-            self.db.add(obj)
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Created profiles with id: {obj.id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error creating profiles: {str(e)}")
-            raise
-
-    async def check_ownership(self, obj_id: int, user_id: str) -> bool:
-        """Check if user owns this record"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            return obj is not None
-        except Exception as e:
-            logger.error(f"Error checking ownership for profiles {obj_id}: {str(e)}")
-            return False
-
-    async def get_by_id(self, obj_id: int, user_id: Optional[str] = None) -> Optional[Profiles]:
-        """Get profiles by ID (user can only see their own records)"""
-        try:
-            query = select(Profiles).where(Profiles.id == obj_id)
-            if user_id:
-                query = query.where(Profiles.user_id == user_id)
-            result = await self.db.execute(query)
-            return result.scalar_one_or_none()
-        except Exception as e:
-            logger.error(f"Error fetching profiles {obj_id}: {str(e)}")
-            raise
-
-    async def get_list(
-        self, 
-        skip: int = 0, 
-        limit: int = 20, 
-        user_id: Optional[str] = None,
-        query_dict: Optional[Dict[str, Any]] = None,
-        sort: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Get paginated list of profiless (user can only see their own records)"""
-        try:
-            query = select(Profiles)
-            count_query = select(func.count(Profiles.id))
-            
-            if user_id:
-                query = query.where(Profiles.user_id == user_id)
-                count_query = count_query.where(Profiles.user_id == user_id)
-            
-            if query_dict:
-                for field, value in query_dict.items():
-                    if hasattr(Profiles, field):
-                        query = query.where(getattr(Profiles, field) == value)
-                        count_query = count_query.where(getattr(Profiles, field) == value)
-            
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
-
-            if sort:
-                if sort.startswith('-'):
-                    field_name = sort[1:]
-                    if hasattr(Profiles, field_name):
-                        query = query.order_by(getattr(Profiles, field_name).desc())
-                else:
-                    if hasattr(Profiles, sort):
-                        query = query.order_by(getattr(Profiles, sort))
-            else:
-                query = query.order_by(Profiles.id.desc())
-
-            result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
-
-            return {
-                "items": items,
-                "total": total,
-                "skip": skip,
-                "limit": limit,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching profiles list: {str(e)}")
-            raise
-
-    async def update(self, obj_id: int, update_data: Dict[str, Any], user_id: Optional[str] = None) -> Optional[Profiles]:
-        """Update profiles (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Profiles {obj_id} not found for update")
-                return None
-            for key, value in update_data.items():
-                if hasattr(obj, key) and key != 'user_id':
-                    setattr(obj, key, value)
-
-            await self.db.commit()
-            await self.db.refresh(obj)
-            logger.info(f"Updated profiles {obj_id}")
-            return obj
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error updating profiles {obj_id}: {str(e)}")
-            raise
-
-    async def delete(self, obj_id: int, user_id: Optional[str] = None) -> bool:
-        """Delete profiles (requires ownership)"""
-        try:
-            obj = await self.get_by_id(obj_id, user_id=user_id)
-            if not obj:
-                logger.warning(f"Profiles {obj_id} not found for deletion")
-                return False
-            await self.db.delete(obj)
-            await self.db.commit()
-            logger.info(f"Deleted profiles {obj_id}")
-            return True
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Error deleting profiles {obj_id}: {str(e)}")
-            raise
-
-    async def get_by_field(self, field_name: str, field_value: Any) -> Optional[Profiles]:
-        """Get profiles by any field"""
-        try:
-            if not hasattr(Profiles, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Profiles")
-            result = await self.db.execute(
-                select(Profiles).where(getattr(Profiles, field_name) == field_value)
-            )
-            return result.scalar_one_or_none()
-        except Exception as e:
-            logger.error(f"Error fetching profiles by {field_name}: {str(e)}")
-            raise
-
-    async def list_by_field(
-        self, field_name: str, field_value: Any, skip: int = 0, limit: int = 20
-    ) -> List[Profiles]:
-        """Get list of profiless filtered by field"""
-        try:
-            if not hasattr(Profiles, field_name):
-                raise ValueError(f"Field {field_name} does not exist on Profiles")
-            result = await self.db.execute(
-                select(Profiles)
-                .where(getattr(Profiles, field_name) == field_value)
-                .offset(skip)
-                .limit(limit)
-                .order_by(Profiles.id.desc())
-            )
-            return result.scalars().all()
-        except Exception as e:
-            logger.error(f"Error fetching profiless by {field_name}: {str(e)}")
-            raise
\ No newline at end of file
+    model = Profiles
+    owner_field = "user_id"  # users can only see and change their own records
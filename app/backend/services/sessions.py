@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import TTLCache
+from core.config import settings
+from models.users import Users, UserSessions
+
+logger = logging.getLogger(__name__)
+
+
+class SessionUser(NamedTuple):
+    """Immutable snapshot of the authenticated user, safe to share across requests."""
+    id: str
+    email: str
+    anonimax_id: str
+    is_admin: bool
+    is_verified: bool
+    created_at: Optional[datetime]
+    expires_at: datetime
+
+
+# token_hash -> SessionUser; bounded so memory stays flat however many users log in.
+# The cache is per process: revoke/revoke_user clear it only in the worker that ran
+# them, so a revoked session (or a deleted user) stays usable in other workers for
+# up to SESSION_CACHE_TTL seconds. Keep that TTL short.
+session_cache = TTLCache(maxsize=settings.session_cache_size, ttl=settings.session_cache_ttl)
+
+
+def hash_session_token(token: str) -> str:
+    """Tokens are 256-bit random values, so a plain SHA-256 is enough to store them."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ------------------ Service Layer ------------------
+class SessionService:
+    """Service layer for login sessions"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_id: str) -> str:
+        """Open a session for a user and return the bearer token (not committed)"""
+        token = secrets.token_urlsafe(32)
+        self.db.add(
+            UserSessions(
+                token_hash=hash_session_token(token),
+                user_id=user_id,
+                created_at=datetime.now(),
+                expires_at=datetime.now() + timedelta(days=settings.session_expire_days),
+            )
+        )
+        return token
+
+    async def resolve(self, token: str) -> Optional[SessionUser]:
+        """Resolve a bearer token to its user with one primary-key lookup (cached)"""
+        token_hash = hash_session_token(token)
+        user = session_cache.get(token_hash)
+        if user is not None and user.expires_at > datetime.now():
+            return user
+
+        try:
+            result = await self.db.execute(
+                select(Users, UserSessions.expires_at)
+                .join(UserSessions, UserSessions.user_id == Users.id)
+                .where(UserSessions.token_hash == token_hash, UserSessions.expires_at > datetime.now())
+            )
+            row = result.first()
+        except Exception as e:
+            logger.error(f"Error resolving session: {str(e)}")
+            raise
+        if not row:
+            session_cache.pop(token_hash)
+            return None
+
+        db_user, expires_at = row
+        user = SessionUser(
+            id=db_user.id,
+            email=db_user.email,
+            anonimax_id=db_user.anonimax_id,
+            is_admin=bool(db_user.is_admin),
+            is_verified=bool(db_user.is_verified),
+            created_at=db_user.created_at,
+            expires_at=expires_at,
+        )
+        session_cache.set(token_hash, user)
+        return user
+
+    async def revoke(self, token: str) -> None:
+        """End a single session"""
+        token_hash = hash_session_token(token)
+        await self.db.execute(delete(UserSessions).where(UserSessions.token_hash == token_hash))
+        await self.db.commit()
+        session_cache.pop(token_hash)
+
+    async def revoke_user(self, user_id: str) -> None:
+        """End every session of a user, e.g. after a password reset.
+
+        Commits, together with whatever the caller has pending, so the cache is only
+        dropped once the sessions are really gone.
+        """
+        await self.db.execute(delete(UserSessions).where(UserSessions.user_id == user_id))
+        await self.db.commit()
+        # The cache is keyed by token hash; dropping it all is cheap and this path is rare
+        session_cache.clear()
+
+    async def purge_expired(self) -> int:
+        """Delete expired sessions"""
+        result = await self.db.execute(delete(UserSessions).where(UserSessions.expires_at <= datetime.now()))
+        await self.db.commit()
+        return result.rowcount or 0
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.background import PeriodicTask
+from core.config import settings
+from core.database import db_manager
+from models.users import UserTokens
+from services.sessions import SessionService
+
+logger = logging.getLogger(__name__)
+
+VERIFY_EMAIL = "verify_email"
+RESET_PASSWORD = "reset_password"
+
+
+def hash_user_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ------------------ Service Layer ------------------
+class UserTokenService:
+    """Service layer for single-use email verification and password reset tokens"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def issue(self, user_id: str, purpose: str, ttl: timedelta) -> str:
+        """Create a token and return its plaintext (not committed); only the digest is stored"""
+        token = secrets.token_urlsafe(32)
+        now = datetime.now()
+        self.db.add(
+            UserTokens(
+                token_hash=hash_user_token(token),
+                user_id=user_id,
+                purpose=purpose,
+                created_at=now,
+                expires_at=now + ttl,
+            )
+        )
+        return token
+
+    async def consume(self, token: str, purpose: str) -> Optional[str]:
+        """Delete a valid token and return its user id (not committed).
+
+        One primary-key DELETE ... RETURNING, so a token can be used exactly once even
+        when two requests race.
+        """
+        result = await self.db.execute(
+            delete(UserTokens)
+            .where(
+                UserTokens.token_hash == hash_user_token(token),
+                UserTokens.purpose == purpose,
+                UserTokens.expires_at > datetime.now(),
+            )
+            .returning(UserTokens.user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def revoke(self, user_id: str, purpose: str) -> None:
+        """Drop every outstanding token of a purpose for a user (not committed)"""
+        await self.db.execute(delete(UserTokens).where(UserTokens.user_id == user_id, UserTokens.purpose == purpose))
+
+
+# ------------------ Background purge ------------------
+async def purge_expired_tokens() -> int:
+    """Remove expired verification/reset tokens and login sessions."""
+    async with db_manager.async_session_maker() as db:
+        result = await db.execute(delete(UserTokens).where(UserTokens.expires_at <= datetime.now()))
+        await db.commit()
+        return (result.rowcount or 0) + await SessionService(db).purge_expired()
+
+
+token_purger = PeriodicTask("Auth token purge", settings.token_purge_interval, purge_expired_tokens)
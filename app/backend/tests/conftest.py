@@ -0,0 +1,32 @@
+"""
+Pytest configuration: every test that asks for `database` gets a fresh SQLite file.
+
+Run from app/backend:
+
+    pytest tests/ -v
+"""
+
+import pytest_asyncio
+
+from core.config import settings
+from core.database import db_manager
+
+# Register the tables the tests touch on Base.metadata (users for the foreign keys)
+import models.listings  # noqa: F401
+import models.payments  # noqa: F401
+import models.users  # noqa: F401
+import models.worker_cursors  # noqa: F401
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path, monkeypatch):
+    """db_manager bound to an empty SQLite database for the duration of one test."""
+    # database_url is read from the environment on first access and cached on the instance
+    monkeypatch.setitem(settings.__dict__, "database_url", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    (tmp_path / "test.db").touch()
+    await db_manager.init_db()
+    await db_manager.create_tables()
+    try:
+        yield db_manager
+    finally:
+        await db_manager.close_db()
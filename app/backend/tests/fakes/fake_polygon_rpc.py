@@ -0,0 +1,133 @@
+"""
+In-memory Polygon JSON-RPC node for local runs and tests of the BRZ payment verifier (not deployed).
+
+Answers eth_blockNumber, eth_getTransactionReceipt and eth_call (the token's
+ERC-20 decimals()), as single or batch requests. The chain is scripted from
+Python through ``FakeChain``, or over JSON-RPC with ``fake_transfer`` /
+``fake_mine`` when it runs as a server:
+
+    python -m tests.fakes.fake_polygon_rpc --port 8545 --token 0x... --decimals 18
+    POLYGON_RPC_URL=http://127.0.0.1:8545 BRZ_TOKEN_ADDRESS=0x... uvicorn main:app
+
+In-process, no socket is needed:
+
+    chain = FakeChain(token="0x...", decimals=18)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(chain)))
+    await payment_verifier.run(client)
+
+``chain.batch_sizes`` records the number of calls in every request received.
+"""
+
+import argparse
+import secrets
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+
+from services.payment_verifier import DECIMALS_SELECTOR, TRANSFER_TOPIC
+
+
+def _topic(address: str) -> str:
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+class RPCMethodError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeChain:
+    """Receipts and a block height, scripted by the caller."""
+
+    def __init__(self, token: str, decimals: int = 18, head: int = 1000):
+        self.token = token.lower()
+        self.decimals = decimals
+        self.head = head
+        self.receipts: Dict[str, dict] = {}
+        self.batch_sizes: List[int] = []
+
+    def mine(self, blocks: int = 1) -> int:
+        self.head += blocks
+        return self.head
+
+    def transfer(
+        self,
+        recipient: str,
+        value: int,
+        sender: str = "0x" + "11" * 20,
+        tx_hash: Optional[str] = None,
+        token: Optional[str] = None,
+        status: int = 1,
+        block: Optional[int] = None,
+    ) -> str:
+        """Record a mined transaction with one Transfer log (value in base units); returns its hash."""
+        tx_hash = (tx_hash or "0x" + secrets.token_hex(32)).lower()
+        block = self.head if block is None else block
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(block),
+            "status": hex(status),
+            "logs": [
+                {
+                    "address": (token or self.token).lower(),
+                    "topics": [TRANSFER_TOPIC, _topic(sender), _topic(recipient)],
+                    "data": "0x" + format(value, "064x"),
+                }
+            ],
+        }
+        return tx_hash
+
+    def handle(self, method: str, params: list) -> Any:
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0].lower())
+        if method == "eth_call":
+            call = params[0]
+            if call.get("to", "").lower() == self.token and call.get("data") == DECIMALS_SELECTOR:
+                return "0x" + format(self.decimals, "064x")
+            raise RPCMethodError(-32000, "execution reverted")
+        if method == "fake_transfer":
+            return self.transfer(**params[0])
+        if method == "fake_mine":
+            return hex(self.mine(*params))
+        raise RPCMethodError(-32601, f"the method {method} does not exist")
+
+    def reply(self, call: Any) -> dict:
+        if not isinstance(call, dict) or "method" not in call:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "invalid request"}}
+        try:
+            result = self.handle(call["method"], call.get("params", []))
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+        except RPCMethodError as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": e.code, "message": str(e)}}
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32602, "message": str(e)}}
+
+
+def create_app(chain: FakeChain) -> FastAPI:
+    app = FastAPI(title="Fake Polygon RPC")
+
+    @app.post("/")
+    async def rpc(request: Request):
+        body = await request.json()
+        if isinstance(body, list):
+            chain.batch_sizes.append(len(body))
+            return [chain.reply(call) for call in body]
+        chain.batch_sizes.append(1)
+        return chain.reply(body)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--token", default="0x" + "b2" * 20, help="BRZ token contract address")
+    parser.add_argument("--decimals", type=int, default=18)
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeChain(args.token, args.decimals)), host=args.host, port=args.port)
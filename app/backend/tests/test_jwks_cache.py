@@ -0,0 +1,181 @@
+"""JWKSCache and validate_id_token against a stub OIDC issuer on a local socket."""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+from core.auth import IDTokenValidationError, jwks_cache, validate_id_token
+from core.config import settings
+
+CLIENT_ID = "anonimax-test"
+
+
+def _b64(number: int) -> str:
+    raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class SigningKey:
+    def __init__(self, kid: str):
+        self.kid = kid
+        self.private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    @property
+    def jwk(self) -> dict:
+        numbers = self.private.public_key().public_numbers()
+        return {"kty": "RSA", "alg": "RS256", "kid": self.kid, "n": _b64(numbers.n), "e": _b64(numbers.e)}
+
+    def id_token(self, issuer: str) -> str:
+        pem = self.private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        now = int(time.time())
+        claims = {"iss": issuer, "aud": CLIENT_ID, "sub": "user-1", "iat": now, "exp": now + 300}
+        return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class StubIssuer:
+    """Serves /.well-known/jwks.json; every knob can be changed while it runs."""
+
+    def __init__(self):
+        self.keys = []
+        self.cache_control = "max-age=3600"
+        self.status = 200
+        self.delay = 0.0
+        self.requests = 0
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                issuer.requests += 1
+                time.sleep(issuer.delay)
+                body = json.dumps({"keys": [key.jwk for key in issuer.keys]}).encode()
+                self.send_response(issuer.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", issuer.cache_control)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return SigningKey("k1"), SigningKey("k2")
+
+
+@pytest.fixture
+def issuer(monkeypatch, keys):
+    stub = StubIssuer()
+    stub.keys = [keys[0]]
+    # Read from the environment on first access and cached on the instance, like database_url
+    monkeypatch.setitem(settings.__dict__, "oidc_issuer_url", stub.url)
+    monkeypatch.setitem(settings.__dict__, "oidc_client_id", CLIENT_ID)
+    monkeypatch.setattr(settings, "jwks_min_refresh_interval", 0.0)
+    monkeypatch.setattr(settings, "jwks_refresh_backoff", 60.0)
+    jwks_cache.clear()
+    yield stub
+    jwks_cache.clear()
+    stub.close()
+
+
+@pytest.mark.asyncio
+async def test_validates_id_tokens_with_one_fetch(issuer, keys):
+    token = keys[0].id_token(issuer.url)
+
+    for _ in range(3):
+        payload = await validate_id_token(token)
+        assert payload["sub"] == "user-1"
+
+    assert issuer.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_callers_share_one_fetch(issuer):
+    issuer.delay = 0.2
+
+    found = await asyncio.gather(*(jwks_cache.get_key("k1") for _ in range(20)))
+
+    assert all(key and key["kid"] == "k1" for key in found)
+    assert issuer.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refreshes_to_pick_up_rotated_keys(issuer, keys):
+    await jwks_cache.get_key("k1")
+    issuer.keys = [keys[0], keys[1]]
+
+    payload = await validate_id_token(keys[1].id_token(issuer.url))
+
+    assert payload["sub"] == "user-1"
+    assert issuer.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refresh_is_rate_limited(issuer, monkeypatch):
+    monkeypatch.setattr(settings, "jwks_min_refresh_interval", 60.0)
+    await jwks_cache.get_key("k1")
+
+    assert await jwks_cache.get_key("missing") is None
+    assert await jwks_cache.get_key("missing") is None
+    assert issuer.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_control_sets_the_ttl(issuer):
+    issuer.cache_control = "no-store"
+    await jwks_cache.get_jwks()
+    await jwks_cache.get_jwks()
+    assert issuer.requests == 2
+
+    issuer.cache_control = "public, max-age=600"
+    await jwks_cache.get_jwks()
+    await jwks_cache.get_jwks()
+    assert issuer.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_shared_and_backed_off(issuer, keys):
+    issuer.status = 503
+    issuer.delay = 0.2
+
+    results = await asyncio.gather(*(jwks_cache.get_key("k1") for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, Exception) for result in results)
+    assert issuer.requests == 1
+
+    # Within the backoff nobody fetches again, and validation reports the fetch error
+    with pytest.raises(IDTokenValidationError) as error:
+        await validate_id_token(keys[0].id_token(issuer.url))
+    assert error.value.error_type == "jwks_fetch_error"
+    assert issuer.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_serves_cached_keys_while_the_issuer_is_down(issuer, keys):
+    issuer.cache_control = "max-age=0"  # every call wants a refresh
+    await jwks_cache.get_key("k1")
+    issuer.status = 500
+
+    payload = await validate_id_token(keys[0].id_token(issuer.url))
+    assert payload["sub"] == "user-1"
+    await validate_id_token(keys[0].id_token(issuer.url))
+
+    assert issuer.requests == 2  # one failed refresh, then the backoff holds
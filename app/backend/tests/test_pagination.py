@@ -0,0 +1,53 @@
+"""Cursor decoding: values come back in their column's type, or the cursor is refused."""
+
+from datetime import datetime
+
+import pytest
+
+from core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from models.listings import Listings
+from models.payments import Payments
+
+
+def test_round_trips_a_datetime_cursor():
+    at = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor("-created_at", at, "L1")
+
+    assert decode_cursor(cursor, "-created_at", Listings) == (at, "L1")
+
+
+def test_converts_numbers_to_the_column_type():
+    assert decode_cursor(encode_cursor("amount", 10, "P1"), "amount", Payments) == (10.0, "P1")
+    assert isinstance(decode_cursor(encode_cursor("reference", 7, "P1"), "reference", Payments)[0], int)
+
+
+def test_keeps_null_for_a_nullable_sort_column():
+    assert decode_cursor(encode_cursor("state", None, "L1"), "state", Listings) == (None, "L1")
+
+
+@pytest.mark.parametrize(
+    "sort, value, obj_id",
+    [
+        ("-created_at", "2024-05-01", "L1"),  # a date string, not a tagged datetime
+        ("-created_at", 1714566600, "L1"),
+        ("-created_at", None, "L1"),  # NOT NULL column
+        ("title", 5, "L1"),
+        ("title", True, "L1"),
+        ("reference", "7", "P1"),
+        ("reference", 7.5, "P1"),
+        ("reference", True, "P1"),
+        ("title", "a", 42),  # ids are strings
+        ("title", "a", None),
+    ],
+)
+def test_refuses_values_of_the_wrong_type(sort, value, obj_id):
+    model = Payments if sort == "reference" else Listings
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(sort, value, obj_id), sort, model)
+
+
+def test_is_a_value_error():
+    # Routers map ValueError to 400
+    assert issubclass(InvalidCursorError, ValueError)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", None, Listings)
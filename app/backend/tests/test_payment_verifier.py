@@ -0,0 +1,210 @@
+"""PaymentVerifier.run() against the in-memory FakeChain node."""
+
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from core.config import settings
+from models.listings import Listings
+from models.payments import Payments
+from models.worker_cursors import WorkerCursors
+from services.payment_verifier import CURSOR_NAME, PaymentVerifier
+from tests.fakes.fake_polygon_rpc import FakeChain, create_app
+
+RPC_URL = "http://fake-rpc/"
+TOKEN = "0x" + "b2" * 20
+RECIPIENT = "0x" + "da" * 20
+DECIMALS = 4
+CONFIRMATIONS = 10
+
+
+def tx(n: int) -> str:
+    """A valid, ordered tx hash: chunks follow the numeric order of n."""
+    return "0x" + format(n, "064x")
+
+
+def base_units(amount: float) -> int:
+    return round(amount * 10**DECIMALS)
+
+
+class PoisonTransport(httpx.AsyncBaseTransport):
+    """Forwards to the fake node, but fails any batch POST that mentions `poison`."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, poison: str):
+        self.inner = inner
+        self.poison = poison
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.poison.encode() in request.content:
+            return httpx.Response(502, text="bad gateway")
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture(autouse=True)
+def verifier_settings(monkeypatch):
+    monkeypatch.setattr(settings, "polygon_rpc_url", RPC_URL)
+    monkeypatch.setattr(settings, "brz_token_address", TOKEN)
+    monkeypatch.setattr(settings, "payment_recipient_address", RECIPIENT)
+    monkeypatch.setattr(settings, "payment_verify_confirmations", CONFIRMATIONS)
+    monkeypatch.setattr(settings, "payment_verify_batch_size", 3)
+    monkeypatch.setattr(settings, "payment_verify_concurrency", 2)
+
+
+@pytest.fixture
+def chain():
+    return FakeChain(TOKEN, DECIMALS, head=5000)
+
+
+@pytest_asyncio.fixture
+async def client(chain):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(chain)), base_url=RPC_URL) as client:
+        yield client
+
+
+async def add_payment(
+    database, payment_id: str, tx_hash: str, amount: float = 10.0012, status: str = "pending", age: int = 0
+) -> None:
+    async with database.async_session_maker() as db:
+        db.add(
+            Listings(
+                id=f"L-{payment_id}", user_id="u", anonimax_id="a", title="t", content="c", category="x"
+            )
+        )
+        db.add(
+            Payments(
+                id=payment_id,
+                user_id="u",
+                anonimax_id="a",
+                listing_id=f"L-{payment_id}",
+                amount=amount,
+                tx_hash=tx_hash,
+                status=status,
+                created_at=datetime.now() - timedelta(minutes=age),
+                submitted_at=datetime.now(),
+            )
+        )
+        await db.commit()
+
+
+async def statuses(database) -> dict:
+    async with database.async_session_maker() as db:
+        result = await db.execute(select(Payments.id, Payments.status))
+        return dict(result.all())
+
+
+async def cursor(database) -> str:
+    async with database.async_session_maker() as db:
+        state = await db.get(WorkerCursors, CURSOR_NAME)
+        return state.position if state else None
+
+
+@pytest.mark.asyncio
+async def test_verifies_exact_amount_and_activates_listing(database, chain, client):
+    await add_payment(database, "p1", chain.transfer(RECIPIENT, base_units(10.0012), block=4000))
+
+    counts = await PaymentVerifier().run(client)
+
+    assert counts == {"checked": 1, "verified": 1, "rejected": 0, "retry": 0}
+    async with database.async_session_maker() as db:
+        listing = await db.get(Listings, "L-p1")
+        assert (listing.status, listing.payment_status) == ("active", "verified")
+        assert listing.expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_rejects_wrong_amount_recipient_token_or_reverted(database, chain, client):
+    await add_payment(database, "under", chain.transfer(RECIPIENT, base_units(10.0011), block=4000))
+    await add_payment(database, "over", chain.transfer(RECIPIENT, base_units(10.0013), block=4000))
+    await add_payment(database, "elsewhere", chain.transfer("0x" + "22" * 20, base_units(10.0012), block=4000))
+    await add_payment(
+        database, "token", chain.transfer(RECIPIENT, base_units(10.0012), block=4000, token="0x" + "33" * 20)
+    )
+    await add_payment(database, "reverted", chain.transfer(RECIPIENT, base_units(10.0012), block=4000, status=0))
+
+    counts = await PaymentVerifier().run(client)
+
+    assert counts["rejected"] == 5
+    assert set((await statuses(database)).values()) == {"rejected"}
+
+
+@pytest.mark.asyncio
+async def test_retries_until_mined_and_confirmed(database, chain, client):
+    fresh = chain.transfer(RECIPIENT, base_units(10.0012))  # 1 confirmation
+    await add_payment(database, "fresh", fresh)
+    await add_payment(database, "unknown", tx(1))  # not mined (yet)
+    await add_payment(database, "malformed", "0x1234")
+    verifier = PaymentVerifier()
+
+    counts = await verifier.run(client)
+    assert counts == {"checked": 3, "verified": 0, "rejected": 0, "retry": 3}
+    assert set((await statuses(database)).values()) == {"pending"}
+
+    chain.mine(CONFIRMATIONS)
+    counts = await verifier.run(client)
+    assert counts["verified"] == 1
+    assert await statuses(database) == {"fresh": "verified", "unknown": "pending", "malformed": "pending"}
+
+
+@pytest.mark.asyncio
+async def test_skips_payments_past_the_retry_window(database, chain, client, monkeypatch):
+    await add_payment(database, "stale", tx(1))
+    monkeypatch.setattr(settings, "payment_verify_max_age", -1.0)
+
+    counts = await PaymentVerifier().run(client)
+
+    assert counts["checked"] == 0
+    assert await statuses(database) == {"stale": "pending"}
+
+
+@pytest.mark.asyncio
+async def test_rpc_error_in_one_chunk_only_retries_that_chunk(database, chain):
+    # Receipts go out in sorted-hash chunks of 3: [1, 2, 3] and [4]
+    for n in range(1, 5):
+        chain.transfer(RECIPIENT, base_units(10.0012), tx_hash=tx(n), block=4000)
+        await add_payment(database, f"p{n}", tx(n))
+    transport = PoisonTransport(httpx.ASGITransport(app=create_app(chain)), poison=tx(2))
+
+    async with httpx.AsyncClient(transport=transport, base_url=RPC_URL) as client:
+        counts = await PaymentVerifier().run(client)
+
+    assert counts["retry"] == 3
+    # The failed chunk stays pending for the next pass; the other one is decided
+    assert await statuses(database) == {"p1": "pending", "p2": "pending", "p3": "pending", "p4": "verified"}
+
+
+@pytest.mark.asyncio
+async def test_cursor_walks_the_pending_set_and_wraps_around(database, chain, client, monkeypatch):
+    monkeypatch.setattr(settings, "payment_verify_batch_size", 1)  # window of 1 * 2 payments
+    for n in range(1, 4):
+        await add_payment(database, f"p{n}", tx(n))  # never mined: always retried
+    verifier = PaymentVerifier()
+
+    assert (await verifier.run(client))["checked"] == 2
+    assert await cursor(database) == "p2"
+    assert (await verifier.run(client))["checked"] == 1
+    assert await cursor(database) == ""  # short window: start over next time
+    assert (await verifier.run(client))["checked"] == 2
+    assert await cursor(database) == "p2"
+
+
+@pytest.mark.asyncio
+async def test_rejects_reused_tx_hash(database, chain, client):
+    reused = chain.transfer(RECIPIENT, base_units(10.0012), block=4000)
+    await add_payment(database, "earlier", reused, status="verified")
+    await add_payment(database, "again", reused)
+    shared = chain.transfer(RECIPIENT, base_units(10.0012), block=4000)
+    await add_payment(database, "first", shared, age=10)
+    await add_payment(database, "second", shared, age=5)
+
+    counts = await PaymentVerifier().run(client)
+
+    assert counts == {"checked": 3, "verified": 1, "rejected": 2, "retry": 0}
+    assert await statuses(database) == {
+        "earlier": "verified",
+        "again": "rejected",
+        "first": "verified",  # oldest claim wins
+        "second": "rejected",
+    }
@@ -0,0 +1,108 @@
+"""Query-plan regression checks: the feed, admin and my-listings queries stay on their indexes.
+
+SQLite's EXPLAIN QUERY PLAN on a seeded, ANALYZEd table: a plain "SCAN <table>" is a
+sequential scan and "USE TEMP B-TREE FOR ORDER BY" a sort, either means an index was lost.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+
+from core.config import settings
+from core.pagination import keyset_condition, order_by_keyset
+from models.listings import Listings
+from models.payments import Payments
+
+ROWS = 500_000
+
+# Rows spread over 5000 users, 27 states, 20 categories and a handful of statuses
+SEED_LISTINGS = f"""
+INSERT INTO listings (id, user_id, anonimax_id, title, content, category, state, status, payment_status, created_at)
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {ROWS})
+SELECT printf('L%07d', n), printf('u%04d', n % 5000), 'ANX', 't', 'c', printf('cat%02d', n % 20),
+       printf('S%d', n % 27), CASE WHEN n % 4 = 0 THEN 'pending' WHEN n % 10 = 1 THEN 'expired' ELSE 'active' END,
+       'verified', datetime('2024-01-01', printf('+%d minutes', n))
+FROM seq
+"""
+SEED_PAYMENTS = f"""
+INSERT INTO payments (id, user_id, anonimax_id, listing_id, amount, status, created_at)
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {ROWS})
+SELECT printf('P%07d', n), printf('u%04d', n % 5000), 'ANX', printf('L%07d', n), 10,
+       CASE WHEN n % 4 = 0 THEN 'pending' WHEN n % 10 = 1 THEN 'rejected' ELSE 'verified' END,
+       datetime('2024-01-01', printf('+%d minutes', n))
+FROM seq
+"""
+
+CURSOR = (datetime(2024, 6, 1), "L0200000")
+
+
+def newest_first(model, query, keyset: bool = False):
+    if keyset:
+        query = query.where(keyset_condition(model, model.created_at, True, *CURSOR))
+    return order_by_keyset(query, model, model.created_at, True).limit(100)
+
+
+def feed(keyset: bool = False, **filters):
+    query = select(Listings).where(Listings.status == "active")
+    for name, value in filters.items():
+        query = query.where(getattr(Listings, name) == value)
+    return newest_first(Listings, query, keyset)
+
+
+# Either of these serves the unfiltered feed as one ordered range: SQLite picks the
+# composite, Postgres the smaller partial index
+FEED_INDEXES = ("ix_listings_active_created_at", "ix_listings_status_created_at")
+
+# (name, statement, indexes that may serve it)
+QUERIES = [
+    ("feed", feed(), FEED_INDEXES),
+    ("feed next page", feed(keyset=True), FEED_INDEXES),
+    ("feed by state", feed(state="S3"), ("ix_listings_active_state_created_at",)),
+    ("feed by category", feed(category="cat07"), ("ix_listings_active_category_created_at",)),
+    (
+        "feed by category next page",
+        feed(keyset=True, category="cat07"),
+        ("ix_listings_active_category_created_at",),
+    ),
+    ("admin listings", newest_first(Listings, select(Listings)), ("ix_listings_created_at",)),
+    (
+        "admin listings by status",
+        newest_first(Listings, select(Listings).where(Listings.status == "pending")),
+        ("ix_listings_status_created_at",),
+    ),
+    (
+        "my listings",
+        newest_first(Listings, select(Listings).where(Listings.user_id == "u0042")),
+        ("ix_listings_user_id_created_at",),
+    ),
+    ("admin payments", newest_first(Payments, select(Payments)), ("ix_payments_created_at",)),
+    (
+        "admin payments by status",
+        newest_first(Payments, select(Payments).where(Payments.status == "pending")),
+        ("ix_payments_status_created_at",),
+    ),
+]
+
+
+def explain(sync_conn, statement) -> list:
+    sql = str(statement.compile(sync_conn, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in sync_conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+@pytest.mark.asyncio
+async def test_list_queries_use_their_indexes(database, monkeypatch):
+    monkeypatch.setattr(settings, "slow_query_explain", False)  # the seeding is slow on purpose
+    async with database.engine.begin() as conn:
+        await conn.execute(text(SEED_LISTINGS))
+        await conn.execute(text(SEED_PAYMENTS))
+        await conn.execute(text("ANALYZE"))
+
+    async with database.engine.connect() as conn:
+        plans = {name: await conn.run_sync(explain, statement) for name, statement, _ in QUERIES}
+
+    for name, _, indexes in QUERIES:
+        plan = plans[name]
+        assert any(f"INDEX {index} " in f"{step} " for step in plan for index in indexes), f"{name}: {plan}"
+        assert not any(step in ("SCAN listings", "SCAN payments") for step in plan), f"{name}: {plan}"
+        assert not any("TEMP B-TREE" in step for step in plan), f"{name}: {plan}"
@@ -0,0 +1,107 @@
+"""Registration under load: 200 concurrent sign-ups against 1M taken Anonimax IDs."""
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import event, func, select, text
+
+import models.profiles  # noqa: F401
+import routers.auth
+from core.config import settings
+from models.users import Users
+from services.passwords import password_hasher
+
+EXISTING = 1_000_000
+CONCURRENT = 200
+
+# ANX-0000-0001, ANX-0000-0002, ...: valid ids, all taken
+SEED_USERS = """
+INSERT INTO users (id, email, password_hash, anonimax_id, is_verified, is_admin, created_at, updated_at)
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count)
+SELECT printf('seed-%07d', n), printf('seed%07d@example.com', n), 'x',
+       printf('ANX-%04d-%04d', n / 10000, n % 10000), 1, 0, datetime('now'), datetime('now')
+FROM seq
+"""
+
+
+@pytest_asyncio.fixture
+async def client(database, monkeypatch):
+    monkeypatch.setattr(settings, "password_scrypt_n", 16)  # cheap KDF: this is about the database
+    monkeypatch.setattr(settings, "slow_query_explain", False)
+    monkeypatch.setattr(password_hasher, "max_pending", CONCURRENT)
+    app = FastAPI()
+    app.include_router(routers.auth.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def seed_users(database, count: int) -> None:
+    async with database.engine.begin() as conn:
+        await conn.execute(text(SEED_USERS), {"count": count})
+
+
+def record_statements(database) -> Counter:
+    """Count statements by their first word and table, e.g. ("INSERT", "users")."""
+    seen = Counter()
+
+    @event.listens_for(database.engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        words = statement.split()
+        verb = words[0].upper()
+        marker = "INTO" if verb == "INSERT" else "FROM"
+        table = words[words.index(marker) + 1].strip('"') if marker in words else None
+        seen[(verb, table)] += 1
+
+    return seen
+
+
+def register(client, n: int):
+    return client.post("/api/v1/auth/register", json={"email": f"new{n}@example.com", "password": "secret123"})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_registrations_cost_one_transaction_each(database, client):
+    await seed_users(database, EXISTING)
+    seen = record_statements(database)
+
+    responses = await asyncio.gather(*(register(client, n) for n in range(CONCURRENT)))
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT
+    ids = {r.json()["user"]["anonimax_id"] for r in responses}
+    assert len(ids) == CONCURRENT
+    # No lookups before the insert: the unique indexes do the checking
+    assert not any(verb == "SELECT" for verb, _ in seen), seen
+    assert seen[("INSERT", "users")] == CONCURRENT
+    async with database.async_session_maker() as db:
+        assert await db.scalar(select(func.count(Users.id))) == EXISTING + CONCURRENT
+
+
+@pytest.mark.asyncio
+async def test_taken_ids_are_retried(database, client, monkeypatch):
+    await seed_users(database, 10)
+    real = routers.auth.generate_anonimax_id
+    taken = iter(["ANX-0000-0001", "ANX-0000-0002"])
+    monkeypatch.setattr(routers.auth, "generate_anonimax_id", lambda: next(taken, None) or real())
+
+    response = await register(client, 0)
+
+    assert response.status_code == 200
+    assert response.json()["user"]["anonimax_id"] not in ("ANX-0000-0001", "ANX-0000-0002")
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(database, client, monkeypatch):
+    await seed_users(database, 10)
+    monkeypatch.setattr(routers.auth, "generate_anonimax_id", lambda: "ANX-0000-0001")
+
+    assert (await register(client, 0)).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_duplicate_email_is_still_a_400(database, client):
+    assert (await register(client, 0)).status_code == 200
+    assert (await register(client, 0)).status_code == 400
@@ -0,0 +1,63 @@
+"""
+Personal information scanner for listing moderation.
+
+All patterns are compiled once into a single alternation with one named group
+per category, so a text is scanned in one pass no matter how many categories
+exist. When matches of different categories overlap, the leftmost match wins
+and ties go to the category listed first.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple
+
+# (category, pattern, message) - order matters for ties, most specific first
+PERSONAL_INFO_PATTERNS = [
+    ("email", r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", "Email detectado"),
+    ("cpf", r"\d{3}\.?\d{3}\.?\d{3}-?\d{2}", "CPF detectado"),
+    ("phone", r"(?:\+55\s?)?(?:\(?\d{2}\)?[\s.-]?)?\d{4,5}[\s.-]?\d{4}", "Telefone detectado"),
+    ("whatsapp", r"whatsapp|wpp|zap|whats", "WhatsApp detectado"),
+]
+
+CATEGORY_MESSAGES = {category: message for category, _, message in PERSONAL_INFO_PATTERNS}
+
+# Messages are reported in this order, independent of where they occur in the text
+_MESSAGE_ORDER = ["email", "phone", "whatsapp", "cpf"]
+
+_SCANNER = re.compile(
+    "|".join(f"(?P<{category}>{pattern})" for category, pattern, _ in PERSONAL_INFO_PATTERNS),
+    re.IGNORECASE,
+)
+
+
+class PersonalInfoMatch(NamedTuple):
+    category: str
+    start: int
+    end: int
+    value: str
+
+    @property
+    def message(self) -> str:
+        return CATEGORY_MESSAGES[self.category]
+
+
+def scan(text: str) -> List[PersonalInfoMatch]:
+    """Return every personal-info match in text with its span and category."""
+    if not text:
+        return []
+    return [
+        PersonalInfoMatch(match.lastgroup, match.start(), match.end(), match.group())
+        for match in _SCANNER.finditer(text)
+    ]
+
+
+def scan_many(texts: Iterable[str]) -> List[List[PersonalInfoMatch]]:
+    """Scan a batch of texts (e.g. a moderation backfill); results are in input order."""
+    return [scan(text) for text in texts]
+
+
+def check_personal_info(text: str) -> List[str]:
+    """Return one user-facing message per category detected in text."""
+    if not text:
+        return []
+    found = {match.lastgroup for match in _SCANNER.finditer(text)}
+    return [CATEGORY_MESSAGES[category] for category in _MESSAGE_ORDER if category in found]
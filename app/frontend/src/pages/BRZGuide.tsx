@@ -208,15 +208,20 @@ export function BRZGuide() {
           </CardHeader>
           <CardContent className="space-y-6">
             <p className="text-slate-400">
-              Para pagar um anúncio no Anonimax, envie BRZ para o endereço abaixo:
+              Para pagar um anúncio no Anonimax, envie BRZ para o endereço abaixo. Cada anúncio tem
+              um valor exato (cerca de {PAYMENT_ADDRESS.amount} BRZ, com casas decimais próprias), mostrado
+              ao criar o anúncio e no seu painel.
             </p>
 
             <div className="p-6 rounded-lg bg-slate-800/50 border border-slate-700">
               <div className="text-center mb-4">
                 <div className="text-3xl font-bold text-white mb-1">
-                  {PAYMENT_ADDRESS.amount} BRZ
+                  Valor exato do seu anúncio
                 </div>
                 <div className="text-slate-400">Rede: Polygon</div>
+                <div className="text-xs text-slate-500 mt-2">
+                  As casas decimais identificam o seu pagamento: outro valor é rejeitado
+                </div>
               </div>
 
               <div className="space-y-2">
@@ -155,9 +155,12 @@ export function CreateListing() {
               <div className="p-6 rounded-lg bg-slate-800/50 border border-slate-700">
                 <div className="text-center mb-6">
                   <div className="text-4xl font-bold text-white mb-1">
-                    {PAYMENT_ADDRESS.amount} {PAYMENT_ADDRESS.crypto}
+                    {createdListing?.payment_amount ?? PAYMENT_ADDRESS.amount} {PAYMENT_ADDRESS.crypto}
                   </div>
                   <div className="text-slate-400">na rede {PAYMENT_ADDRESS.network}</div>
+                  <div className="text-xs text-slate-500 mt-2">
+                    Envie exatamente este valor: ele identifica o seu pagamento
+                  </div>
                 </div>
 
                 <div className="space-y-4">
@@ -41,6 +41,7 @@ interface Listing {
   category: string;
   status: string;
   payment_status: string;
+  payment_amount?: number | null;
   created_at: string;
 }
 
@@ -443,8 +444,16 @@ export default function Dashboard() {
                         ? 'Pago'
                         : listing.payment_status === 'pending'
                         ? 'Aguardando Pagamento'
+                        : listing.payment_status === 'expired'
+                        ? 'Pagamento Expirado'
                         : 'Pagamento Rejeitado'}
                     </span>
+                    {listing.payment_amount != null &&
+                      (listing.payment_status === 'pending' || listing.payment_status === 'rejected') && (
+                        <span className="px-3 py-1 rounded-full text-sm bg-gray-700/50 text-gray-300">
+                          Envie exatamente {listing.payment_amount} BRZ
+                        </span>
+                      )}
                   </div>
                 </div>
               ))